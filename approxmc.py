@@ -0,0 +1,298 @@
+from __future__ import annotations
+from typing import Dict, List, Optional, Set, TextIO, Tuple, TYPE_CHECKING
+from concurrent.futures import ProcessPoolExecutor
+import io
+import math
+import random
+import statistics
+import sys
+
+from randcnf import read_clauses
+from enumeration import enumerate_models
+from wmc import parse_weights
+from xor_propagating_formula import XorPropagatingFormula
+
+if TYPE_CHECKING:
+  from shared_types import Literal, Variable
+  from gauss_jordan import Xor
+  from wmc import Weight
+
+  RawClause = List[Literal]
+  # Type of a group of literals that are pairwise exclusive in every model, with their weights
+  Group = List[Tuple[Literal, Weight]]
+
+# the number of variables in each chunk of the CNF encoding of a long XOR constraint
+XOR_CHUNK_SIZE = 4
+# the number of bits of the dyadic approximation of each weight
+PRECISION_BITS = 6
+
+def threshold(epsilon: float) -> int:
+  """The number of models that a cell may have before it is split further, for a tolerance `epsilon`
+  """
+  return int(1 + 9.84 * (1 + epsilon / (1 + epsilon)) * (1 + 1 / epsilon) ** 2)
+
+def trial_count(delta: float) -> int:
+  """The number of independent trials whose median is within the tolerance with probability at least 1 - `delta`
+  """
+  return int(math.ceil(17 * math.log2(3 / delta)))
+
+def xor_clauses(xor: Xor, next_var: Variable) -> Tuple[List[RawClause], Variable]:
+  """Encodes an XOR constraint in CNF, splitting it into chunks chained by fresh variables
+
+  Each chunk of at most `XOR_CHUNK_SIZE` variables is encoded by all of
+  its clauses, so that `XorPropagatingFormula` recovers it.
+
+  :param next_var: the first fresh variable
+  :returns: the clauses, and the next fresh variable
+  """
+  variables, parity = xor
+  clauses: List[RawClause] = []
+  variables = list(variables)
+  while len(variables) > XOR_CHUNK_SIZE:
+    # the fresh variable is the parity of the chunk it replaces
+    chunk = variables[:XOR_CHUNK_SIZE - 1] + [next_var]
+    variables = [next_var] + variables[XOR_CHUNK_SIZE - 1:]
+    clauses.extend(_parity_clauses(chunk, 0))
+    next_var += 1
+  clauses.extend(_parity_clauses(variables, parity))
+  return clauses, next_var
+
+def _parity_clauses(variables: List[Variable], parity: int) -> List[RawClause]:
+  """The clauses that exclude each assignment to `variables` whose parity is not `parity`
+  """
+  clauses: List[RawClause] = []
+  for bits in range(1 << len(variables)):
+    # the clause excludes the assignment that falsifies it, which sets the negated variables
+    negated = [ (bits >> i) & 1 for i in range(len(variables)) ]
+    if sum(negated) % 2 != parity:
+      clauses.append([ -v if n else v for v, n in zip(variables, negated) ])
+  return clauses
+
+def bounded_count(clauses: List[RawClause], support: List[Variable], xors: List[Xor], limit: int) -> int:
+  """Counts the assignments to `support` that extend to models of `clauses` and `xors`, up to `limit`
+
+  The models are enumerated, projected to `support`, with
+  `enumerate_models` on an `XorPropagatingFormula`. A projected model may
+  leave some variables of `support` unassigned, and then stands for every
+  assignment to them.
+
+  :param support: variables that appear in `clauses`, and that determine the others
+  :returns: the count, or `limit` if it is at least `limit`
+  """
+  next_var = max([ abs(l) for clause in clauses for l in clause ] + list(support) + [0]) + 1
+  all_clauses = list(clauses)
+  for variables, parity in xors:
+    if not variables:
+      if parity:
+        return 0
+      continue
+    encoded, next_var = xor_clauses((variables, parity), next_var)
+    all_clauses.extend(encoded)
+  # a unit clause of a fresh variable, so that the formula is never empty
+  all_clauses.append([next_var])
+  count = 0
+  for model in enumerate_models(XorPropagatingFormula.from_clauses(all_clauses, XOR_CHUNK_SIZE), set(support)):
+    count += 1 << (len(support) - len(model))
+    if count >= limit:
+      return limit
+  return count
+
+def random_xors(support: List[Variable], count: int, rng: random.Random) -> List[Xor]:
+  """XOR constraints that each contain each variable of `support` with probability 1/2, with a random parity
+  """
+  return [ ([ v for v in support if rng.random() < 0.5 ], rng.randrange(2)) for _ in range(count) ]
+
+def _trial(clauses: List[RawClause], support: List[Variable], limit: int, seed: int) -> Optional[int]:
+  """Estimates the number of projected models from the cell of a random hash that has fewer than `limit` of them
+
+  The hashes are the prefixes of one list of random XOR constraints, so
+  the cells only shrink as constraints are added, and the least number
+  of constraints whose cell has fewer than `limit` models is found by a
+  binary search.
+
+  :returns: the number of models in that cell times the number of cells, or None if no such cell was found
+  """
+  rng = random.Random(seed)
+  xors = random_xors(support, len(support), rng)
+  counts: Dict[int, int] = {}
+  def cell_count(m: int) -> int:
+    if m not in counts:
+      counts[m] = bounded_count(clauses, support, xors[:m], limit)
+    return counts[m]
+  # the cell of no constraint has at least `limit` models, which `approximate_count` checks first
+  low, high = 0, len(support)
+  if cell_count(high) >= limit:
+    return None
+  while high - low > 1:
+    middle = (low + high) // 2
+    if cell_count(middle) >= limit:
+      low = middle
+    else:
+      high = middle
+  return cell_count(high) << high
+
+def approximate_count(clauses: List[RawClause], support: Optional[List[Variable]] = None, epsilon: float = 0.8, delta: float = 0.2, trials: Optional[int] = None, workers: Optional[int] = None, seed: Optional[int] = None) -> int:
+  """Approximately count the models of `clauses`, projected to `support`, in the manner of ApproxMC
+
+  The projected models are split into cells by random XOR constraints
+  over `support`, with as many constraints as needed for a cell to have
+  fewer than `threshold(epsilon)` models; the count of that cell times
+  the number of cells estimates the count. The median of the estimates
+  of independent trials is within a factor of 1 + `epsilon` of the count
+  with probability at least 1 - `delta`. If there are fewer models than
+  the threshold, they are counted exactly.
+
+  :param support: an independent support: variables whose values in a model determine the others; defaults to every variable of `clauses`
+  :param trials: the number of trials; defaults to `trial_count(delta)`
+  :param workers: the number of worker processes that run the trials; defaults to the number of CPUs, and 1 runs them in this process
+  :param seed: the seed of the random hashes
+  """
+  clauses = [ list(dict.fromkeys(clause)) for clause in clauses if not any(-l in clause for l in clause) ]
+  represented: Set[Variable] = { abs(l) for clause in clauses for l in clause }
+  variables = set(support) if support is not None else represented
+  # support variables in no clause double the count each, and are not hashed
+  free = len(variables - represented)
+  hashed = sorted(variables & represented)
+  limit = threshold(epsilon)
+  exact = bounded_count(clauses, hashed, [], limit)
+  if exact < limit:
+    return exact << free
+  rng = random.Random(seed)
+  seeds = [ rng.randrange(1 << 32) for _ in range(trials if trials is not None else trial_count(delta)) ]
+  if workers == 1:
+    estimates = [ _trial(clauses, hashed, limit, s) for s in seeds ]
+  else:
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+      estimates = list(executor.map(_trial, [clauses] * len(seeds), [hashed] * len(seeds), [limit] * len(seeds), seeds))
+  found = [ estimate for estimate in estimates if estimate is not None ]
+  if not found:
+    raise Exception("no trial found a small enough cell")
+  return int(statistics.median_low(found)) << free
+
+def dyadic_reduction(clauses: List[RawClause], groups: List[Group], bits: int = PRECISION_BITS) -> Tuple[List[RawClause], List[Variable]]:
+  """Reduces the weighted count of `clauses` to an unweighted count
+
+  Each group of literals that are pairwise exclusive in every model is
+  given a block of `bits` fresh variables, read as a binary number `y`.
+  A literal of weight `w` at most 1 in the group is made to imply that
+  `y` is less than `w` times `2^bits`, rounded, and if no literal of the
+  group is true, `y` is free. Every model of `clauses` then has as many
+  extensions as its weight, with the weights rounded to multiples of
+  `2^-bits`, times `2^bits` for each group.
+
+  :param groups: the groups, whose weights are at most 1; the weight of
+    a model is the product over the groups of the weight of its true
+    literal, or 1 if there is none
+  :returns: the clauses with those that constrain the blocks, and the variables of the blocks
+  """
+  next_var = max([ abs(l) for clause in clauses for l in clause ] + [ abs(l) for group in groups for l, _ in group ] + [0]) + 1
+  reduced = list(clauses)
+  blocks: List[Variable] = []
+  for group in groups:
+    block = list(range(next_var, next_var + bits))
+    next_var += bits
+    blocks.extend(block)
+    for l, weight in group:
+      reduced.extend([ clause + [-l] for clause in _less_than(block, round(weight * (1 << bits))) ])
+  return reduced, blocks
+
+def _less_than(block: List[Variable], k: int) -> List[RawClause]:
+  """Clauses that hold exactly when the number `block` encodes, most significant bit first, is less than `k`
+  """
+  if k <= 0:
+    return [[]]
+  # y < k when y <= k - 1, which is violated at the first bit where y has a 1 and k - 1 a 0
+  c = k - 1
+  bits = [ (c >> (len(block) - 1 - i)) & 1 for i in range(len(block)) ]
+  return [ [-block[i]] + [ -block[j] for j in range(i) if bits[j] ] for i in range(len(block)) if not bits[i] ]
+
+def approximate_weighted_count(formula_file: TextIO, weights_file: TextIO, bits: int = PRECISION_BITS, **options) -> Weight:
+  """Approximately compute the weighted model count of a formula and a weights file as written by `BayesGraph.to_formula_file_with_evidence`
+
+  Each variable with literals of different weights is a group of its two
+  literals for `dyadic_reduction`, after both weights are divided by the
+  larger one. The independent support is read from `c ind` lines of the
+  formula, if there are any, and is otherwise every variable; it is
+  extended with the blocks of the reduction. `options` are passed to
+  `approximate_count`.
+  """
+  text = formula_file.read()
+  clauses = read_clauses(io.StringIO(text))
+  weights = parse_weights(weights_file)
+  support = _independent_support(io.StringIO(text))
+  num_vars = max([ abs(l) for clause in clauses for l in clause ] + [ abs(l) for l in weights ] + [0])
+  scale = 1.0
+  groups: List[Group] = []
+  for v in range(1, num_vars + 1):
+    positive, negative = weights.get(v, 1.0), weights.get(-v, 1.0)
+    largest = max(positive, negative)
+    scale *= largest
+    if largest == 0:
+      return 0.0
+    if positive != negative:
+      groups.append([(v, positive / largest), (-v, negative / largest)])
+  reduced, blocks = dyadic_reduction(clauses, groups, bits)
+  if support is None:
+    support = list(range(1, num_vars + 1))
+  count = approximate_count(reduced, support + blocks, **options)
+  return count * scale / 2 ** (bits * len(groups))
+
+def _independent_support(file_object: TextIO) -> Optional[List[Variable]]:
+  """The variables of the `c ind <variables> 0` lines of a DIMACS file, or None if there are none
+  """
+  support: Optional[List[Variable]] = None
+  for line in file_object:
+    tokens = line.split()
+    if tokens[:2] == ['c', 'ind']:
+      support = (support or []) + [ int(token) for token in tokens[2:] if token != '0' ]
+  return support
+
+def approximate_probability_of_evidence(graph_file: TextIO, evidence_file: TextIO, encoding: str = "pairwise", deterministic: bool = False, bits: int = PRECISION_BITS, **options) -> Weight:
+  """Approximately compute the probability of the evidence on a Bayes network in .uai format
+
+  The encoding of `BayesGraph.to_formula` is counted in this process,
+  with the indicator variables as the independent support. In every
+  model, at most one parameter variable of each factor is true, and
+  the others have weight 1 when false, so the parameters of a factor
+  are one group of `dyadic_reduction`. `options` are passed to
+  `approximate_count`.
+  """
+  from graphical.bayes_graph import BayesGraph
+  graph = BayesGraph(graph_file)
+  weights, cnf = graph.to_formula(encoding, deterministic)
+  cnf = cnf + graph.evidence_to_formula(evidence_file)
+  clauses = [ [ var + 1 if sign else -(var + 1) for sign, var in clause ] for clause in cnf ]
+  num_indicators = sum(graph.cardinalities)
+  # the parameter variables follow the indicator variables, in the order of `BayesGraph.to_formula`
+  groups: List[Group] = []
+  var = num_indicators
+  for table in graph.tables:
+    group: Group = []
+    for assignment in sorted(table.keys()):
+      if deterministic and float(table[assignment]) in (0.0, 1.0):
+        continue
+      var += 1
+      group.append((var, float(weights[var - 1])))
+    if group:
+      groups.append(group)
+  reduced, blocks = dyadic_reduction(clauses, groups, bits)
+  count = approximate_count(reduced, list(range(1, num_indicators + 1)) + blocks, **options)
+  return count / 2 ** (bits * len(groups))
+
+if __name__ == "__main__":
+  if len(sys.argv) not in (2, 3):
+    print("Usage: python approxmc.py path/to/formula.cnf")
+    print("       python approxmc.py path/to/formula.cnf path/to/formula.weights")
+    print("       python approxmc.py path/to/graph.uai path/to/evidence.uai.evid")
+    sys.exit(0)
+  if len(sys.argv) == 2:
+    with open(sys.argv[1]) as file:
+      text = file.read()
+    print(approximate_count(read_clauses(io.StringIO(text)), _independent_support(io.StringIO(text))))
+  else:
+    _, first_file, second_file = sys.argv
+    with open(first_file) as file1, open(second_file) as file2:
+      if first_file.endswith(".uai"):
+        print(approximate_probability_of_evidence(file1, file2))
+      else:
+        print(approximate_weighted_count(file1, file2))
@@ -1,20 +1,47 @@
 from __future__ import annotations
-from typing import Dict, List, Optional, Set, Tuple, TYPE_CHECKING
+from typing import Dict, List, Optional, Set, Tuple, TYPE_CHECKING, Union
+from abc import ABC, abstractmethod
+import weakref
 
 if TYPE_CHECKING:
   from shared_types import DecisionLevel, Variable, Value
   from clause import Clause
+  from cardinality import CardinalityReason
 
-  Antecedent = Optional[Clause]
+  Antecedent = Optional[Union[Clause, CardinalityReason]]
   AssignmentItem = Tuple[DecisionLevel, Variable, Value, Antecedent]
 
+class AssignmentListener(ABC):
+  """Is told of each assignment made to, and undone from, an `Assignment` that it listens to
+  """
+
+  @abstractmethod
+  def assigned(self, item: AssignmentItem) -> None:
+    pass
+
+  @abstractmethod
+  def unassigned(self, item: AssignmentItem) -> None:
+    pass
+
 class Assignment:
 
   def __init__(self: Assignment, variables: Set[Variable]) -> None:
     self.history: List[Dict[Variable, AssignmentItem]] = []
     self.current: Dict[Variable, AssignmentItem] = {}
     self.unassigned_variables = variables
-    pass
+    # weak references, so that a listener, such as the brancher of a
+    # finished solve, does not outlive its last other reference
+    self.listeners: List[weakref.ref[AssignmentListener]] = []
+
+  def add_listener(self: Assignment, listener: AssignmentListener) -> None:
+    """Tells `listener` of each assignment made and undone from now on, after it is made or undone
+
+    Assignments are undone a decision level at a time, in the order they
+    were made. The listener is dropped once it is no longer referenced
+    elsewhere.
+    """
+    self.listeners = [ ref for ref in self.listeners if ref() is not None ]
+    self.listeners.append(weakref.ref(listener))
 
   def __contains__(self: Assignment, key: Variable) -> bool:
     return key in self.current
@@ -29,6 +56,10 @@ class Assignment:
     while len(self.history) <= d:
       self.history.append({})
     self.history[d][variable] = item
+    for ref in self.listeners:
+      listener = ref()
+      if listener is not None:
+        listener.assigned(item)
 
   def backtrack(self: Assignment, d: DecisionLevel) -> None:
     while len(self.history) > d + 1:
@@ -36,6 +67,11 @@ class Assignment:
       for variable in d_assignments:
         del self.current[variable]
         self.unassigned_variables.add(variable)
+      for ref in self.listeners:
+        listener = ref()
+        if listener is not None:
+          for item in d_assignments.values():
+            listener.unassigned(item)
 
   def get_value(self: Assignment, variable: Variable) -> Value:
     if variable in self.current:
@@ -61,4 +97,7 @@ class Assignment:
     return self.unassigned_variables
   
   def get_assignment_at_level(self: Assignment, d: DecisionLevel) -> Dict[Variable, AssignmentItem]:
+    if d >= len(self.history):
+      # no assignment has been made at decision level `d` yet
+      return {}
     return self.history[d]
\ No newline at end of file
@@ -0,0 +1,61 @@
+from __future__ import annotations
+from typing import Callable, Optional, Set, TYPE_CHECKING
+import sys
+
+import cdcl
+from propagating_formula import PropagatingFormula
+from vsids_brancher import VSIDSBrancher
+
+if TYPE_CHECKING:
+  from shared_types import Literal
+  from brancher import Brancher
+
+def backbone(formula: PropagatingFormula, create_brancher: Callable[[PropagatingFormula], Brancher] = VSIDSBrancher.create) -> Optional[Set[Literal]]:
+  """The literals that are true in every model of `formula`
+
+  A first model gives the candidates. Each candidate that is not yet
+  implied at decision level 0 is tested by solving again on the same
+  `formula` with its negation assumed: if a model is found, the
+  candidate is not in the backbone, and neither is any other candidate
+  that the model falsifies; otherwise the negation was refuted, the
+  candidate is implied at decision level 0 from then on, and it is in
+  the backbone. Every test keeps the clauses learned by the ones before.
+
+  :returns: the backbone, or None if `formula` is unsatisfiable
+  """
+  brancher = create_brancher(formula)
+  reuse_brancher = lambda _: brancher
+  assignment = formula.get_partial_assignment()
+  state, _ = cdcl.cdcl_budgeted(formula, None, reuse_brancher)
+  if state != cdcl.SATISFIABLE:
+    return None
+  candidates: Set[Literal] = { v if item[2] == 1 else -v for v, item in assignment.current.items() }
+  result: Set[Literal] = set()
+  while candidates:
+    # candidates implied at decision level 0 need no test
+    for l in list(candidates):
+      if assignment.get_decision_level(abs(l)) == 0:
+        candidates.discard(l)
+        result.add(l)
+    if not candidates:
+      break
+    candidate = min(candidates, key=abs)
+    state, _ = cdcl.cdcl_budgeted(formula, None, reuse_brancher, assumptions=[-candidate])
+    if state == cdcl.SATISFIABLE:
+      for l in list(candidates):
+        if assignment.get_value(abs(l)) != (1 if l > 0 else 0):
+          candidates.discard(l)
+    # otherwise, the assumption was refuted, and the candidate is implied at decision level 0
+  formula.backtrack(0)
+  return result
+
+if __name__ == "__main__":
+  if len(sys.argv) != 2:
+    print("Usage: python backbone.py path/to/file.cnf")
+    sys.exit(0)
+  with open(sys.argv[1]) as file:
+    literals = backbone(PropagatingFormula(file))
+  if literals is None:
+    print("UNSATISFIABLE")
+  else:
+    print(" ".join([ str(l) for l in sorted(literals, key=abs) ]) + " 0")
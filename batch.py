@@ -0,0 +1,420 @@
+from __future__ import annotations
+from typing import Dict, Iterable, List, Optional, Set, Tuple, TYPE_CHECKING
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+import os
+import sys
+
+import cdcl
+from propagating_formula import PropagatingFormula
+from vsids_brancher import VSIDSBrancher
+from randcnf import read_clauses
+
+if TYPE_CHECKING:
+  from shared_types import Literal, Variable
+  from propagating_formula import State
+
+  RawClause = List[Literal]
+
+UNSATISFIED: State = PropagatingFormula.UNSATISFIED
+SATISFIABLE: State = PropagatingFormula.SATISFIED
+
+def split_family(formulas: List[List[RawClause]]) -> Tuple[List[RawClause], List[List[RawClause]]]:
+  """Splits a family of formulas into the clauses that all of them share and the clauses that each adds to those
+
+  :returns: the shared base formula, followed by the delta clauses of each formula in order
+  """
+  if not formulas:
+    return [], []
+  # count clauses by their literals, so that the base is the multiset intersection
+  def counts(formula: List[RawClause]) -> Dict[Tuple[Literal, ...], int]:
+    result: Dict[Tuple[Literal, ...], int] = {}
+    for clause in formula:
+      key = tuple(sorted(clause))
+      result[key] = result.get(key, 0) + 1
+    return result
+  shared = counts(formulas[0])
+  for formula in formulas[1:]:
+    formula_counts = counts(formula)
+    shared = { key: min(count, formula_counts[key]) for key, count in shared.items() if key in formula_counts }
+  base: List[RawClause] = []
+  deltas: List[List[RawClause]] = []
+  for formula in formulas:
+    remaining = dict(shared)
+    delta: List[RawClause] = []
+    for clause in formula:
+      key = tuple(sorted(clause))
+      if remaining.get(key, 0) > 0:
+        remaining[key] -= 1
+        if formula is formulas[0]:
+          base.append(clause)
+      else:
+        delta.append(clause)
+    deltas.append(delta)
+  return base, deltas
+
+class FamilySolver:
+  """Solves a family of formulas that share a base formula, one query at a time, on a single warm `PropagatingFormula`
+
+  The base formula is parsed and propagated once. Each query is the base
+  formula together with some delta clauses. Unit delta clauses are
+  assumed: they are decided before any other variable and are never
+  added to the formula. The other delta clauses of query `i` are added to
+  the base formula when it is constructed, each guarded by the negation
+  of a fresh activation variable `a_i`, and `a_i` is assumed along with
+  the unit delta clauses of query `i`. The activation variables of the
+  other queries are assumed false, so that the brancher does not decide
+  them true and drag their delta clauses into the query.
+
+  Every clause of the formula is then implied by the base formula alone,
+  with the activation variables free, and so is every clause learned
+  while answering any query. Learned clauses are kept across queries; a
+  learned clause that depends on the deltas of a query mentions the
+  negation of its activation variable or of one of its assumptions, and
+  is satisfied by any query that does not make them.
+
+  :param formula: the base formula together with the guarded delta clauses
+  :param brancher: the brancher shared by all queries
+  :param assumptions: the literals assumed for each query, besides the negated activation variables of the other queries
+  :param activations: the activation variable of each query, or None if it has no delta clause to guard
+  """
+
+  def __init__(self: FamilySolver, base: List[RawClause], deltas: List[List[RawClause]]) -> None:
+    variables: Set[Variable] = { abs(l) for clause in base for l in clause }
+    for delta in deltas:
+      variables |= { abs(l) for clause in delta for l in clause }
+    next_var = max(variables, default=0) + 1
+    clauses = list(base)
+    self.assumptions: List[List[Literal]] = []
+    self.activations: List[Optional[Variable]] = []
+    for delta in deltas:
+      assumptions = [ clause[0] for clause in delta if len(clause) == 1 ]
+      guarded = [ clause for clause in delta if len(clause) != 1 ]
+      if guarded:
+        assumptions.append(next_var)
+        clauses.extend([ clause + [-next_var] for clause in guarded ])
+        self.activations.append(next_var)
+        next_var += 1
+      else:
+        self.activations.append(None)
+      self.assumptions.append(assumptions)
+
+    # variables that only appear in unit delta clauses are not represented in `Formula`
+    self.represented: Set[Variable] = { abs(l) for clause in clauses for l in clause }
+    self.formula = PropagatingFormula.from_clauses(clauses)
+    self.brancher = VSIDSBrancher.create(self.formula)
+
+  def solve(self: FamilySolver, query: int) -> State:
+    """Decides the satisfiability of the base formula together with the delta clauses of `query`
+    """
+    formula = self.formula
+    assumptions = self.assumptions[query]
+    formula.backtrack(0)
+    # assumptions on unrepresented variables only need to agree with each other
+    free_values: Dict[Variable, int] = {}
+    for l in assumptions:
+      if abs(l) not in self.represented:
+        if free_values.setdefault(abs(l), int(l > 0)) != int(l > 0):
+          return UNSATISFIED
+    assumptions = [ l for l in assumptions if abs(l) in self.represented ]
+    assumptions += [ -a for i, a in enumerate(self.activations) if a is not None and i != query ]
+    state, _ = cdcl.cdcl_budgeted(formula, None, lambda _: self.brancher, assumptions=assumptions)
+    return state
+
+  def solve_all(self: FamilySolver) -> List[State]:
+    return [ self.solve(query) for query in range(len(self.assumptions)) ]
+
+def solve_family(formulas: List[List[RawClause]]) -> List[State]:
+  """Decides the satisfiability of each formula in a family, sharing the work on the clauses common to all of them
+  """
+  return FamilySolver(*split_family(formulas)).solve_all()
+
+# the value of a literal code that is unassigned, in `PackedSolver.value`
+UNASSIGNED = 2
+# the factor that VSIDS activities decay by at each conflict of a `PackedSolver`
+ACTIVITY_DECAY = 0.95
+
+class PackedFormulas:
+  """Many formulas packed into flat arrays, without a `Formula`, `Clause` or `Assignment` object for any of them
+
+  :param arena: the clauses of every formula in order, as 32-bit literals with each clause terminated by 0
+  :param ends: the end in `arena` of each formula
+  :param num_vars: the largest variable of each formula
+  """
+
+  def __init__(self: PackedFormulas, formulas: Iterable[List[RawClause]] = ()) -> None:
+    self.arena = array("i")
+    self.ends = array("q")
+    self.num_vars = array("i")
+    for formula in formulas:
+      self.append(formula)
+
+  def append(self: PackedFormulas, clauses: List[RawClause]) -> None:
+    largest = 0
+    for clause in clauses:
+      self.arena.extend(clause)
+      self.arena.append(0)
+      largest = max(largest, max(map(abs, clause), default=0))
+    self.ends.append(len(self.arena))
+    self.num_vars.append(largest)
+
+  def __len__(self: PackedFormulas) -> int:
+    return len(self.ends)
+
+  def start(self: PackedFormulas, index: int) -> int:
+    return self.ends[index - 1] if index > 0 else 0
+
+  def slice(self: PackedFormulas, first: int, last: int) -> PackedFormulas:
+    """The formulas from `first` up to `last`, packed on their own
+    """
+    packed = PackedFormulas()
+    offset = self.start(first)
+    packed.arena = self.arena[offset:self.start(last)]
+    packed.ends = array("q", [ end - offset for end in self.ends[first:last] ])
+    packed.num_vars = self.num_vars[first:last]
+    return packed
+
+class PackedSolver:
+  """A CDCL solver for tiny formulas, which solves the formulas of a `PackedFormulas` one after another in the same buffers
+
+  For formulas with a handful of variables and a few dozen clauses,
+  building a `Formula` costs more than searching it, so this solver
+  keeps its clauses as lists of literal codes, `2 * v` for `v` and
+  `2 * v + 1` for `-v`, and its assignment in arrays indexed by
+  variable or literal code. The arrays are allocated once for the
+  largest formula so far, and only the entries of the variables of each
+  formula are reset before it is solved.
+
+  It watches two literals of each clause, learns first-UIP clauses,
+  decides the unassigned variable of highest VSIDS activity in its
+  saved phase, and never restarts or forgets clauses.
+
+  :param max_vars: the number of variables that the buffers hold
+  :param value: the value of each literal code: 1, 0, or `UNASSIGNED`
+  :param level: the decision level of each assigned variable
+  :param reason: the index of the clause that implied each assigned variable, or -1 for decisions and level 0
+  :param trail: the literal codes assigned, in the order they were assigned
+  """
+
+  def __init__(self: PackedSolver, max_vars: int = 0) -> None:
+    self.max_vars = -1
+    self._allocate(max_vars)
+
+  def _allocate(self: PackedSolver, max_vars: int) -> None:
+    self.max_vars = max_vars
+    size = max_vars + 1
+    self.value = bytearray([UNASSIGNED]) * (2 * size)
+    self.level = array("i", [0]) * size
+    self.reason = array("i", [-1]) * size
+    self.trail = array("i", [0]) * size
+    self.phase = bytearray(size)
+    self.seen = bytearray(size)
+    self.activity = [0.0] * size
+    self.watches: List[List[int]] = [ [] for _ in range(2 * size) ]
+
+  def solve(self: PackedSolver, packed: PackedFormulas, index: int) -> State:
+    """Decides the satisfiability of formula `index` of `packed`
+    """
+    n = packed.num_vars[index]
+    if n > self.max_vars:
+      self._allocate(max(n, 2 * self.max_vars))
+    value, level, reason, trail = self.value, self.level, self.reason, self.trail
+    phase, seen, activity, watches = self.phase, self.seen, self.activity, self.watches
+    for code in range(2, 2 * n + 2):
+      value[code] = UNASSIGNED
+      watches[code].clear()
+    for v in range(1, n + 1):
+      phase[v] = 1
+      activity[v] = 0.0
+
+    clauses: List[List[int]] = []
+    units: List[int] = []
+    clause: List[int] = []
+    arena = packed.arena
+    for position in range(packed.start(index), packed.ends[index]):
+      l = arena[position]
+      if l != 0:
+        clause.append(2 * l if l > 0 else 1 - 2 * l)
+        continue
+      codes = set(clause)
+      clause = list(dict.fromkeys(clause))
+      if not any(code ^ 1 in codes for code in clause):
+        if not clause:
+          return UNSATISFIED
+        if len(clause) == 1:
+          units.append(clause[0])
+        else:
+          watches[clause[0]].append(len(clauses))
+          watches[clause[1]].append(len(clauses))
+          clauses.append(clause)
+      clause = []
+
+    trail_size = 0
+    for code in units:
+      if value[code] == 0:
+        return UNSATISFIED
+      if value[code] == UNASSIGNED:
+        value[code], value[code ^ 1] = 1, 0
+        level[code >> 1], reason[code >> 1] = 0, -1
+        trail[trail_size] = code
+        trail_size += 1
+    trail_lim: List[int] = []
+    head = 0
+    increment = 1.0
+
+    while True:
+      # propagate the assignments on the trail from `head`
+      conflict = -1
+      while head < trail_size and conflict < 0:
+        false_code = trail[head] ^ 1
+        head += 1
+        watching = watches[false_code]
+        i = j = 0
+        while i < len(watching):
+          clause_index = watching[i]
+          i += 1
+          clause = clauses[clause_index]
+          if clause[0] == false_code:
+            clause[0], clause[1] = clause[1], false_code
+          first = clause[0]
+          if value[first] == 1:
+            watching[j] = clause_index
+            j += 1
+            continue
+          for k in range(2, len(clause)):
+            if value[clause[k]] != 0:
+              clause[1], clause[k] = clause[k], false_code
+              watches[clause[1]].append(clause_index)
+              break
+          else:
+            watching[j] = clause_index
+            j += 1
+            if value[first] == 0:
+              conflict = clause_index
+              while i < len(watching):
+                watching[j] = watching[i]
+                i += 1
+                j += 1
+            else:
+              value[first], value[first ^ 1] = 1, 0
+              level[first >> 1], reason[first >> 1] = len(trail_lim), clause_index
+              trail[trail_size] = first
+              trail_size += 1
+        del watching[j:]
+
+      if conflict >= 0:
+        current = len(trail_lim)
+        if current == 0:
+          return UNSATISFIED
+        # first-UIP analysis; the literal that a clause implied is its first
+        learned = [0]
+        pending = 0
+        code = -1
+        position = trail_size - 1
+        clause = clauses[conflict]
+        while True:
+          for other in (clause if code < 0 else clause[1:]):
+            v = other >> 1
+            if not seen[v] and level[v] > 0:
+              seen[v] = 1
+              activity[v] += increment
+              if level[v] == current:
+                pending += 1
+              else:
+                learned.append(other)
+          while not seen[trail[position] >> 1]:
+            position -= 1
+          code = trail[position]
+          position -= 1
+          seen[code >> 1] = 0
+          pending -= 1
+          if pending == 0:
+            break
+          clause = clauses[reason[code >> 1]]
+        learned[0] = code ^ 1
+        backjump = 0
+        for k in range(1, len(learned)):
+          seen[learned[k] >> 1] = 0
+          if level[learned[k] >> 1] > backjump:
+            backjump = level[learned[k] >> 1]
+            learned[1], learned[k] = learned[k], learned[1]
+        increment /= ACTIVITY_DECAY
+        if increment > 1e100:
+          for v in range(1, n + 1):
+            activity[v] *= 1e-100
+          increment *= 1e-100
+
+        for position in range(trail_size - 1, trail_lim[backjump] - 1, -1):
+          code = trail[position]
+          value[code] = value[code ^ 1] = UNASSIGNED
+          phase[code >> 1] = code & 1
+        trail_size = head = trail_lim[backjump]
+        del trail_lim[backjump:]
+        code = learned[0]
+        clause_index = -1
+        if len(learned) > 1:
+          clause_index = len(clauses)
+          clauses.append(learned)
+          watches[learned[0]].append(clause_index)
+          watches[learned[1]].append(clause_index)
+        value[code], value[code ^ 1] = 1, 0
+        level[code >> 1], reason[code >> 1] = backjump, clause_index
+        trail[trail_size] = code
+        trail_size += 1
+        continue
+
+      best = 0
+      best_activity = -1.0
+      for v in range(1, n + 1):
+        if value[2 * v] == UNASSIGNED and activity[v] > best_activity:
+          best, best_activity = v, activity[v]
+      if best == 0:
+        return SATISFIABLE
+      trail_lim.append(trail_size)
+      code = 2 * best + phase[best]
+      value[code], value[code ^ 1] = 1, 0
+      level[best], reason[best] = len(trail_lim), -1
+      trail[trail_size] = code
+      trail_size += 1
+
+  def solve_all(self: PackedSolver, packed: PackedFormulas) -> List[State]:
+    return [ self.solve(packed, index) for index in range(len(packed)) ]
+
+def _solve_packed(packed: PackedFormulas) -> List[State]:
+  return PackedSolver(max(packed.num_vars, default=0)).solve_all(packed)
+
+def solve_packed(packed: PackedFormulas, workers: Optional[int] = 1) -> List[State]:
+  """Decides the satisfiability of each formula of `packed`, in order
+
+  :param workers: the number of worker processes, each of which solves a contiguous share of the formulas; 1 solves them in this process, and None uses one per CPU
+  """
+  num_workers = workers if workers is not None else (os.cpu_count() or 1)
+  if num_workers == 1 or len(packed) < 2:
+    return _solve_packed(packed)
+  bounds = [ len(packed) * i // num_workers for i in range(num_workers + 1) ]
+  shares = [ packed.slice(first, last) for first, last in zip(bounds, bounds[1:]) if first < last ]
+  with ProcessPoolExecutor(max_workers=len(shares)) as executor:
+    return [ state for states in executor.map(_solve_packed, shares) for state in states ]
+
+def solve_batch(formulas: List[List[RawClause]], workers: Optional[int] = 1) -> List[State]:
+  """Decides the satisfiability of each of many small, unrelated formulas, packed together and solved with `PackedSolver`
+  """
+  return solve_packed(PackedFormulas(formulas), workers)
+
+if __name__ == "__main__":
+  if len(sys.argv) < 2:
+    print("Usage: python batch.py path/to/formula1.cnf path/to/formula2.cnf ...")
+    print("       python batch.py --packed[=workers] path/to/formula1.cnf path/to/formula2.cnf ...")
+    sys.exit(0)
+  filenames = [ arg for arg in sys.argv[1:] if not arg.startswith("--packed") ]
+  packed = [ arg for arg in sys.argv[1:] if arg.startswith("--packed") ]
+  formulas = []
+  for filename in filenames:
+    with open(filename) as file:
+      formulas.append(read_clauses(file))
+  if packed:
+    states = solve_batch(formulas, int(packed[0].split("=")[1]) if "=" in packed[0] else 1)
+  else:
+    states = solve_family(formulas)
+  for filename, state in zip(filenames, states):
+    print(filename, "SATISFIABLE" if state == SATISFIABLE else "UNSATISFIABLE")
@@ -0,0 +1,113 @@
+from __future__ import annotations
+from typing import Any, Dict, List, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+import io
+import json
+import math
+import os
+import random
+import sys
+import time
+
+import cdcl
+import randcnf
+
+MANIFEST_FILENAME = "manifest.json"
+
+# Type of a single instance specification: the file name, the number of
+# variables, the number of clauses, the number of literals per clause
+# and the seed that the instance is generated from
+InstanceSpec = Tuple[str, int, int, int, int]
+ManifestEntry = Dict[str, Any]
+
+def instance_seed(master_seed: int, num_clauses: int, index: int) -> int:
+  """Derives the seed of a single instance from the master seed of the suite
+
+  The derived seed depends only on the master seed and the position of the
+  instance in the suite, so that any one instance can be regenerated
+  without generating the instances before it.
+  """
+  return random.Random("{}:{}:{}".format(master_seed, num_clauses, index)).getrandbits(64)
+
+def poly_3cnf_specs(master_seed: int, min_num_clauses: int = 32, max_num_clauses: int = 256, step: int = 4, instances: int = 16, pow: int = 3, k: int = 3) -> List[InstanceSpec]:
+  """Lists the instances of a suite laid out like `randcnf.gen_poly_3cnf_suite`
+  """
+  specs: List[InstanceSpec] = []
+  for m in range(min_num_clauses, max_num_clauses + 1, step):
+    n = math.ceil(m ** (1/pow))
+    for i in range(instances):
+      filename = "poly-{}-{:03d}-{:02d}.cnf".format(n, m, i)
+      specs.append((filename, n, m, k, instance_seed(master_seed, m, i)))
+  return specs
+
+def generate_instance(num_vars: int, num_clauses: int, lits_per_clause: int, seed: int) -> List[List[int]]:
+  """Generates a random formula that is fully determined by `seed`
+
+  Formulas that do not mention every variable are redrawn, since
+  `Formula` rejects inputs whose problem line overstates the number of
+  variables.
+  """
+  rng = random.Random(seed)
+  while True:
+    formula = randcnf.random_formula(num_vars, num_clauses, lits_per_clause, rng)
+    if len({ abs(l) for clause in formula for l in clause }) == num_vars:
+      return formula
+
+def _build_and_label(path: str, spec: InstanceSpec) -> ManifestEntry:
+  """Generates, solves and writes a single instance; runs in a worker process
+  """
+  filename, n, m, k, seed = spec
+  formula = generate_instance(n, m, k, seed)
+  body = io.StringIO()
+  randcnf.write_formula(body, n, formula)
+
+  # the brancher draws from the module-level generator
+  random.seed(seed)
+  body.seek(0)
+  start = time.perf_counter()
+  state, decisions = cdcl.cdcl(body)
+  solve_time = time.perf_counter() - start
+  expected = "SATISFIABLE" if state == cdcl.SATISFIABLE else "UNSATISFIABLE"
+
+  # same header as written by prepend_satisfiability.sh
+  with open(os.path.join(path, filename), "w") as file:
+    file.write("c {}\n".format(filename))
+    file.write("c {}\n".format(expected))
+    file.write(body.getvalue())
+  return {
+    "file": filename,
+    "num_vars": n,
+    "num_clauses": m,
+    "lits_per_clause": k,
+    "seed": seed,
+    "expected": expected,
+    "decisions": decisions,
+    "solve_time": solve_time,
+  }
+
+def gen_labelled_suite(path: str, specs: List[InstanceSpec], workers: Optional[int] = None) -> List[ManifestEntry]:
+  """Generates and labels the instances in `specs` in a process pool
+
+  Each instance is written to `path` with its satisfiability in the
+  header, and a manifest of all instances, in the order of `specs`, is
+  written to `path/manifest.json`.
+
+  :param workers: the number of worker processes; defaults to the number of CPUs
+  :returns: the entries of the manifest
+  """
+  os.makedirs(path, exist_ok=True)
+  with ProcessPoolExecutor(max_workers=workers) as executor:
+    manifest = list(executor.map(_build_and_label, [path] * len(specs), specs))
+  with open(os.path.join(path, MANIFEST_FILENAME), "w") as file:
+    json.dump(manifest, file, indent=2)
+    file.write("\n")
+  return manifest
+
+def gen_labelled_poly_3cnf_suite(path: str, master_seed: int, workers: Optional[int] = None) -> List[ManifestEntry]:
+  return gen_labelled_suite(path, poly_3cnf_specs(master_seed), workers)
+
+if __name__ == "__main__":
+  if len(sys.argv) not in (3, 4):
+    print("Usage: python benchmark_suite.py path/to/suite master_seed [workers]")
+    sys.exit(0)
+  gen_labelled_poly_3cnf_suite(sys.argv[1], int(sys.argv[2]), int(sys.argv[3]) if len(sys.argv) == 4 else None)
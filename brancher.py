@@ -1,5 +1,5 @@
 from __future__ import annotations
-from typing import List, Tuple, TYPE_CHECKING
+from typing import Dict, List, Tuple, TYPE_CHECKING
 
 from abc import ABC, abstractmethod
 
@@ -13,6 +13,9 @@ class Brancher(ABC):
   @abstractmethod
   def __init__(self):
     self.decision_count = 0
+    # values that variables are preferably decided on, such as those of a
+    # good assignment found by local search
+    self.saved_phases: Dict[Variable, Value] = {}
 
   @staticmethod
   @abstractmethod
@@ -27,6 +30,11 @@ class Brancher(ABC):
   def record_learned_clause(self, clause: List[Literal]):
     pass
 
+  def seed_phases(self, phases: Dict[Variable, Value]) -> None:
+    """Prefers deciding each variable of `phases` on its value there
+    """
+    self.saved_phases.update(phases)
+
   @abstractmethod
   def make_decision(self, assignment: Assignment) -> Tuple[Variable, Value]: # : implement
     pass
\ No newline at end of file
@@ -0,0 +1,90 @@
+from __future__ import annotations
+from typing import Dict, Optional, Union
+import threading
+import time
+
+CONFLICTS = "conflicts"
+PROPAGATIONS = "propagations"
+TIME = "time"
+INTERRUPTED = "interrupted"
+
+class Budget:
+  """Limits on the work of a single solve, and a flag to interrupt it from another thread
+
+  Each limit is counted from the start of the solve that the budget is
+  passed to, and a limit of None is no limit. The interrupt flag is a
+  `threading.Event`, so `interrupt` may be called from any thread, or
+  from a signal handler; it stays set until `clear` is called.
+
+  :param max_conflicts: the number of conflicts after which the solve stops
+  :param max_propagations: the number of implied assignments after which the solve stops
+  :param max_seconds: the wall-clock time in seconds after which the solve stops
+  """
+
+  def __init__(self: Budget, max_conflicts: Optional[int] = None, max_propagations: Optional[int] = None, max_seconds: Optional[float] = None) -> None:
+    self.max_conflicts = max_conflicts
+    self.max_propagations = max_propagations
+    self.max_seconds = max_seconds
+    self._interrupted = threading.Event()
+
+  def interrupt(self: Budget) -> None:
+    self._interrupted.set()
+
+  def clear(self: Budget) -> None:
+    self._interrupted.clear()
+
+  def is_interrupted(self: Budget) -> bool:
+    return self._interrupted.is_set()
+
+  def exhausted(self: Budget, stats: SolverStats) -> Optional[str]:
+    """The reason to stop a solve that has done the work in `stats`, or None if it may go on
+    """
+    if self._interrupted.is_set():
+      return INTERRUPTED
+    if self.max_conflicts is not None and stats.conflicts >= self.max_conflicts:
+      return CONFLICTS
+    if self.max_propagations is not None and stats.propagations >= self.max_propagations:
+      return PROPAGATIONS
+    if self.max_seconds is not None and stats.elapsed() >= self.max_seconds:
+      return TIME
+    return None
+
+class SolverStats:
+  """The work done by a solve so far
+
+  :param decisions: the number of decisions made
+  :param conflicts: the number of conflicts analyzed
+  :param propagations: the number of assignments implied by propagation
+  :param learned_clauses: the number of clauses learned
+  :param start_time: the value of `time.monotonic()` when the solve started
+  :param end_time: the value of `time.monotonic()` when the solve returned, if it did
+  :param stop_reason: the limit of the budget that stopped the solve, if one did
+  """
+
+  def __init__(self: SolverStats) -> None:
+    self.decisions = 0
+    self.conflicts = 0
+    self.propagations = 0
+    self.learned_clauses = 0
+    self.start_time = time.monotonic()
+    self.end_time: Optional[float] = None
+    self.stop_reason: Optional[str] = None
+
+  def elapsed(self: SolverStats) -> float:
+    end_time = self.end_time if self.end_time is not None else time.monotonic()
+    return end_time - self.start_time
+
+  def finish(self: SolverStats, stop_reason: Optional[str] = None) -> SolverStats:
+    self.end_time = time.monotonic()
+    self.stop_reason = stop_reason
+    return self
+
+  def as_dict(self: SolverStats) -> Dict[str, Union[int, float, str, None]]:
+    return {
+      "decisions": self.decisions,
+      "conflicts": self.conflicts,
+      "propagations": self.propagations,
+      "learned_clauses": self.learned_clauses,
+      "seconds": self.elapsed(),
+      "stop_reason": self.stop_reason,
+    }
@@ -0,0 +1,180 @@
+from __future__ import annotations
+from typing import Dict, List, Optional, Set, TextIO, Tuple, TYPE_CHECKING
+
+from assignment import AssignmentListener
+
+if TYPE_CHECKING:
+  from shared_types import Literal, Variable
+  from assignment import Assignment, AssignmentItem
+
+  ConstraintIndex = int
+  Stamp = int
+  # Type of a cardinality constraint: at most `k` of the literals are true
+  AtMostK = Tuple[List[Literal], int]
+
+def at_least_k(lits: List[Literal], k: int) -> AtMostK:
+  """At least `k` of `lits` are true exactly when at most `len(lits) - k` of their negations are
+  """
+  return [ -l for l in lits ], len(lits) - k
+
+def read_cardinality_cnf(file_object: TextIO) -> Tuple[List[str], List[AtMostK]]:
+  """Reads a DIMACS file extended with cardinality constraints
+
+  Besides clauses, which are terminated by 0, a line may hold a
+  cardinality constraint of the form `l1 l2 ... ln <= k`, `>= k` or
+  `= k`, which is not terminated by 0. The problem line gives the number
+  of variables and the number of clauses and constraints together.
+
+  :returns: the lines of a plain DIMACS file of the clauses, to construct
+    a `Formula` from, followed by the cardinality constraints
+  """
+  clause_lines: List[str] = []
+  constraints: List[AtMostK] = []
+  for line in file_object:
+    tokens = line.split()
+    if not tokens or line[0] in ('c', 'p'):
+      continue
+    if len(tokens) >= 2 and tokens[-2] in ('<=', '>=', '='):
+      lits = [ int(l) for l in tokens[:-2] ]
+      k = int(tokens[-1])
+      if tokens[-2] in ('<=', '='):
+        constraints.append((lits, k))
+      if tokens[-2] in ('>=', '='):
+        constraints.append(at_least_k(lits, k))
+    else:
+      clause_lines.append(line if line.endswith("\n") else line + "\n")
+  variables: Set[Variable] = set()
+  num_clauses = 0
+  for line in clause_lines:
+    for l in line.split():
+      if l != '0':
+        variables.add(abs(int(l)))
+    num_clauses += line.split().count('0')
+  return ["p cnf {} {}\n".format(len(variables), num_clauses)] + clause_lines, constraints
+
+class CardinalityEngine(AssignmentListener):
+  """A set of at-most-k constraints propagated with a counter of true literals per constraint
+
+  Each variable watches the constraints that it appears in. The engine
+  listens to the assignment of the formula, so the counters follow each
+  assignment as it is made and undone, and each call only examines the
+  constraints whose counters went up since the last one, or that a
+  variable was unassigned from, as they may imply it again. Once `k`
+  literals of a constraint are true, its other literals are implied
+  false; once more than `k` are, the constraint is in conflict.
+
+  An implication is only recorded with the constraint that implies it,
+  and its explanation is built by `explain` when conflict analysis asks
+  for it, which is rare: the reason for the negation of `l` is the clause
+  of `-l` and the negations of the `k` literals that were true when it
+  was implied. Each assignment is stamped with its position in the order
+  of assignments, so those are the true literals assigned before `-l`;
+  taking the true literals of the current assignment instead could make
+  two implications each other's reasons. The reason for a conflict is
+  the clause of the negations of the `k + 1` latest true literals.
+
+  :param constraints: the at-most-k constraints
+  :param occurrences: a map from variables to the constraints they appear in, with the literals they appear as
+  :param true_counts: the number of true literals of each constraint under the assignment
+  :param assignment: the assignment that the engine listens to
+  :param touched: the constraints to examine at the next call
+  :param stamps: the position of each assigned variable in the order of assignments
+  :param stamp: the number of assignments made
+  """
+
+  def __init__(self: CardinalityEngine, constraints: List[AtMostK], assignment: Assignment) -> None:
+    self.constraints: List[AtMostK] = constraints
+    self.occurrences: Dict[Variable, List[Tuple[ConstraintIndex, Literal]]] = {}
+    for c, (lits, _) in enumerate(constraints):
+      for l in lits:
+        if abs(l) not in self.occurrences:
+          self.occurrences[abs(l)] = []
+        self.occurrences[abs(l)].append((c, l))
+    self.true_counts: List[int] = [ 0 for _ in constraints ]
+    self.assignment = assignment
+    # constraints with k = 0 imply their literals before any is assigned
+    self.touched: Set[ConstraintIndex] = set(range(len(constraints)))
+    self.stamps: Dict[Variable, Stamp] = {}
+    self.stamp: Stamp = 0
+    for level in assignment.history:
+      for item in level.values():
+        self.assigned(item)
+    assignment.add_listener(self)
+
+  def assigned(self: CardinalityEngine, item: AssignmentItem) -> None:
+    _, variable, value, _ = item
+    self.stamp += 1
+    self.stamps[variable] = self.stamp
+    for c, l in self.occurrences.get(variable, ()):
+      if (l > 0) == (value == 1):
+        self.true_counts[c] += 1
+        self.touched.add(c)
+
+  def unassigned(self: CardinalityEngine, item: AssignmentItem) -> None:
+    _, variable, value, _ = item
+    del self.stamps[variable]
+    for c, l in self.occurrences.get(variable, ()):
+      if (l > 0) == (value == 1):
+        self.true_counts[c] -= 1
+      self.touched.add(c)
+
+  def propagate(self: CardinalityEngine) -> Tuple[List[Tuple[Literal, ConstraintIndex]], List[Literal]]:
+    """Derives what the constraints imply under the assignment
+
+    :returns: the implied literals, each with the constraint that implies it,
+      followed by a clause that is falsified by the assignment if some
+      constraint is in conflict with it, or an empty list otherwise
+    """
+    assignment = self.assignment
+    touched = sorted(self.touched)
+    self.touched = set()
+    implications: List[Tuple[Literal, ConstraintIndex]] = []
+    implied: Set[Literal] = set()
+    for i, c in enumerate(touched):
+      lits, k = self.constraints[c]
+      if self.true_counts[c] < k:
+        continue
+      if self.true_counts[c] > k:
+        # the constraints not examined yet are examined at the next call
+        self.touched.update(touched[i:])
+        true_lits = [ l for l in lits if assignment.get_value(abs(l)) == (1 if l > 0 else 0) ]
+        # the most recently assigned literals include one assigned at the current decision level
+        true_lits.sort(key=lambda l: self.stamps[abs(l)], reverse=True)
+        return [], [ -l for l in true_lits[:k + 1] ]
+      for l in lits:
+        # a literal implied both ways is left to the conflict it causes once it is assigned
+        if abs(l) not in assignment and -l not in implied and l not in implied:
+          implied.add(-l)
+          implications.append((-l, c))
+    return implications, []
+
+  def explain(self: CardinalityEngine, constraint: ConstraintIndex, implied: Literal) -> List[Literal]:
+    """The clause that explains the implication of `implied`, which is assigned, by `constraint`
+    """
+    lits, _ = self.constraints[constraint]
+    stamp = self.stamps[abs(implied)]
+    return [implied] + [ -l for l in lits if self.stamps.get(abs(l), stamp) < stamp and self.assignment.get_value(abs(l)) == (1 if l > 0 else 0) ]
+
+class CardinalityReason:
+  """The antecedent of a literal implied by a constraint of a `CardinalityEngine`, in place of the clause that explains it
+
+  Conflict analysis only asks an antecedent for its assigned variables,
+  so the clause is built by `CardinalityEngine.explain` when it is first
+  asked for them, while the implied literal is still assigned.
+
+  :param engine: the engine of the constraint
+  :param constraint: the constraint that implies the literal
+  :param implied: the implied literal
+  :param explanation: the clause that explains the implication, once it is built
+  """
+
+  def __init__(self: CardinalityReason, engine: CardinalityEngine, constraint: ConstraintIndex, implied: Literal) -> None:
+    self.engine = engine
+    self.constraint = constraint
+    self.implied = implied
+    self.explanation: Optional[List[Literal]] = None
+
+  def get_assigned_vars(self: CardinalityReason, assignment: Assignment) -> List[Variable]:
+    if self.explanation is None:
+      self.explanation = self.engine.explain(self.constraint, self.implied)
+    return [ abs(l) for l in self.explanation if abs(l) in assignment ]
@@ -0,0 +1,49 @@
+from __future__ import annotations
+from typing import Optional, TextIO
+
+from formula import Formula
+from propagating_formula import PropagatingFormula
+from cardinality import CardinalityEngine, CardinalityReason, read_cardinality_cnf
+
+class CardinalityPropagatingFormula(PropagatingFormula):
+  """A `PropagatingFormula` that also propagates native at-most-k constraints
+
+  The input is a DIMACS file extended with cardinality constraints, as
+  read by `read_cardinality_cnf`; the constraints are never expanded to
+  clauses. Whenever unit propagation reaches a fixpoint, a
+  `CardinalityEngine` derives what the constraints imply. An implied
+  literal is assigned with a `CardinalityReason` as its antecedent, which
+  only builds the clause that explains it if conflict analysis asks for
+  it, and that clause is never added to the formula; a conflict
+  is reported by adding the clause that explains it, so that
+  `fuip_analyzer` can analyze it like any other.
+
+  :param cardinality_engine: the engine, or None if there are no constraints
+  """
+
+  def __init__(self: CardinalityPropagatingFormula, file_object: TextIO) -> None:
+    # the formula propagates as it is constructed, before the engine is built
+    self.cardinality_engine: Optional[CardinalityEngine] = None
+    clause_lines, constraints = read_cardinality_cnf(file_object)
+    PropagatingFormula.__init__(self, iter(clause_lines))
+    if constraints:
+      self.formula.add_variables({ abs(l) for lits, _ in constraints for l in lits })
+      self.cardinality_engine = CardinalityEngine(constraints, self.formula.get_partial_assignment())
+      if any(k < 0 for _, k in constraints):
+        self.formula.base_state = Formula.UNSATISFIED
+      self.propagate()
+
+  def propagate(self: CardinalityPropagatingFormula) -> None:
+    while True:
+      PropagatingFormula.propagate(self)
+      # the formula may be satisfied by a complete assignment that violates a constraint
+      if self.cardinality_engine is None or self.formula.get_current_state() == PropagatingFormula.UNSATISFIED:
+        return
+      implications, conflict = self.cardinality_engine.propagate()
+      if conflict:
+        self.formula.add_clause(conflict)
+        return
+      if not implications:
+        return
+      for lit, constraint in implications:
+        self.formula.assign(self.decision_level, abs(lit), 1 if lit > 0 else 0, CardinalityReason(self.cardinality_engine, constraint, lit))
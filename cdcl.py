@@ -1,37 +1,126 @@
 from __future__ import annotations
-from typing import Tuple, TextIO, TYPE_CHECKING
+from typing import Callable, Optional, Sequence, Tuple, TextIO, TYPE_CHECKING
 
 from propagating_formula import PropagatingFormula
 from vsids_brancher import VSIDSBrancher
 from random_brancher import RandomBrancher
 from two_choice_brancher import TwoChoiceBrancher
 from fuip_analyzer import fuip_analyzer
+from budget import Budget, SolverStats
 
 if TYPE_CHECKING:
-  from shared_types import ConflictAnalyzer
+  from shared_types import ConflictAnalyzer, Literal, Value, Variable
+  from brancher import Brancher
+  from checkpoint import Checkpointer
   from propagating_formula import State
 
 UNSATISFIED: State = PropagatingFormula.UNSATISFIED
 SATISFIABLE: State = PropagatingFormula.SATISFIED
+# returned when a budget runs out before the satisfiability of the formula is decided
+UNKNOWN: State = PropagatingFormula.UNRESOLVED
 
-def cdcl(file_object: TextIO) -> Tuple[State, int]:
-  formula = PropagatingFormula(file_object)
-  brancher = RandomBrancher.create(formula)
+def cdcl(file_object: TextIO, create_brancher: Callable[[PropagatingFormula], Brancher] = RandomBrancher.create) -> Tuple[State, int]:
+  return cdcl_formula(PropagatingFormula(file_object), create_brancher)
+
+def cdcl_formula(formula: PropagatingFormula, create_brancher: Callable[[PropagatingFormula], Brancher] = RandomBrancher.create) -> Tuple[State, int]:
+  """Decides the satisfiability of a formula that is already constructed
+
+  If it is satisfiable, the satisfying assignment is left on `formula`.
+
+  :param create_brancher: the `create` method of the brancher to decide with
+  """
+  state, stats = cdcl_budgeted(formula, None, create_brancher)
+  return state, stats.decisions
+
+def cdcl_budgeted(formula: PropagatingFormula, budget: Optional[Budget], create_brancher: Callable[[PropagatingFormula], Brancher] = RandomBrancher.create, checkpointer: Optional[Checkpointer] = None, chrono_threshold: Optional[int] = None, trail_saving: bool = False, assumptions: Sequence[Literal] = (), stats: Optional[SolverStats] = None) -> Tuple[State, SolverStats]:
+  """Decides the satisfiability of a formula within a budget
+
+  The budget is checked before every decision, which is after every
+  conflict has been analyzed and backtracked from. If it is exhausted,
+  `UNKNOWN` is returned, and `formula` is left consistent with the
+  clauses learned so far, so calling this again on it resumes the
+  search with those clauses.
+
+  Checkpoints are written at the same point, whenever `checkpointer` is
+  due, and when the budget runs out.
+
+  If `chrono_threshold` is given, a backjump that would undo more than
+  that many decision levels is made chronologically instead: only the
+  decision level of the conflict is undone, and the asserting literal of
+  the learned clause is implied at the decision level below it. The
+  assignments of the levels in between are kept rather than undone and
+  implied again.
+
+  With `trail_saving`, the implications undone by a backjump are saved,
+  and assigned again as soon as their antecedents imply them again,
+  rather than only once unit propagation finds them; see
+  `PropagatingFormula`.
+
+  With `assumptions`, the solve first backtracks to decision level 0,
+  then decides the assumptions before any other variable, in order. An
+  assumption that is found falsified is therefore implied false by the
+  assumptions decided before it, and `UNSATISFIED` is returned with the
+  assignment that falsifies it left on `formula`; the formula itself is
+  then unsatisfiable only if its state is `UNSATISFIED`.
+
+  :param budget: the limits of the solve, or None for no limits
+  :param checkpointer: what writes checkpoints of the solve, if any
+  :param chrono_threshold: the most decision levels that a backjump undoes, or None to always backjump non-chronologically
+  :param trail_saving: whether the implications undone by backjumps are saved to be assigned again
+  :param assumptions: the literals that every model found must satisfy
+  :param stats: the work done before the solve, which the work of the solve is added to and the budget is checked against
+  :returns: the state of the formula, or `UNKNOWN`, followed by the work done
+  """
+  stats = stats if stats is not None else SolverStats()
+  brancher = create_brancher(formula)
   conflict_analyzer = fuip_analyzer
+  assignment = formula.get_partial_assignment()
+  formula.trail_saving = trail_saving
+  if assumptions:
+    formula.backtrack(0)
 
-  if formula.get_current_state() == PropagatingFormula.UNSATISFIED:
-    return UNSATISFIED, brancher.decision_count
-  while formula.get_current_state() != PropagatingFormula.SATISFIED:
-    variable, value = brancher.make_decision(formula.get_partial_assignment())
-    formula.assign(variable, value)
+  while True:
+    # a conflict may also be present on entry, such as after a clause
+    # that is falsified was added to the formula
     while formula.get_current_state() == PropagatingFormula.UNSATISFIED:
       if formula.get_decision_level() == 0:
-        return UNSATISFIED, brancher.decision_count
+        return UNSATISFIED, stats.finish()
+      stats.conflicts += 1
       new_decision_level, new_clauses = conflict_analyzer(formula, brancher)
       if new_decision_level < 0:
-        return UNSATISFIED, brancher.decision_count
+        return UNSATISFIED, stats.finish()
+      # a learned unit clause holds at every decision level, and is kept at decision level 0
+      if chrono_threshold is not None and any(len(clause) > 1 for clause in new_clauses):
+        conflict_level = max([ assignment.get_decision_level(abs(l)) or 0 for clause in new_clauses for l in clause ])
+        if conflict_level - new_decision_level > chrono_threshold:
+          new_decision_level = conflict_level - 1
       formula.backtrack(new_decision_level)
       for clause in new_clauses:
         brancher.record_learned_clause(clause)
+        assigned = len(assignment)
         formula.add_clause(clause)
-  return SATISFIABLE, brancher.decision_count
\ No newline at end of file
+        stats.propagations += len(assignment) - assigned
+      stats.learned_clauses += len(new_clauses)
+    decision: Optional[Tuple[Variable, Value]] = None
+    for l in assumptions:
+      value = 1 if l > 0 else 0
+      if abs(l) not in assignment:
+        decision = (abs(l), value)
+        break
+      if assignment.get_value(abs(l)) != value:
+        return UNSATISFIED, stats.finish()
+    if decision is None and formula.get_current_state() == PropagatingFormula.SATISFIED:
+      return SATISFIABLE, stats.finish()
+    stop_reason = budget.exhausted(stats) if budget is not None else None
+    if stop_reason is not None:
+      stats.finish(stop_reason)
+      if checkpointer is not None:
+        checkpointer.save(formula, brancher, stats)
+      return UNKNOWN, stats
+    if checkpointer is not None and checkpointer.due(stats):
+      checkpointer.save(formula, brancher, stats)
+    variable, value = decision if decision is not None else brancher.make_decision(assignment)
+    stats.decisions += 1
+    assigned = len(assignment)
+    formula.assign(variable, value)
+    stats.propagations += len(assignment) - assigned - 1
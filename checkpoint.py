@@ -0,0 +1,270 @@
+from __future__ import annotations
+from typing import BinaryIO, Callable, Dict, List, Optional, Tuple, TYPE_CHECKING
+from array import array
+import hashlib
+import os
+import struct
+import sys
+import time
+
+from budget import SolverStats
+from propagating_formula import PropagatingFormula
+from vsids_brancher import VSIDSBrancher
+
+if TYPE_CHECKING:
+  from shared_types import Literal, Value, Variable
+  from brancher import Brancher
+
+MAGIC = b"CDCLCKPT"
+VERSION = 2
+
+# kinds of brancher state in a checkpoint
+NO_SCORES = 0
+VSIDS_SCORES = 1
+
+class Checkpoint:
+  """The state of a solve that is enough to resume it at decision level 0
+
+  The assignment is not kept: every assignment at decision level 0 is
+  implied by the clauses, including the learned unit clauses, and is
+  recovered by unit propagation when the formula is rebuilt.
+
+  The binary format is little-endian: the magic bytes and version, the
+  counts of the arena, the digest of the input, then the clause arena as 32-bit literals with
+  each clause terminated by 0, the brancher scores, the saved phases,
+  and the statistics.
+
+  :param clauses: the clauses of the formula, with the learned clauses last
+  :param num_base_clauses: the number of clauses that were not learned
+  :param scores: the VSIDS scores of the variables, if the brancher keeps them
+  :param signs: the VSIDS signs of the variables, if the brancher keeps them
+  :param bonus: the VSIDS bonus
+  :param max_score: the largest VSIDS score
+  :param saved_phases: the saved phases of the brancher
+  :param stats: the statistics of all solves up to the checkpoint
+  :param source: the digest of the input that the solve started from, as by `source_digest`, or empty if it is not known
+  """
+
+  def __init__(self: Checkpoint, clauses: List[List[Literal]], num_base_clauses: int, stats: SolverStats, source: bytes = b"") -> None:
+    self.clauses = clauses
+    self.num_base_clauses = num_base_clauses
+    self.scores: Optional[Dict[Variable, int]] = None
+    self.signs: Optional[Dict[Variable, int]] = None
+    self.bonus = 0
+    self.max_score = 0
+    self.saved_phases: Dict[Variable, Value] = {}
+    self.stats = stats
+    self.source = source
+
+  @staticmethod
+  def capture(formula: PropagatingFormula, brancher: Brancher, stats: SolverStats, source: bytes = b"") -> Checkpoint:
+    raw_formula = formula.formula
+    checkpoint = Checkpoint([ clause.clause for clause in raw_formula.formula ], raw_formula.num_base_clauses, stats, source)
+    if isinstance(brancher, VSIDSBrancher):
+      checkpoint.scores = dict(brancher.scores)
+      checkpoint.signs = dict(brancher.sign)
+      checkpoint.bonus = brancher.bonus
+      checkpoint.max_score = brancher.max_score
+    checkpoint.saved_phases = dict(brancher.saved_phases)
+    return checkpoint
+
+  def write(self: Checkpoint, file_object: BinaryIO) -> None:
+    arena = array("i")
+    for clause in self.clauses:
+      arena.extend(clause)
+      arena.append(0)
+    file_object.write(MAGIC)
+    file_object.write(struct.pack("<IQQQB", VERSION, len(arena), len(self.clauses), self.num_base_clauses, len(self.source)))
+    file_object.write(self.source)
+    _write_array(file_object, arena)
+
+    if self.scores is None or self.signs is None:
+      file_object.write(struct.pack("<B", NO_SCORES))
+    else:
+      variables = sorted(self.scores)
+      file_object.write(struct.pack("<BqqQ", VSIDS_SCORES, self.bonus, self.max_score, len(variables)))
+      _write_array(file_object, array("i", variables))
+      _write_array(file_object, array("q", [ self.scores[v] for v in variables ]))
+      _write_array(file_object, array("b", [ self.signs[v] for v in variables ]))
+
+    variables = sorted(self.saved_phases)
+    file_object.write(struct.pack("<Q", len(variables)))
+    _write_array(file_object, array("i", variables))
+    _write_array(file_object, array("b", [ int(self.saved_phases[v]) for v in variables ]))
+
+    stats = self.stats
+    file_object.write(struct.pack("<qqqqd", stats.decisions, stats.conflicts, stats.propagations, stats.learned_clauses, stats.elapsed()))
+
+  @staticmethod
+  def read(file_object: BinaryIO) -> Checkpoint:
+    if file_object.read(len(MAGIC)) != MAGIC:
+      raise Exception("not a checkpoint file")
+    version, = _unpack(file_object, "<I")
+    if version != VERSION:
+      raise Exception("unsupported checkpoint version {}".format(version))
+    arena_length, num_clauses, num_base_clauses, source_length = _unpack(file_object, "<QQQB")
+    source = file_object.read(source_length)
+    if len(source) != source_length:
+      raise Exception("checkpoint file is truncated")
+    arena = _read_array(file_object, "i", arena_length)
+    clauses: List[List[Literal]] = []
+    clause: List[Literal] = []
+    for l in arena:
+      if l == 0:
+        clauses.append(clause)
+        clause = []
+      else:
+        clause.append(l)
+    if len(clauses) != num_clauses:
+      raise Exception("checkpoint has {} clauses, expected {}".format(len(clauses), num_clauses))
+
+    checkpoint = Checkpoint(clauses, num_base_clauses, SolverStats(), source)
+    kind, = _unpack(file_object, "<B")
+    if kind == VSIDS_SCORES:
+      checkpoint.bonus, checkpoint.max_score, count = _unpack(file_object, "<qqQ")
+      variables = _read_array(file_object, "i", count)
+      scores = _read_array(file_object, "q", count)
+      signs = _read_array(file_object, "b", count)
+      checkpoint.scores = dict(zip(variables, scores))
+      checkpoint.signs = dict(zip(variables, signs))
+    elif kind != NO_SCORES:
+      raise Exception("unknown brancher state {} in checkpoint".format(kind))
+
+    count, = _unpack(file_object, "<Q")
+    variables = _read_array(file_object, "i", count)
+    checkpoint.saved_phases = dict(zip(variables, _read_array(file_object, "b", count)))
+
+    stats = checkpoint.stats
+    stats.decisions, stats.conflicts, stats.propagations, stats.learned_clauses, seconds = _unpack(file_object, "<qqqqd")
+    stats.end_time = time.monotonic()
+    stats.start_time = stats.end_time - seconds
+    return checkpoint
+
+  def save(self: Checkpoint, path: str) -> None:
+    """Writes the checkpoint to `path`, replacing any earlier checkpoint only once it is complete
+    """
+    partial_path = path + ".partial"
+    with open(partial_path, "wb") as file:
+      self.write(file)
+      file.flush()
+      os.fsync(file.fileno())
+    os.replace(partial_path, path)
+
+  @staticmethod
+  def load(path: str) -> Checkpoint:
+    with open(path, "rb") as file:
+      return Checkpoint.read(file)
+
+  def to_formula(self: Checkpoint) -> PropagatingFormula:
+    """Rebuilds the formula with its learned clauses, at decision level 0
+    """
+    formula = PropagatingFormula.from_clauses(self.clauses)
+    formula.formula.num_base_clauses = self.num_base_clauses
+    return formula
+
+  def restore(self: Checkpoint, brancher: Brancher) -> None:
+    """Restores the scores and phases of `brancher` from the checkpoint
+    """
+    if isinstance(brancher, VSIDSBrancher) and self.scores is not None and self.signs is not None:
+      brancher.scores.update(self.scores)
+      brancher.sign.update(self.signs)
+      brancher.bonus = self.bonus
+      brancher.max_score = self.max_score
+    brancher.seed_phases(self.saved_phases)
+
+  def restoring(self: Checkpoint, create_brancher: Callable[[PropagatingFormula], Brancher]) -> Callable[[PropagatingFormula], Brancher]:
+    """Wraps `create_brancher` so that the brancher it creates is restored from the checkpoint
+    """
+    def create(formula: PropagatingFormula) -> Brancher:
+      brancher = create_brancher(formula)
+      self.restore(brancher)
+      return brancher
+    return create
+
+class Checkpointer:
+  """Writes checkpoints of a solve to a file every so many conflicts or seconds
+
+  :param path: the file that checkpoints are written to
+  :param interval_conflicts: the number of conflicts between checkpoints, or None
+  :param interval_seconds: the wall-clock time in seconds between checkpoints, or None
+  :param previous: the statistics of the solves before this one, such as those of the checkpoint it resumed from
+  :param source: the digest of the input that the solve started from, which is written with every checkpoint
+  """
+
+  def __init__(self: Checkpointer, path: str, interval_conflicts: Optional[int] = 1000, interval_seconds: Optional[float] = None, previous: Optional[SolverStats] = None, source: bytes = b"") -> None:
+    self.path = path
+    self.interval_conflicts = interval_conflicts
+    self.interval_seconds = interval_seconds
+    self.previous = previous
+    self.source = source
+    self.last_conflicts = 0
+    self.last_time = time.monotonic()
+
+  def due(self: Checkpointer, stats: SolverStats) -> bool:
+    if self.interval_conflicts is not None and stats.conflicts - self.last_conflicts >= self.interval_conflicts:
+      return True
+    return self.interval_seconds is not None and time.monotonic() - self.last_time >= self.interval_seconds
+
+  def save(self: Checkpointer, formula: PropagatingFormula, brancher: Brancher, stats: SolverStats) -> None:
+    Checkpoint.capture(formula, brancher, _total(self.previous, stats), self.source).save(self.path)
+    self.last_conflicts = stats.conflicts
+    self.last_time = time.monotonic()
+
+def source_digest(path: str) -> bytes:
+  """The SHA-256 digest of the file at `path`, which identifies the input of a solve in its checkpoints
+  """
+  digest = hashlib.sha256()
+  with open(path, "rb") as file:
+    for block in iter(lambda: file.read(1 << 16), b""):
+      digest.update(block)
+  return digest.digest()
+
+def resume(path: str, source: Optional[bytes] = None) -> Tuple[PropagatingFormula, Checkpoint]:
+  """Loads the checkpoint at `path` and rebuilds its formula
+
+  The brancher of the resumed solve is restored with
+  `checkpoint.restoring(create_brancher)`, and its checkpoints should be
+  written by a `Checkpointer` with `previous=checkpoint.stats` and the
+  same `source`.
+
+  :param source: the digest of the input that the solve should resume, if any, which the checkpoint must have been written for
+  """
+  checkpoint = Checkpoint.load(path)
+  if source is not None and checkpoint.source != source:
+    raise Exception("checkpoint {} is of a different input".format(path))
+  return checkpoint.to_formula(), checkpoint
+
+def _total(previous: Optional[SolverStats], stats: SolverStats) -> SolverStats:
+  if previous is None:
+    return stats
+  total = SolverStats()
+  total.decisions = previous.decisions + stats.decisions
+  total.conflicts = previous.conflicts + stats.conflicts
+  total.propagations = previous.propagations + stats.propagations
+  total.learned_clauses = previous.learned_clauses + stats.learned_clauses
+  total.end_time = time.monotonic()
+  total.start_time = total.end_time - previous.elapsed() - stats.elapsed()
+  total.stop_reason = stats.stop_reason
+  return total
+
+def _write_array(file_object: BinaryIO, values: array) -> None:
+  if sys.byteorder != "little":
+    values = array(values.typecode, values)
+    values.byteswap()
+  file_object.write(values.tobytes())
+
+def _read_array(file_object: BinaryIO, typecode: str, count: int) -> List[int]:
+  values = array(typecode)
+  data = file_object.read(count * values.itemsize)
+  if len(data) != count * values.itemsize:
+    raise Exception("checkpoint file is truncated")
+  values.frombytes(data)
+  if sys.byteorder != "little":
+    values.byteswap()
+  return values.tolist()
+
+def _unpack(file_object: BinaryIO, fmt: str) -> Tuple:
+  data = file_object.read(struct.calcsize(fmt))
+  if len(data) != struct.calcsize(fmt):
+    raise Exception("checkpoint file is truncated")
+  return struct.unpack(fmt, data)
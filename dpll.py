@@ -20,6 +20,14 @@ Problem = Tuple[IndexedFormula, int, int]
 Variable = int
 Value = Union[int, float]
 Assignment = Dict[Variable, Value]
+# An entry of the undo log of `dpll_iterative`: the reference of a mutated
+# clause, the clause itself, and either the literal that was removed from
+# it, or 0 if the clause itself was removed from the formula
+UndoEntry = Tuple[ClauseRef, Clause, Literal]
+
+# When set, the indexes of the formula are checked for consistency after
+# every mutation; this is a full pass over the formula each time
+DEBUG = False
 
 ## Debugging functions
 def assert_well_formed(ind_formula: IndexedFormula) -> None:
@@ -100,7 +108,8 @@ def assign(ind_formula: IndexedFormula, variable: Variable, value: Value) -> Uni
     size_ind[clause_size].add(clause_ref)
 
   del vars_ind[variable]
-  assert_well_formed(ind_formula)
+  if DEBUG:
+    assert_well_formed(ind_formula)
   return ind_formula
 
 def add_clause(clause: Clause, ind_formula: IndexedFormula) -> None:
@@ -194,11 +203,17 @@ def choose_arbitrary_branching_variable(ind_formula: IndexedFormula) -> Variable
   _, vars_ind, _ = ind_formula
   return next(iter(vars_ind))
 
+def choose_short_clause_branching_variable(ind_formula: IndexedFormula) -> Variable:
+  formula, _, size_ind = ind_formula
+  clause_ref = next(iter(size_ind[min(size_ind)]))
+  return abs(next(iter(formula[clause_ref])))
+
 def unit_propagate(ind_formula: Union[bool, IndexedFormula]) -> Union[bool, IndexedFormula]:
   if isinstance(ind_formula, bool):
     return ind_formula
   formula, vars_ind, size_ind = ind_formula
-  assert_well_formed(ind_formula)
+  if DEBUG:
+    assert_well_formed(ind_formula)
   while True:
 
     # pure variable propagation
@@ -216,7 +231,8 @@ def unit_propagate(ind_formula: Union[bool, IndexedFormula]) -> Union[bool, Inde
 
     # unit elimination
     if size_ind.get(1):
-      assert_well_formed(ind_formula)
+      if DEBUG:
+        assert_well_formed(ind_formula)
       clause_ref = next(iter(size_ind[1]))
       l = next(iter(formula[clause_ref]))
       ind_formula = assign(ind_formula, abs(l), FALSE if l < 0 else TRUE)
@@ -243,8 +259,150 @@ def dpll(ind_formula: Union[bool, IndexedFormula], depth: int) -> bool:
   else:
     return dpll(assign(ind_formula, var, TRUE), depth + 1)
 
+## Iterative engine
+#
+# `dpll_iterative` mutates a single indexed formula in place and records
+# every mutation in an undo log, so that backtracking restores the formula
+# instead of cloning it at every branch.
+
+def _index_literal(vars_ind: VariablesIndex, clause_ref: ClauseRef, l: Literal) -> None:
+  v = abs(l)
+  if v not in vars_ind:
+    vars_ind[v] = (set(), set())
+  vars_ind[v][FALSE if l < 0 else TRUE].add(clause_ref)
+
+def _unindex_literal(vars_ind: VariablesIndex, clause_ref: ClauseRef, l: Literal) -> None:
+  var_lits = vars_ind[abs(l)]
+  var_lits[FALSE if l < 0 else TRUE].discard(clause_ref)
+  if not var_lits[0] and not var_lits[1]:
+    del vars_ind[abs(l)]
+
+def _move_size(size_ind: SizeIndex, clause_ref: ClauseRef, old_size: int, new_size: int) -> None:
+  size_ind[old_size].remove(clause_ref)
+  if not size_ind[old_size]:
+    del size_ind[old_size]
+  if new_size not in size_ind:
+    size_ind[new_size] = set()
+  size_ind[new_size].add(clause_ref)
+
+def assign_logged(ind_formula: IndexedFormula, variable: Variable, value: int, undo: List[UndoEntry], touched: Set[Variable]) -> bool:
+  """Assign `variable` in place, recording the mutations in `undo`
+
+  :param touched: collects the variables that lost occurrences in
+    satisfied clauses; only these can have become pure
+  :returns: False if the assignment produced an empty clause, in which
+    case the formula is left partially assigned until it is undone
+  """
+  formula, vars_ind, size_ind = ind_formula
+  if variable not in vars_ind:
+    return True
+
+  # remove clauses that are satisfied by assignment
+  for clause_ref in list(vars_ind[variable][value]):
+    clause = formula.pop(clause_ref)
+    for l in clause:
+      _unindex_literal(vars_ind, clause_ref, l)
+      touched.add(abs(l))
+    size_ind[len(clause)].remove(clause_ref)
+    if not size_ind[len(clause)]:
+      del size_ind[len(clause)]
+    undo.append((clause_ref, clause, 0))
+
+  # remove literals that are falsified by assignment
+  falsified = variable * (-2 * value + 1)
+  for clause_ref in list(vars_ind.get(variable, (set(), set()))[1 - value]):
+    clause = formula[clause_ref]
+    clause.remove(falsified)
+    _unindex_literal(vars_ind, clause_ref, falsified)
+    _move_size(size_ind, clause_ref, len(clause) + 1, len(clause))
+    undo.append((clause_ref, clause, falsified))
+    if not clause:
+      return False
+
+  touched.discard(variable)
+  if DEBUG and formula:
+    assert_well_formed(ind_formula)
+  return True
+
+def undo_to(ind_formula: IndexedFormula, undo: List[UndoEntry], mark: int) -> None:
+  """Revert the mutations recorded in `undo` after its first `mark` entries
+  """
+  formula, vars_ind, size_ind = ind_formula
+  while len(undo) > mark:
+    clause_ref, clause, l = undo.pop()
+    if l == 0:
+      formula[clause_ref] = clause
+      for lit in clause:
+        _index_literal(vars_ind, clause_ref, lit)
+      if len(clause) not in size_ind:
+        size_ind[len(clause)] = set()
+      size_ind[len(clause)].add(clause_ref)
+    else:
+      clause.add(l)
+      _index_literal(vars_ind, clause_ref, l)
+      _move_size(size_ind, clause_ref, len(clause) - 1, len(clause))
+
+def propagate_logged(ind_formula: IndexedFormula, undo: List[UndoEntry], touched: Set[Variable]) -> bool:
+  """Apply unit elimination and pure literal elimination to a fixpoint
+
+  Only the variables in `touched` are examined for purity.
+
+  :returns: False on producing an empty clause
+  """
+  formula, vars_ind, size_ind = ind_formula
+  while formula:
+    if size_ind.get(1):
+      l = next(iter(formula[next(iter(size_ind[1]))]))
+      if not assign_logged(ind_formula, abs(l), FALSE if l < 0 else TRUE, undo, touched):
+        return False
+      continue
+    if not touched:
+      break
+    var = touched.pop()
+    if var in vars_ind and not (vars_ind[var][0] and vars_ind[var][1]):
+      assign_logged(ind_formula, var, FALSE if vars_ind[var][0] else TRUE, undo, touched)
+  return True
+
+def dpll_iterative(ind_formula: IndexedFormula) -> bool:
+  """Decide the satisfiability of a formula with an explicit stack of branches
+
+  Unlike `dpll`, it branches on a variable of a shortest clause, and
+  backtracks by undoing mutations instead of cloning the formula. The
+  formula is restored to its input state before returning.
+
+  Assumption: ind_formula is neither empty nor contains an empty clause
+  """
+  undo: List[UndoEntry] = []
+  # undo log position and variable of each decision whose other branch is yet to be tried
+  branches: List[Tuple[int, Variable]] = []
+  touched: Set[Variable] = set(ind_formula[1])
+  consistent = propagate_logged(ind_formula, undo, touched)
+  while True:
+    if not consistent:
+      if not branches:
+        undo_to(ind_formula, undo, 0)
+        return False
+      mark, var = branches.pop()
+      undo_to(ind_formula, undo, mark)
+      touched = set()
+      consistent = assign_logged(ind_formula, var, TRUE, undo, touched)
+    elif is_empty_formula(ind_formula):
+      undo_to(ind_formula, undo, 0)
+      return True
+    else:
+      var = choose_short_clause_branching_variable(ind_formula)
+      branches.append((len(undo), var))
+      touched = set()
+      consistent = assign_logged(ind_formula, var, FALSE, undo, touched)
+    if consistent:
+      consistent = propagate_logged(ind_formula, undo, touched)
+
 def main() -> None:
-  infilename = sys.argv[1]
+  global DEBUG
+  args = sys.argv[1:]
+  iterative = "--iterative" in args
+  DEBUG = "--debug" in args
+  infilename = [ arg for arg in args if not arg.startswith("--") ][0]
   with open(infilename) as infile:
     problem = parse_cnf(infile)
     ind_formula = problem[0]
@@ -252,6 +410,8 @@ def main() -> None:
       print(True)
     elif has_empty_clause(ind_formula):
       print(False)
+    elif iterative:
+      print(dpll_iterative(ind_formula))
     else:
       print(dpll(ind_formula, 0))
 
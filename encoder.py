@@ -0,0 +1,321 @@
+from __future__ import annotations
+from typing import Dict, Hashable, Iterable, List, Optional, TextIO, Tuple, TYPE_CHECKING
+from abc import ABC, abstractmethod
+import io
+import math
+
+import cdcl
+from propagating_formula import PropagatingFormula
+
+if TYPE_CHECKING:
+  from shared_types import Literal, Variable
+  from propagating_formula import State
+
+  # Type of the name of a symbolic variable; tuples are written with their parts joined by dots
+  Name = Hashable
+  Model = Dict[Variable, int]
+  # Type of a literal of the at-most-one encodings, a sign of 0 or 1 followed by a variable, which may be 0
+  SignedLiteral = Tuple[int, Variable]
+  SignedFormula = List[List[SignedLiteral]]
+
+def negate(lit: SignedLiteral):
+  """Negates a logical literal
+  :param lit: a logical literal
+  :returns: the negation of the literal lit
+  """
+  return (1 - lit[0], lit[1])
+
+def max_1(lits: List[SignedLiteral]):
+  """Generates a CNF that is satisfied exactly when at most one literal in the list is satisfied
+  :param lits: a list of literals
+  :returns: a CNF that is satisfied exactly when at most one literal in the list is satisfied
+  """
+  cnf: SignedFormula = []
+  for i in range(len(lits)):
+    for j in range(i + 1, len(lits)):
+      cnf.append([negate(lits[i]), negate(lits[j])])
+  return cnf
+
+def max_1_pairwise(lits: List[SignedLiteral], next_var: Variable) -> Tuple[SignedFormula, Variable]:
+  """Generates the pairwise at-most-one CNF of `max_1`, in the form shared by the other at-most-one encodings
+  :param lits: a list of literals
+  :param next_var: the first logical variable that is free to be used as an auxiliary variable
+  :returns: the CNF, followed by the first logical variable that is still free after it
+  """
+  return max_1(lits), next_var
+
+def max_1_sequential(lits: List[SignedLiteral], next_var: Variable) -> Tuple[SignedFormula, Variable]:
+  """Generates a sequential counter CNF that is satisfied by an assignment to the literals exactly when at most one literal is satisfied, using O(k) clauses for k literals
+  The auxiliary variable s_i is made equivalent to the disjunction of the first i + 1 literals, so that it is determined by the literals, and the encoding does not change the weighted model count.
+  :param lits: a list of literals
+  :param next_var: the first logical variable that is free to be used as an auxiliary variable
+  :returns: the CNF, followed by the first logical variable that is still free after it
+  """
+  if len(lits) <= 4:
+    return max_1_pairwise(lits, next_var)
+  cnf: SignedFormula = []
+  s = [ (1, next_var + i) for i in range(len(lits) - 1) ]
+  for i in range(len(lits)):
+    if i < len(s):
+      # lits[i] implies s_i
+      cnf.append([negate(lits[i]), s[i]])
+    if i > 0:
+      # s_{i-1} excludes lits[i]
+      cnf.append([negate(s[i - 1]), negate(lits[i])])
+    if 0 < i < len(s):
+      # s_{i-1} implies s_i, and s_i implies lits[i] or s_{i-1}
+      cnf.append([negate(s[i - 1]), s[i]])
+      cnf.append([negate(s[i]), lits[i], s[i - 1]])
+  cnf.append([negate(s[0]), lits[0]])
+  return cnf, next_var + len(s)
+
+def max_1_commander(lits: List[SignedLiteral], next_var: Variable, group_size: int = 3) -> Tuple[SignedFormula, Variable]:
+  """Generates a commander CNF that is satisfied by an assignment to the literals exactly when at most one literal is satisfied, using O(k) clauses for k literals
+  The literals are split into groups that are constrained pairwise, and the commander variable of each group is made equivalent to the disjunction of the group; at most one commander variable is then satisfied, which is encoded recursively.
+  :param lits: a list of literals
+  :param next_var: the first logical variable that is free to be used as an auxiliary variable
+  :returns: the CNF, followed by the first logical variable that is still free after it
+  """
+  if len(lits) <= 4:
+    return max_1_pairwise(lits, next_var)
+  cnf: SignedFormula = []
+  commanders: List[SignedLiteral] = []
+  for i in range(0, len(lits), group_size):
+    group = lits[i:i + group_size]
+    if len(group) == 1:
+      # a group of one literal commands itself
+      commanders.append(group[0])
+      continue
+    commander = (1, next_var)
+    next_var += 1
+    commanders.append(commander)
+    cnf.extend(max_1(group))
+    cnf.append([negate(commander)] + group)
+    for lit in group:
+      cnf.append([negate(lit), commander])
+  commander_cnf, next_var = max_1_commander(commanders, next_var, group_size)
+  cnf.extend(commander_cnf)
+  return cnf, next_var
+
+def max_1_product(lits: List[SignedLiteral], next_var: Variable) -> Tuple[SignedFormula, Variable]:
+  """Generates a product CNF that is satisfied by an assignment to the literals exactly when at most one literal is satisfied, using 2k + O(sqrt(k)) clauses for k literals
+  The literals are laid out in a grid whose row and column variables are made equivalent to the disjunctions of the literals in them; at most one row and at most one column variable is then satisfied, which is encoded recursively.
+  :param lits: a list of literals
+  :param next_var: the first logical variable that is free to be used as an auxiliary variable
+  :returns: the CNF, followed by the first logical variable that is still free after it
+  """
+  if len(lits) <= 4:
+    return max_1_pairwise(lits, next_var)
+  num_rows = math.ceil(math.sqrt(len(lits)))
+  num_cols = math.ceil(len(lits) / num_rows)
+  rows = [ (1, next_var + r) for r in range(num_rows) ]
+  cols = [ (1, next_var + num_rows + c) for c in range(num_cols) ]
+  next_var += num_rows + num_cols
+  cnf: SignedFormula = []
+  row_lits: List[List[SignedLiteral]] = [ [] for _ in rows ]
+  col_lits: List[List[SignedLiteral]] = [ [] for _ in cols ]
+  for i, lit in enumerate(lits):
+    r, c = divmod(i, num_cols)
+    cnf.append([negate(lit), rows[r]])
+    cnf.append([negate(lit), cols[c]])
+    row_lits[r].append(lit)
+    col_lits[c].append(lit)
+  for line, line_lits in zip(rows + cols, row_lits + col_lits):
+    cnf.append([negate(line)] + line_lits)
+  for lines in (rows, cols):
+    line_cnf, next_var = max_1_product(lines, next_var)
+    cnf.extend(line_cnf)
+  return cnf, next_var
+
+# the at-most-one encodings that `Encoder.at_most_one` and `graphical.bayes_graph.BayesGraph.to_formula` can be asked to use
+MAX_1_ENCODINGS = {
+  "pairwise": max_1_pairwise,
+  "sequential": max_1_sequential,
+  "commander": max_1_commander,
+  "product": max_1_product,
+}
+
+class VariablePool:
+  """Interns symbolic variable names as DIMACS variables, numbered from 1 in order of first use
+
+  :param variables: a map from names to the variables they are interned as
+  :param names: a list whose element at index i is the name of the variable i + 1
+  """
+
+  def __init__(self: VariablePool) -> None:
+    self.variables: Dict[Name, Variable] = {}
+    self.names: List[Name] = []
+
+  def var(self: VariablePool, name: Name) -> Variable:
+    variable = self.variables.get(name)
+    if variable is None:
+      self.names.append(name)
+      variable = len(self.names)
+      self.variables[name] = variable
+    return variable
+
+  def fresh(self: VariablePool, prefix: str = "aux") -> Variable:
+    """Creates an auxiliary variable that is named after its own number
+    """
+    return self.var((prefix, len(self.names) + 1))
+
+  def name(self: VariablePool, variable: Variable) -> Name:
+    return self.names[variable - 1]
+
+  def __len__(self: VariablePool) -> int:
+    return len(self.names)
+
+  def write_name_map(self: VariablePool, file_object: TextIO) -> None:
+    """Writes a line `<variable> <name>` for each variable
+    """
+    for i, name in enumerate(self.names):
+      file_object.write("{} {}\n".format(i + 1, format_name(name)))
+
+  def decode(self: VariablePool, model: Model) -> Dict[Name, bool]:
+    """Maps a model from variables to values to a model from names to truth values
+    """
+    return { self.name(variable): value == 1 for variable, value in model.items() }
+
+def format_name(name: Name) -> str:
+  if isinstance(name, tuple):
+    return ".".join([ str(part) for part in name ])
+  return str(name)
+
+class ClauseSink(ABC):
+  """A destination for the integer clauses produced by an `Encoder`
+  """
+
+  @abstractmethod
+  def add_clause(self, clause: List[Literal]) -> None:
+    pass
+
+  def close(self) -> None:
+    pass
+
+class ClauseList(ClauseSink):
+  """Keeps the clauses in memory
+  """
+
+  def __init__(self: ClauseList) -> None:
+    self.clauses: List[List[Literal]] = []
+
+  def add_clause(self: ClauseList, clause: List[Literal]) -> None:
+    self.clauses.append(clause)
+
+class DimacsSink(ClauseSink):
+  """Writes each clause to a file in DIMACS format as soon as it is added
+
+  The problem line is written with padded placeholder counts that are
+  overwritten by `close`, so `file_object` must be seekable.
+  """
+
+  # width reserved for each count in the problem line
+  COUNT_WIDTH = 20
+
+  def __init__(self: DimacsSink, file_object: TextIO) -> None:
+    self.file_object = file_object
+    self.num_vars = 0
+    self.num_clauses = 0
+    self.file_object.write(self._problem_line())
+
+  def add_clause(self: DimacsSink, clause: List[Literal]) -> None:
+    self.file_object.write(" ".join([ str(l) for l in clause ]) + " 0\n")
+    self.num_clauses += 1
+    for l in clause:
+      if abs(l) > self.num_vars:
+        self.num_vars = abs(l)
+
+  def close(self: DimacsSink) -> None:
+    self.file_object.seek(0)
+    self.file_object.write(self._problem_line())
+    self.file_object.seek(0, io.SEEK_END)
+
+  def _problem_line(self: DimacsSink) -> str:
+    return "p cnf {} {}\n".format(str(self.num_vars).rjust(DimacsSink.COUNT_WIDTH), str(self.num_clauses).rjust(DimacsSink.COUNT_WIDTH))
+
+class TeeSink(ClauseSink):
+  """Adds each clause to every one of several sinks
+  """
+
+  def __init__(self: TeeSink, sinks: List[ClauseSink]) -> None:
+    self.sinks = sinks
+
+  def add_clause(self: TeeSink, clause: List[Literal]) -> None:
+    for sink in self.sinks:
+      sink.add_clause(clause)
+
+  def close(self: TeeSink) -> None:
+    for sink in self.sinks:
+      sink.close()
+
+class SolverSink(ClauseList):
+  """Keeps the clauses in memory to be solved in this process
+  """
+
+  def solve(self: SolverSink) -> Tuple[State, Optional[Model]]:
+    """Decides the satisfiability of the clauses added so far
+
+    :returns: the state of the formula, followed by a satisfying assignment if there is one
+    """
+    formula = PropagatingFormula.from_clauses(self.clauses)
+    state, _ = cdcl.cdcl_formula(formula)
+    if state != cdcl.SATISFIABLE:
+      return state, None
+    assignment = formula.get_partial_assignment()
+    return state, { variable: item[2] for variable, item in assignment.current.items() }
+
+class Encoder:
+  """Builds a CNF over symbolic variables, adding each clause to a sink as soon as it is built
+
+  Literals are DIMACS literals of the variables returned by `var`, so
+  the negation of a literal `l` is `-l`.
+
+  :param sink: the sink that the clauses are added to
+  :param pool: the pool that names are interned in
+  """
+
+  def __init__(self: Encoder, sink: ClauseSink, pool: Optional[VariablePool] = None) -> None:
+    self.sink = sink
+    self.pool = pool if pool is not None else VariablePool()
+
+  def var(self: Encoder, name: Name) -> Variable:
+    return self.pool.var(name)
+
+  def add(self: Encoder, clause: List[Literal]) -> None:
+    self.sink.add_clause(clause)
+
+  def implies(self: Encoder, premises: Iterable[Literal], conclusion: Literal) -> None:
+    """Adds that the conjunction of `premises` implies `conclusion`
+    """
+    self.add([conclusion] + [ -l for l in premises ])
+
+  def equivalent(self: Encoder, a: Literal, b: Literal) -> None:
+    self.implies([b], a)
+    self.implies([a], b)
+
+  def at_least_one(self: Encoder, lits: List[Literal]) -> None:
+    self.add(list(lits))
+
+  def at_most_one(self: Encoder, lits: List[Literal], encoding: str = "pairwise") -> None:
+    """Adds that at most one of `lits` is satisfied, with an encoding of `MAX_1_ENCODINGS`
+
+    :param encoding: "pairwise", which uses no auxiliary variables, or
+      "sequential", "commander" or "product", which use O(k) clauses and
+      auxiliary variables for k literals; the auxiliary variables are
+      interned as fresh variables of the pool
+    """
+    if encoding not in MAX_1_ENCODINGS:
+      raise Exception("unknown at-most-one encoding {}".format(encoding))
+    first = len(self.pool) + 1
+    cnf, next_var = MAX_1_ENCODINGS[encoding]([ (1 if l > 0 else 0, abs(l)) for l in lits ], first)
+    for _ in range(first, next_var):
+      self.pool.fresh()
+    for clause in cnf:
+      self.add([ var if sign else -var for sign, var in clause ])
+
+  def exactly_one(self: Encoder, lits: List[Literal], encoding: str = "pairwise") -> None:
+    self.at_least_one(lits)
+    self.at_most_one(lits, encoding)
+
+  def close(self: Encoder) -> None:
+    self.sink.close()
@@ -0,0 +1,87 @@
+from __future__ import annotations
+from typing import Callable, Dict, Iterator, List, Optional, Set, TYPE_CHECKING
+import sys
+
+import cdcl
+from propagating_formula import PropagatingFormula
+from vsids_brancher import VSIDSBrancher
+
+if TYPE_CHECKING:
+  from shared_types import Literal, Value, Variable
+  from brancher import Brancher
+
+  Model = Dict[Variable, Value]
+
+def enumerate_models(formula: PropagatingFormula, projection: Optional[Set[Variable]] = None, create_brancher: Callable[[PropagatingFormula], Brancher] = VSIDSBrancher.create) -> Iterator[Model]:
+  """Yields every model of `formula`, restricted to `projection` if given, exactly once
+
+  All models are found on the same `formula` and brancher: after each
+  model, a clause that blocks it is added with `add_clause`, and the
+  search goes on with every clause learned so far.
+
+  The blocking clause is minimized to the negations of the literals that
+  were decided rather than implied. Without a projection, these are the
+  decisions of the search, since unit propagation from them alone
+  recovers the rest of the model. With a projection, the projected
+  literals of the model are decided again from decision level 0, one at
+  a time, skipping those already implied by the ones before; any model
+  that agrees with the decided ones agrees with the rest of the
+  projection, so the clause blocks this projection of the model only.
+
+  The blocking clause is added after backtracking to just below the
+  decision level of its last literal, where it asserts the negation of
+  that literal.
+
+  :param projection: the variables that models are restricted to, or None for all variables of `formula`
+  :param create_brancher: the `create` method of the brancher to decide with
+  """
+  brancher = create_brancher(formula)
+  reuse_brancher = lambda _: brancher
+  assignment = formula.get_partial_assignment()
+  while True:
+    state, _ = cdcl.cdcl_budgeted(formula, None, reuse_brancher)
+    if state != cdcl.SATISFIABLE:
+      return
+    if projection is None:
+      model = { v: item[2] for v, item in assignment.current.items() }
+      decisions = [ v if value == 1 else -v for v, value in formula.decision_history[1:] ]
+    else:
+      model = { v: assignment.get_value(v) for v in projection if v in assignment }
+      decisions = _decide_projection(formula, model)
+    yield model
+
+    if not decisions:
+      # the model is implied at decision level 0, so it is the only one
+      return
+    formula.backtrack(len(decisions) - 1)
+    blocking_clause = [ -l for l in decisions ]
+    brancher.record_learned_clause(blocking_clause)
+    formula.add_clause(blocking_clause)
+
+def _decide_projection(formula: PropagatingFormula, model: Model) -> List[Literal]:
+  """Decides the values of `model` from decision level 0, skipping those that are already implied
+
+  :returns: the literals that were decided
+  """
+  formula.backtrack(0)
+  assignment = formula.get_partial_assignment()
+  decisions: List[Literal] = []
+  for v, value in sorted(model.items()):
+    if v in assignment:
+      continue
+    formula.assign(v, value)
+    decisions.append(v if value == 1 else -v)
+  return decisions
+
+if __name__ == "__main__":
+  if len(sys.argv) < 2:
+    print("Usage: python enumeration.py path/to/file.cnf [projected variables...]")
+    sys.exit(0)
+  with open(sys.argv[1]) as file:
+    formula = PropagatingFormula(file)
+  projection = { int(v) for v in sys.argv[2:] } if len(sys.argv) > 2 else None
+  count = 0
+  for model in enumerate_models(formula, projection):
+    print(" ".join([ str(v if value == 1 else -v) for v, value in sorted(model.items()) ]) + " 0")
+    count += 1
+  print("c {} models".format(count))
@@ -1,5 +1,5 @@
 from __future__ import annotations
-from typing import Dict, List, Optional, Set, TextIO, Tuple, TYPE_CHECKING, Union
+from typing import Dict, Iterable, List, Optional, Set, TextIO, Tuple, TYPE_CHECKING, Union
 
 from clause import Clause
 from assignment import Assignment
@@ -43,6 +43,7 @@ class Formula:
   :param unit_clauses: A set of clauses that are unit given the current assignment
   :param decision_level: The current decision level
   :param assignment: An object maintaining the assignment of variables made at each decision level
+  :param num_base_clauses: The number of clauses of the representation that were read from the input
   """
 
   SATISFIED: State = 1
@@ -63,25 +64,10 @@ class Formula:
     If either are true, then we allow that the representation may
     not share the same satisfiability as the input CNF.
     """
-    self.formula: List[Clause] = []
-    self.base_state: State = Formula.UNRESOLVED
-    # `variable_clauses` is a map from variables to clauses that have
-    # points to a literal in that variable in its head reference or
-    # tail reference per decision level
-    self.variable_clauses: VariableClauses = {}
-    self.mutation_history: MutationHistory = [set()]
-    self.unsat_clauses: Set[Clause] = set()
-    self.state_history: StateHistory = []
-    self.unit_clauses: Set[Clause] = set()
-    self.decision_level: DecisionLevel = 0
-    variables_in_representation: Set[Variable] = set()
-
     num_vars: Optional[int] = None
     num_clauses: Optional[int] = None
-    current_clause: Set[Literal] = set()
-    current_clause_valid = False
-    num_ignored_clauses = 0
-    variables: Set[Variable] = set()
+    clauses: List[List[Literal]] = []
+    current_clause: List[Literal] = []
 
     for line in file_object:
       if line[0] == 'c':
@@ -94,44 +80,60 @@ class Formula:
       literals = [ int(l) for l in line.split() ]
       for l in literals:
         if l == 0:
-          # handle empty clauses
-          if not current_clause:
-            self.base_state = Formula.UNSATISFIED
-            num_ignored_clauses += 1
-          # handle tautological clauses
-          if not current_clause_valid:
-            # non-empty, non-tautological clauses added to representation
-            variables_in_representation |= { abs(l) for l in current_clause }
-            self._add_base_clause(sorted(list(current_clause)))
-
-          # reset for next clause
-          current_clause = set()
-          current_clause_valid = False
+          clauses.append(current_clause)
+          current_clause = []
           continue
-
-        # Tautological clauses are not added
-        if -l in current_clause and not current_clause_valid:
-          current_clause_valid = True
-          num_ignored_clauses += 1
-
-        current_clause.add(l)
-        variables.add(abs(l))
+        current_clause.append(l)
 
     # some examples do not terminate the final clause with 0
     if current_clause:
-      # handle tautological clauses
-      if current_clause_valid:
-        num_ignored_clauses += 1
-      # handle non-empty, non-tautological clauses
-      else:
-        variables_in_representation |= { abs(l) for l in current_clause }
-        self._add_base_clause(sorted(list(current_clause)))
+      clauses.append(current_clause)
     if num_clauses is None or num_vars is None:
       raise Exception("p line not specified")
-    if len(self.formula) + num_ignored_clauses != num_clauses:
+    if len(clauses) != num_clauses:
       raise Exception("Number of clauses do not match given number in problem description")
-    if len(variables) != num_vars:
+    variables: Set[Variable] = { abs(l) for clause in clauses for l in clause }
+    # either the number of distinct variables, or the largest variable as in DIMACS
+    if num_vars != len(variables) and num_vars != max(variables, default=0):
       raise Exception("Number of variables do not match given number in problem description")
+    self._initialize(clauses)
+
+  @staticmethod
+  def from_clauses(clauses: Iterable[List[Literal]]) -> Formula:
+    """Construct a Formula object from clauses that are already in memory, as lists of literals
+
+    The clauses are normalized as those of an input file are, but there
+    is no problem line to check them against.
+    """
+    formula = Formula.__new__(Formula)
+    formula._initialize(clauses)
+    return formula
+
+  def _initialize(self: Formula, clauses: Iterable[List[Literal]]) -> None:
+    self.formula: List[Clause] = []
+    self.base_state: State = Formula.UNRESOLVED
+    # `variable_clauses` is a map from variables to clauses that have
+    # points to a literal in that variable in its head reference or
+    # tail reference per decision level
+    self.variable_clauses: VariableClauses = {}
+    self.mutation_history: MutationHistory = [set()]
+    self.unsat_clauses: Set[Clause] = set()
+    self.state_history: StateHistory = []
+    self.unit_clauses: Set[Clause] = set()
+    self.decision_level: DecisionLevel = 0
+    variables_in_representation: Set[Variable] = set()
+
+    for clause in clauses:
+      current_clause = set(clause)
+      # handle empty clauses
+      if not current_clause:
+        self.base_state = Formula.UNSATISFIED
+      # Tautological clauses are not added
+      if any(-l in current_clause for l in current_clause):
+        continue
+      # non-empty, non-tautological clauses added to representation
+      variables_in_representation |= { abs(l) for l in current_clause }
+      self._add_base_clause(sorted(list(current_clause)))
 
     # handle empty formulas
     if len(self.formula) == 0:
@@ -139,6 +141,8 @@ class Formula:
 
     self.state_history.append(self.base_state)
     self.assignment: Assignment = Assignment(variables_in_representation)
+    # the clauses after these in `self.formula` were added by `add_clause`
+    self.num_base_clauses = len(self.formula)
 
   def _add_base_clause(self: Formula, clause: List[int]) -> None:
     """Add a clause to the formula, only during initialization.
@@ -155,35 +159,64 @@ class Formula:
     if len(clause) == 1:
       self.unit_clauses.add(clause_object)
 
-  def add_clause(self: Formula, clause: List[int]) -> None:
+  def add_clause(self: Formula, clause: List[int]) -> Clause:
     """Add a clause to the formula after initialization.
 
+    The cost is linear in the length of the clause, and does not depend
+    on the decision level: the references of the clause move past its
+    falsified literals in a single pass, and only the decision levels
+    that the clause changes the state of are updated. A learned
+    asserting clause ends up unit, with both references on its
+    asserting literal.
+
     :param clause: a list of `Literal`s that are contained in the clause;
       each variable must appear in `clause` at most once. `clause` cannot contain literals
       in variables not already present in the representation.
+    :returns: the clause object added
     """
     clause_object = Clause(clause)
     clause_object.assign(self.assignment)
     self.formula.append(clause_object)
 
-    # update mutation history and state history
-    old_head_var, old_tail_var = clause_object.get_head_tail_var()
-    was_valid = False
-    was_unsat = len(clause) == 0
-    for d in range(0, self.decision_level + 1):
-      clause_object.assign_decision_level(self.assignment, d)
-      state, head_var, tail_var = clause_object.get_state(self.assignment.get_assignment_at_level(d))
-      if head_var != old_head_var or tail_var != old_tail_var:
-        self.mutation_history[d].add(clause_object)
-
-      # can actually be commented out since we never make
-      # decisions while the formila is valid or unsat
-      was_valid = was_valid or state == Clause.SATISFIED
-      was_unsat = was_unsat or state == Clause.UNSATISFIED
-      if self.state_history[d] == Formula.SATISFIED and not was_valid:
-        self.state_history[d] = Formula.UNRESOLVED
-      if was_unsat:
+    # update mutation history; the references of the clause were moved
+    # at the decision levels recorded in its reference history, and
+    # backtracking past any of them must restore the clause, as must
+    # backtracking past the assignment of a literal that a reference
+    # rests on, which may make the clause satisfied or unsatisfied
+    while len(self.mutation_history) <= self.decision_level:
+      self.mutation_history.append(set())
+    for d, _, _ in clause_object.reference_history[1:]:
+      self.mutation_history[d].add(clause_object)
+    for l in clause_object.get_head_tail_lit():
+      item = self.assignment.get(abs(l))
+      if item is not None:
+        self.mutation_history[item[0]].add(clause_object)
+
+    # update state history; the clause is satisfied from the lowest
+    # decision level at which one of its literals is satisfied, and
+    # unsatisfied from the decision level at which its last literal is
+    # falsified, if all of them are. Only the current decision level may
+    # be satisfied, since no variable is left to decide there, and the
+    # decision levels after an unsatisfied one are unsatisfied, so only
+    # the latest decision levels need to be updated
+    sat_level: Optional[DecisionLevel] = None
+    unsat_level: Optional[DecisionLevel] = 0
+    for l in clause:
+      item = self.assignment.get(abs(l))
+      if item is None:
+        unsat_level = None
+      elif (l > 0) == (item[2] == 1):
+        sat_level = item[0] if sat_level is None else min(sat_level, item[0])
+        unsat_level = None
+      elif unsat_level is not None:
+        unsat_level = max(unsat_level, item[0])
+    for d in range(self.decision_level, -1, -1):
+      if unsat_level is not None and unsat_level <= d:
         self.state_history[d] = Formula.UNSATISFIED
+      elif self.state_history[d] == Formula.SATISFIED and (sat_level is None or sat_level > d):
+        self.state_history[d] = Formula.UNRESOLVED
+      else:
+        break
 
     # update current state
     state, head_var, tail_var = clause_object.get_state(self.assignment)
@@ -202,6 +235,19 @@ class Formula:
     # update unsat clauses
     if state == Clause.UNSATISFIED:
       self.unsat_clauses.add(clause_object)
+    return clause_object
+
+  def add_variables(self: Formula, variables: Set[Variable]) -> None:
+    """Add variables that appear in no clause to the representation, such as those that are only constrained outside of the formula
+    """
+    new_variables = { v for v in variables if v not in self.assignment and v not in self.assignment.get_unassigned() }
+    if not new_variables:
+      return
+    self.assignment.get_unassigned().update(new_variables)
+    # no decision level leaves the new variables assigned
+    for d in range(len(self.state_history)):
+      if self.state_history[d] == Formula.SATISFIED:
+        self.state_history[d] = Formula.UNRESOLVED
 
   def assign(self: Formula, d: DecisionLevel, variable: Variable, value: Value, antecedent: Antecedent) -> None:
     """Record an assignment to the formula
@@ -236,10 +282,14 @@ class Formula:
         if clause_state == Clause.UNSATISFIED:
           state = Formula.UNSATISFIED
 
-        # update mutation history
+        # update mutation history; a reference that lagged behind may
+        # move past literals assigned below `d`, in which case the moves
+        # are labelled with those lower decision levels
         while d >= len(self.mutation_history):
           self.mutation_history.append(set())
         self.mutation_history[-1].add(clause)
+        for level, _, _ in clause.reference_history[1:]:
+          self.mutation_history[level].add(clause)
 
         # update unit_clauses
         if clause_state == Clause.UNIT:
@@ -276,6 +326,11 @@ class Formula:
         self.variable_clauses.get(old_head_var, set()).discard(clause)
         self.variable_clauses.get(old_tail_var, set()).discard(clause)
         clause.backtrack(d)
+        # the references restored may lag behind literals that are still
+        # falsified at decision level `d`; move them past those again
+        clause.assign(self.assignment)
+        for level, _, _ in clause.reference_history[1:]:
+          self.mutation_history[level].add(clause)
         clause_state, head_var, tail_var = clause.get_state(self.assignment)
         if clause_state == Clause.UNRESOLVED or clause_state == Clause.UNIT:
           if head_var not in self.variable_clauses:
@@ -1,19 +1,74 @@
 from __future__ import annotations
 from typing import Dict, List, Optional, Set, Tuple, TYPE_CHECKING
 from brancher import Brancher
+from clause import Clause
 
 if TYPE_CHECKING:
-  from shared_types import DecisionLevel, Literal
+  from shared_types import DecisionLevel, Literal, Variable
 
   from assignment import Assignment, AssignmentItem
-  from clause import Clause
   from propagating_formula import PropagatingFormula
 
   Vertex = AssignmentItem
 
 KAPPA: AssignmentItem = (-1, 0, 0.5, None)
 
-def _build_conflict_dag(d: DecisionLevel, unsat_clauses: Set[Clause], assignment: Assignment) -> Tuple[AssignmentItem, Dict[AssignmentItem, Set[AssignmentItem]]]:
+def _anchored_vars(d: DecisionLevel, assignment: Assignment) -> Set[Variable]:
+  """The variables assigned at decision level `d` that depend on its decision
+
+  A variable may be implied at decision level `d` by a clause whose
+  other literals were all falsified below `d`, such as the asserting
+  literal of a learned clause after a chronological backtrack. It does
+  not depend on the decision of `d`, and neither do the variables
+  implied at `d` only by such variables and by lower decision levels.
+  """
+  anchored: Set[Variable] = set()
+  # the assignments of a decision level are kept in the order they were made
+  for var, var_item in assignment.get_assignment_at_level(d).items():
+    antecedent = var_item[3]
+    if antecedent is None or any(v in anchored for v in antecedent.get_assigned_vars(assignment) if v != var):
+      anchored.add(var)
+  return anchored
+
+def _implying_items(var_item: AssignmentItem, d: DecisionLevel, anchored: Optional[Set[Variable]], assignment: Assignment) -> List[AssignmentItem]:
+  """`var_item`, or if it is at decision level `d` without depending on its decision, the assignments below `d` that it follows from
+
+  :param anchored: the variables at `d` that depend on its decision, or None to take every variable as one
+  """
+  if anchored is None or var_item[0] != d or var_item[1] in anchored:
+    return [var_item]
+  items: List[AssignmentItem] = []
+  stack: List[AssignmentItem] = [var_item]
+  seen: Set[AssignmentItem] = set()
+  while stack:
+    item = stack.pop()
+    if item in seen:
+      continue
+    seen.add(item)
+    if item[0] != d or item[1] in anchored:
+      items.append(item)
+      continue
+    antecedent = item[3]
+    if not antecedent:
+      raise Exception("variable {} should be implied".format(item[1]))
+    for v in antecedent.get_assigned_vars(assignment):
+      if v != item[1]:
+        parent_item = assignment.get(v)
+        if not parent_item:
+          raise Exception("variable {} should be present in assignment".format(v))
+        stack.append(parent_item)
+  return items
+
+def _build_conflict_dag(d: DecisionLevel, unsat_clauses: Set[Clause], assignment: Assignment, anchored: Optional[Set[Variable]]) -> Tuple[Optional[AssignmentItem], Dict[AssignmentItem, Set[AssignmentItem]]]:
+  """The implication graph of a conflict, down to the assignments below decision level `d`, and its root, the decision of `d`
+
+  If `anchored` is given, the assignments at `d` that do not depend on
+  its decision are left out, and the assignments that they follow from
+  take their place. The root is None if the conflict does not depend on
+  the decision of `d`.
+
+  :param anchored: the variables at `d` that depend on its decision, as found by `_anchored_vars`, or None
+  """
   succ: Dict[AssignmentItem, Set[AssignmentItem]] = {
     KAPPA: set()
   }
@@ -25,10 +80,11 @@ def _build_conflict_dag(d: DecisionLevel, unsat_clauses: Set[Clause], assignment
       var_item = assignment.get(var)
       if not var_item:
         raise Exception("variable {} should be present in assignment".format(var))
-      if var_item not in succ:
-        succ[var_item] = set()
-      succ[var_item].add(KAPPA)
-      queue.add(var_item)
+      for item in _implying_items(var_item, d, anchored, assignment):
+        if item not in succ:
+          succ[item] = set()
+        succ[item].add(KAPPA)
+        queue.add(item)
   while queue:
     var_item = queue.pop()
     if var_item in seen:
@@ -46,12 +102,11 @@ def _build_conflict_dag(d: DecisionLevel, unsat_clauses: Set[Clause], assignment
       parent_var_item = assignment.get(v)
       if not parent_var_item:
         raise Exception("variable {} should be present in assignment".format(v))
-      if parent_var_item not in succ:
-        succ[parent_var_item] = set()
-      succ[parent_var_item].add(var_item)
-      queue.add(parent_var_item)
-  if not root:
-    raise Exception("root should be found when building conflict tree")
+      for item in _implying_items(parent_var_item, d, anchored, assignment):
+        if item not in succ:
+          succ[item] = set()
+        succ[item].add(var_item)
+        queue.add(item)
   return root, succ
 
 def _build_pred(succ: Dict[Vertex, Set[Vertex]]) -> Dict[Vertex, Set[Vertex]]:
@@ -79,7 +134,8 @@ def _forest_eval(v: Vertex, forest_parent: Dict[Vertex, Vertex], semi: Dict[Vert
   return u
 
 def _build_dominator_graph(root: Vertex, succ: Dict[AssignmentItem, Set[AssignmentItem]]) -> Dict[Vertex, Vertex]:
-  dfs_stack: List[Vertex] = [root]
+  # each stack entry is a vertex together with the vertex that pushed it
+  dfs_stack: List[Tuple[Optional[Vertex], Vertex]] = [(None, root)]
 
   # Step 1
   numbering: Dict[Vertex, int] = {}
@@ -95,7 +151,12 @@ def _build_dominator_graph(root: Vertex, succ: Dict[AssignmentItem, Set[Assignme
     semi[v] = 0
 
   while dfs_stack:
-    v = dfs_stack.pop()
+    p, v = dfs_stack.pop()
+    # a vertex may be pushed several times before it is first visited
+    if v in numbering:
+      continue
+    if p is not None:
+      parent[v] = p
     current_number += 1
     numbering[v] = current_number
     semi[v] = current_number
@@ -108,8 +169,7 @@ def _build_dominator_graph(root: Vertex, succ: Dict[AssignmentItem, Set[Assignme
       pred[child].append(v)
       if child in numbering:
         continue
-      parent[child] = v
-      dfs_stack.append(child)
+      dfs_stack.append((v, child))
 
   # step 2, with step 3 nested
 
@@ -137,6 +197,12 @@ def _build_dominator_graph(root: Vertex, succ: Dict[AssignmentItem, Set[Assignme
         dom[v] = u
       else:
         dom[v] = parent[w]
+
+  # step 4
+  for i in range(2, current_number + 1):
+    w = vertex[i]
+    if dom[w] != vertex[semi[w]]:
+      dom[w] = dom[dom[w]]
   return dom
 
 def _build_clause(fuip: AssignmentItem, pred: Dict[AssignmentItem, Set[AssignmentItem]], brancher: Brancher) -> Tuple[DecisionLevel, List[Literal]]:
@@ -167,7 +233,37 @@ def _build_clause(fuip: AssignmentItem, pred: Dict[AssignmentItem, Set[Assignmen
   return max_sub_d, clause
 
 def fuip_analyzer(formula: PropagatingFormula, brancher: Brancher) -> Tuple[DecisionLevel, List[List[Literal]]]:
-  root, succ = _build_conflict_dag(formula.get_decision_level(), formula.get_unsat_clauses(), formula.get_partial_assignment())
+  """Learns the first-UIP clause of the conflict of `formula`
+
+  A conflict that does not depend on the decision of the current
+  decision level, which may happen after a chronological backtrack, is
+  a conflict of the latest decision level of the assignments it follows
+  from, and is analyzed there instead.
+
+  :returns: the decision level to backtrack to, at which the clause is asserting, or -1 if the formula is unsatisfiable, followed by the learned clause
+  """
+  assignment = formula.get_partial_assignment()
+  d = formula.get_decision_level()
+  unsat_clauses = formula.get_unsat_clauses()
+  while True:
+    # the assignments at `d` that do not depend on its decision are
+    # never reached from it, so they only need to be told apart, which
+    # takes a pass over the decision level, if the conflict does not
+    # depend on it
+    root, succ = _build_conflict_dag(d, unsat_clauses, assignment, None)
+    if root is not None:
+      break
+    _, succ = _build_conflict_dag(d, unsat_clauses, assignment, _anchored_vars(d, assignment))
+    items = [ item for item in succ if item != KAPPA ]
+    if not items:
+      # the conflict follows from no assignment at all, but from clauses
+      # that were unit when they were added above decision level 0
+      return -1, [[]]
+    clause = [ (-var if val == 1 else var) for _, var, val, _ in items ]
+    d = max(item[0] for item in items)
+    if d == 0:
+      return -1, [clause]
+    unsat_clauses = { Clause(clause) }
   dom = _build_dominator_graph(root, succ)
   fuip = dom[KAPPA]
   pred = _build_pred(succ)
@@ -0,0 +1,138 @@
+from __future__ import annotations
+from typing import Dict, List, Optional, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+  from shared_types import Literal, Variable
+  from assignment import Assignment
+
+  Parity = int
+  # Type of an XOR constraint: its variables, and the parity of the number of them that are true
+  Xor = Tuple[List[Variable], Parity]
+  # Type of a row of the matrix: a bitset of columns, and the parity
+  Row = Tuple[int, Parity]
+
+def detect_xors(clauses: List[List[Literal]], max_size: int = 6) -> List[Xor]:
+  """Recovers the XOR constraints that are encoded by groups of clauses
+
+  An XOR constraint on k variables is encoded by the 2^(k - 1) clauses on
+  those variables that each exclude one assignment of the wrong parity;
+  a clause excludes the assignment that falsifies all of its literals,
+  whose parity is that of its number of negative literals.
+
+  :param clauses: a CNF, with each variable appearing at most once in each clause
+  :param max_size: the number of variables of the largest XOR constraint that is looked for
+  :returns: the XOR constraints whose every clause is in `clauses`
+  """
+  groups: Dict[Tuple[Tuple[Variable, ...], Parity], set] = {}
+  for clause in clauses:
+    if not 2 <= len(clause) <= max_size:
+      continue
+    variables = tuple(sorted(abs(l) for l in clause))
+    parity = (sum(1 for l in clause if l < 0) + 1) % 2
+    key = (variables, parity)
+    if key not in groups:
+      groups[key] = set()
+    groups[key].add(frozenset(clause))
+  return [ (list(variables), parity) for (variables, parity), group in groups.items() if len(group) == 2 ** (len(variables) - 1) ]
+
+class GaussJordan:
+  """A system of XOR constraints that derives what is implied by them under a partial assignment
+
+  Each row of the matrix is packed into an `int` whose bit i is set when
+  the variable of column i appears in the row. The rows are kept in
+  reduced row echelon form with pivots chosen among the unassigned
+  columns, so that every row is a sum of XOR constraints of the system.
+  A row with no unassigned column is either satisfied or conflicting,
+  and a row with exactly one unassigned column implies the value of its
+  variable.
+
+  The reduced matrix is kept between calls to `propagate`: only a row
+  whose pivot column has since been assigned, or a row without a pivot
+  that has since gained an unassigned column, is given a new pivot,
+  which is then eliminated from the other rows. Since a pivot column
+  appears in no other row, the pivots of the other rows stay valid.
+
+  :param columns: a list whose element at index i is the variable of column i
+  :param column_map: a reverse map of `columns`
+  :param rows: the rows of the matrix of the XOR constraints
+  :param matrix: the rows in reduced row echelon form
+  :param pivots: the bit of the pivot column of each row of `matrix`, or 0 if it has none
+  """
+
+  def __init__(self: GaussJordan, xors: List[Xor]) -> None:
+    self.columns: List[Variable] = sorted({ v for variables, _ in xors for v in variables })
+    self.column_map: Dict[Variable, int] = { v: i for i, v in enumerate(self.columns) }
+    self.rows: List[Row] = []
+    for variables, parity in xors:
+      bits = 0
+      for v in variables:
+        bits ^= 1 << self.column_map[v]
+      self.rows.append((bits, parity))
+    self.matrix: List[Row] = list(self.rows)
+    self.pivots: List[int] = [0] * len(self.rows)
+    self._last_assigned: Optional[Tuple[int, int]] = None
+
+  def _reason(self: GaussJordan, bits: int, values: int, implied: Optional[int], implied_value: int) -> List[Literal]:
+    """The clause that is implied by the row `bits`: it is falsified by the
+    current values of the assigned variables of the row, except for a
+    literal of `implied` with `implied_value`, if given
+    """
+    clause: List[Literal] = []
+    while bits:
+      low = bits & -bits
+      i = low.bit_length() - 1
+      v = self.columns[i]
+      if i == implied:
+        clause.append(v if implied_value == 1 else -v)
+      else:
+        clause.append(-v if values & low else v)
+      bits ^= low
+    return clause
+
+  def propagate(self: GaussJordan, assignment: Assignment) -> List[List[Literal]]:
+    """Derives the clauses that explain what the XOR constraints imply under `assignment`
+
+    :returns: a single clause that is falsified by `assignment` if the
+      constraints are in conflict with it, or otherwise one clause for
+      each implied variable that is unit under `assignment`; each is
+      implied by the XOR constraints
+    """
+    assigned = 0
+    values = 0
+    for i, v in enumerate(self.columns):
+      if v in assignment:
+        assigned |= 1 << i
+        if assignment.get_value(v) == 1:
+          values |= 1 << i
+    # nothing new can be derived from an assignment to the columns seen in the last call
+    if self._last_assigned == (assigned, values):
+      return []
+    self._last_assigned = (assigned, values)
+
+    rows = self.matrix
+    pivots = self.pivots
+    for r in range(len(rows)):
+      if pivots[r] and not pivots[r] & assigned:
+        continue
+      bits, parity = rows[r]
+      free = bits & ~assigned
+      pivot = free & -free
+      pivots[r] = pivot
+      if not pivot:
+        continue
+      # eliminate the new pivot column from every other row
+      for s in range(len(rows)):
+        if s != r and rows[s][0] & pivot:
+          rows[s] = (rows[s][0] ^ bits, rows[s][1] ^ parity)
+
+    implications: List[List[Literal]] = []
+    for bits, parity in rows:
+      free = bits & ~assigned
+      # the parity that the unassigned columns of the row must make up
+      residual = parity ^ (bin(bits & values).count("1") & 1)
+      if not free:
+        if residual:
+          return [self._reason(bits, values, None, 0)]
+      elif free & (free - 1) == 0:
+        implications.append(self._reason(bits, values, free.bit_length() - 1, residual))
+    return implications
@@ -1,5 +1,8 @@
 from __future__ import annotations
-from typing import Dict, List, Optional, Tuple, TextIO, TYPE_CHECKING
+from typing import Dict, Iterator, List, Tuple, TextIO, TYPE_CHECKING
+import io
+
+from encoder import MAX_1_ENCODINGS
 
 if TYPE_CHECKING:
   # Type of the sign of a logical literal
@@ -15,22 +18,87 @@ if TYPE_CHECKING:
   # Type of a CNF formula, a list of clauses
   Formula = List[Clause]
 
-def negate(lit: Literal):
-  """Negates a logical literal
-  :param lit: a logical literal
-  :returns: the negation of the literal lit
+def read_preamble(file_object: TextIO) -> Tuple[List[int], List[List[int]]]:
+  """Reads the preamble of a Bayes network in .uai format, leaving `file_object` at the start of the function tables
+  :returns: the cardinalities and the factors of the network, as in the attributes of `BayesGraph`
+  """
+  graph_type = file_object.readline()
+  if graph_type != "BAYES\n":
+    raise Exception("File does not contain a Bayes network in .uai format")
+  num_vars = file_object.readline()
+  cardinalities = [ int(n) for n in file_object.readline().split() ]
+  num_factors = int(file_object.readline())
+  # handle factors in preamble
+  factors: List[List[int]] = []
+  for i in range(num_factors):
+    factor_description = [ int(n) for n in file_object.readline().split() ]
+    if factor_description[0] != len(factor_description) - 1:
+      raise Exception("Number given for number of variables for factor does not match number of variables given for factor")
+    factors.append(factor_description[1:])
+  return cardinalities, factors
+
+def read_tokens(file_object: TextIO, chunk_size: int = 1 << 16) -> Iterator[str]:
+  """Reads the whitespace-separated tokens of a file in chunks of `chunk_size` characters, since a function table may be on a single line
+  """
+  partial = ""
+  while True:
+    chunk = file_object.read(chunk_size)
+    if not chunk:
+      break
+    tokens = (partial + chunk).split()
+    # the last token may continue in the next chunk
+    partial = tokens.pop() if tokens and not chunk[-1].isspace() else ""
+    yield from tokens
+  if partial:
+    yield partial
+
+def read_table(cardinalities: List[int], factor: List[int], tokens: Iterator[str]) -> Iterator[Tuple[Tuple[int, ...], str]]:
+  """Reads the function table of a factor from the tokens of a .uai file
+  :returns: an iterator over the assignments to the local random variables of the factor, in lexicographic order, each with its probability as a string
+  """
+  num_entries = int(next(tokens))
+  # iterate through each assignment to local random variables
+  assignment = [0 for i in factor]
+  in_range = True
+  while in_range:
+    # and yield that assignment with its probability
+    yield tuple(assignment), next(tokens)
+    # then update the assignment to the next iterand
+    in_range = False
+    for j in range(len(assignment) -1, -1, -1):
+      if assignment[j] < cardinalities[factor[j]] - 1:
+        assignment[j] += 1
+        in_range = True
+        break
+      else:
+        assignment[j] = 0
+
+def indicator_offsets(cardinalities: List[int]) -> List[int]:
+  """Note that in our representation, the indicator variable that the random variable i is set to its jth value is the nth indicator variable where n is the sum of the cardinalities of all the random variables before i, then added to j.
+  :returns: a list whose element at index i is the indicator variable that the random variable i is set to its 0th value
+  """
+  offsets = [0]
+  for cardinality in cardinalities:
+    offsets.append(offsets[-1] + cardinality)
+  offsets.pop()
+  return offsets
+
+def clause_to_dimacs(clause: Clause) -> str:
+  """Formats a clause as a line in DIMACS format, writing the logical variable i as the DIMACS variable i + 1
   """
-  return (1 - lit[0], lit[1])
+  return " ".join([ ("" if sign else "-") + str(var + 1) for sign, var in clause ]) + " 0\n"
 
-def max_1(lits: List[Literal]):
-  """Generates a CNF that is satisfied exactly when at most one literal in the list is satisfied
-  :param lits: a list of literals
-  :returns: a CNF that is satisfied exactly when at most one literal in the list is satisfied
+def evidence_to_formula(cardinalities: List[int], file_object: TextIO) -> Formula:
+  """Creates a CNF representing evidence (i.e. observed vertices and their values) on a graph with the given cardinalities from a .uai.evid file representation
+  :returns: a CNF representing evidence
   """
+  evidence_description = [ int(i) for i in file_object.read().split()]
+  if evidence_description[0] != (len(evidence_description) - 1) / 2:
+    raise Exception("evidence file is improperly formatted")
+  indicators_map = indicator_offsets(cardinalities)
   cnf: Formula = []
-  for i in range(len(lits)):
-    for j in range(i + 1, len(lits)):
-      cnf.append([negate(lits[i]), negate(lits[j])])
+  for i in range(1, len(evidence_description), 2):
+    cnf.append([(1, indicators_map[evidence_description[i]] + evidence_description[i + 1])])
   return cnf
 
 class BayesGraph:
@@ -44,54 +112,23 @@ class BayesGraph:
   def __init__(self: BayesGraph, file_object: TextIO):
     """Initialize a BayesGraph object from an input file in .uai format
     """
-    graph_type = file_object.readline()
-    if graph_type != "BAYES\n":
-      raise Exception("File does not contain a Bayes network in .uai format")
-    num_vars = file_object.readline()
-    self.cardinalities = [ int(n) for n in file_object.readline().split() ]
-    num_factors = int(file_object.readline())
-    # handle factors in preamble
-    self.factors: List[List[int]] = []
-    for i in range(num_factors):
-      factor_description = [ int(n) for n in file_object.readline().split() ]
-      if factor_description[0] != len(factor_description) - 1:
-        raise Exception("Number given for number of variables for factor does not match number of variables given for factor")
-      self.factors.append(factor_description[1:])
+    self.cardinalities, self.factors = read_preamble(file_object)
     # handle function tables
-    ft_description = file_object.read().split()
-    self.tables: List[Dict[Tuple, str]] = []
-    i = 0
-    # for each factor
-    for factor_i in range(num_factors):
-      table: Dict[Tuple, str] = {}
-      num_entries = int(ft_description[i])
-      i += 1
-      # iterate through each assignment to local random variables
-      assignment = [0 for i in self.factors[factor_i]]
-      in_range = True
-      while in_range:
-        # and record that assignment with its probability in the map
-        table[tuple(assignment)] = ft_description[i]
-        i += 1
-        # then update the assignment to the next iterand
-        in_range = False
-        for j in range(len(assignment) -1, -1, -1):
-          if assignment[j] < self.cardinalities[self.factors[factor_i][j]] - 1:
-            assignment[j] += 1
-            in_range = True
-            break
-          else:
-            assignment[j] = 0
-      self.tables.append(table)
-
-    self._memo_to_formula: Optional[Tuple[List[str], Formula]] = None
-
-  def to_formula(self: BayesGraph) -> Tuple[List[str], Formula]:
+    tokens = read_tokens(file_object)
+    self.tables: List[Dict[Tuple, str]] = [ dict(read_table(self.cardinalities, factor, tokens)) for factor in self.factors ]
+
+    # memoized results of `to_formula`, by its arguments
+    self._memo_to_formula: Dict[Tuple[str, bool], Tuple[List[str], Formula]] = {}
+
+  def to_formula(self: BayesGraph, encoding: str = "pairwise", deterministic: bool = False) -> Tuple[List[str], Formula]:
     """Maps the graph represented by this object to a CNF encoding thereof, with weights
+    :param encoding: the name of the at-most-one encoding in `MAX_1_ENCODINGS` that constrains the indicator variables of each random variable. Auxiliary variables of the encoding are numbered after the parameter variables, have weight 1.0, and are determined by the indicator variables.
+    :param deterministic: whether parameters with a local probability of 0 or 1 are encoded without a parameter variable. The assignment of a parameter of probability 0 is excluded by a clause, and that of a parameter of probability 1 does not contribute to the weight of a model. Since the parameters of a factor are then no longer exhaustive, every random variable is constrained to take at least one value, and each remaining parameter variable is made equivalent to the assignment of its local random variables.
     :returns: A tuple containing the weights, followed the CNF. The weights are a list of strings representing floats, where the float at index i is the weight-contribution of the literal of the unnegated logical variable i to the models that satisfy that literal. We omit the weights-contributions of negative literals since they all contribute the multiplicative identity (i.e. 1.0) in our representation. The CNF is a list of clauses, where each clause is a list of literals, where each literal is a tuple of two elements; the zeroth is a sign in either a 0 or 1; with 0 representing a negative literal and 1 a positive literal; the first is an integer representing the variable of the literal.
     """
-    if self._memo_to_formula is not None:
-      return self._memo_to_formula
+    if (encoding, deterministic) in self._memo_to_formula:
+      return self._memo_to_formula[(encoding, deterministic)]
+    max_1_encoding = MAX_1_ENCODINGS[encoding]
     cnf: Formula = []
     # a list of the indicator random variables for the CNF. An indicator random variable is created for each assignment of a random variable to one of its values, for each random variable in the graph.
     indicators: List[Tuple[int, int]] = [ (g_var, g_val) for g_var in range(len(self.cardinalities)) for g_val in range(self.cardinalities[g_var]) ]
@@ -99,53 +136,159 @@ class BayesGraph:
     indicators_map = { indicators[i]: i for i in range(len(indicators)) }
     # we initialize the weights with the weights of the indicator variables, which all have multiplicative identity.
     weights = [ '1.0' for _ in indicators ]
-    # indicator exclusion constraints; a.k.a. variable assignment constraints
-    for var in range(len(self.cardinalities)):
-      cnf.extend(max_1([ (1, indicators_map[(var, val)]) for val in range(self.cardinalities[var]) ]))
-    # a list of parameter variables. A parameter variable is created for each entry in the function table of a vertex, for each vertex of the graph.
-    parameters = list((i, v, self.tables[i][v]) for i in range(len(self.factors)) for v in sorted(self.tables[i].keys()))
+    # a list of parameter variables. A parameter variable is created for each entry in the function table of a vertex, for each vertex of the graph; unless it is deterministic and deterministic parameters are encoded as clauses.
+    parameters = list((i, v, self.tables[i][v]) for i in range(len(self.factors)) for v in sorted(self.tables[i].keys()) if not deterministic or float(self.tables[i][v]) not in (0.0, 1.0))
     # a reverse map of the parameters list
     parameters_map = { parameters[i]: i + len(indicators_map) for i in range(len(parameters)) }
     # we append the parameter variables' weights; which are exactly the local probabilities in the respective function table entries corresponding to the parameters.
     weights.extend([ parameter[2] for parameter in parameters ])
-    # parameter at-least-one constraints
-    for i in range(len(self.factors)):
-      params_in_factor = [ (i, assignment, self.tables[i][assignment]) for assignment in sorted(self.tables[i].keys()) ]
-      cnf.append([ (1, parameters_map[param]) for param in params_in_factor ])
+    # indicator exclusion constraints; a.k.a. variable assignment constraints
+    next_var = len(weights)
+    for var in range(len(self.cardinalities)):
+      var_cnf, next_var = max_1_encoding([ (1, indicators_map[(var, val)]) for val in range(self.cardinalities[var]) ], next_var)
+      cnf.extend(var_cnf)
+    # the auxiliary variables of the at-most-one encoding have multiplicative identity.
+    weights.extend([ '1.0' for _ in range(len(weights), next_var) ])
+    if deterministic:
+      # indicator at-least-one constraints
+      for var in range(len(self.cardinalities)):
+        cnf.append([ (1, indicators_map[(var, val)]) for val in range(self.cardinalities[var]) ])
+      # assignment implies parameter constraints; or excludes the assignment of a parameter of probability 0
+      for i in range(len(self.factors)):
+        for assignment in sorted(self.tables[i].keys()):
+          negated_indicators = [ (0, indicators_map[(self.factors[i][var], assignment[var])]) for var in range(len(assignment)) ]
+          parameter = (i, assignment, self.tables[i][assignment])
+          if parameter in parameters_map:
+            cnf.append(negated_indicators + [(1, parameters_map[parameter])])
+          elif float(parameter[2]) == 0.0:
+            cnf.append(negated_indicators)
+    else:
+      # parameter at-least-one constraints
+      for i in range(len(self.factors)):
+        params_in_factor = [ (i, assignment, self.tables[i][assignment]) for assignment in sorted(self.tables[i].keys()) ]
+        cnf.append([ (1, parameters_map[param]) for param in params_in_factor ])
     # parameter implies assignment constraints
     for parameter in parameters:
       for var in range(len(parameter[1])):
         indicator = indicators_map[(self.factors[parameter[0]][var], parameter[1][var])]
         cnf.append([(0, parameters_map[parameter]), (1, indicator)])
-    self._memo_to_formula = (weights, cnf)
+    self._memo_to_formula[(encoding, deterministic)] = (weights, cnf)
     return weights, cnf
 
   def evidence_to_formula(self: BayesGraph, file_object: TextIO):
     """Creates a CNF representing evidence (i.e. observed vertices and their values) on the graph from a .uai.evid file representation. Note that in our representation, the indicator variable that the random variable i is set to its jth value is the nth indicator variable where n is the sum of the cardinalities of all the random variables before i, then added to j.
     :returns: a CNF representing evidence
     """
-    evidence_description = [ int(i) for i in file_object.read().split()]
-    if evidence_description[0] != (len(evidence_description) - 1) / 2:
-      raise Exception("evidence file is improperly formatted")
-    indicators_map = [0]
-    for cardinality in self.cardinalities:
-      indicators_map.append(indicators_map[-1] + cardinality)
-    indicators_map.pop()
-    cnf: Formula = []
-    i = 0
-    for i in range(1, len(evidence_description), 2):
-      cnf.append([(1, indicators_map[evidence_description[i]] + evidence_description[i + 1])])
-    return cnf
+    return evidence_to_formula(self.cardinalities, file_object)
 
-  def to_formula_file_with_evidence(self: BayesGraph, evidence: TextIO, ffile: TextIO, wfile: TextIO):
-    """Write a CNF encoding of the graph represented by this object to a file in DIMACS format, together with an associated weights file.
+  def to_formula_file_with_evidence(self: BayesGraph, evidence: TextIO, ffile: TextIO, wfile: TextIO, encoding: str = "pairwise", deterministic: bool = False):
+    """Write a CNF encoding of the graph represented by this object to a file in DIMACS format, together with an associated weights file. Since DIMACS reserves 0 as the clause terminator, the logical variable i of the encoding is written as the DIMACS variable i + 1. `encoding` and `deterministic` are as in `to_formula`.
     """
-    weights, cnf = self.to_formula()
-    cnf.extend(self.evidence_to_formula(evidence))
+    weights, cnf = self.to_formula(encoding, deterministic)
+    cnf = cnf + self.evidence_to_formula(evidence)
     ffile.write("p cnf {} {}\n".format(len(weights), len(cnf)))
     for clause in cnf:
-      clause_str = " ".join([ ("" if sign else "-") + str(var) for sign, var in clause ]) + " 0\n"
-      ffile.write(clause_str)
+      ffile.write(clause_to_dimacs(clause))
     wfile.write("p {}\n".format(len(weights)))
     for i in range(len(weights)):
-      wfile.write("w {} {} 0\nw -{} 1.0 0\n".format(i, weights[i], i))
+      wfile.write("w {} {} 0\nw -{} 1.0 0\n".format(i + 1, weights[i], i + 1))
+
+class StreamingBayesGraph:
+  """A Bayes Net in .uai format whose CNF encoding is written while its function tables are read
+
+  Only the preamble of the network is kept in memory; each entry of a
+  function table is encoded and written as soon as it is read, so that
+  memory does not grow with the size of the tables. The encoding, its
+  variable numbering and its weights are those of
+  `BayesGraph.to_formula_file_with_evidence`, with the clauses in a
+  different order.
+
+  The tables can only be read once, so the encoding can only be written once.
+
+  :param cardinalities: as in `BayesGraph`
+  :param factors: as in `BayesGraph`
+  """
+
+  # width reserved for each count in the problem lines, which are only known once everything is written
+  COUNT_WIDTH = 20
+
+  def __init__(self: StreamingBayesGraph, file_object: TextIO):
+    """Initialize a StreamingBayesGraph object from the preamble of an input file in .uai format
+    """
+    self.cardinalities, self.factors = read_preamble(file_object)
+    self._file_object = file_object
+
+  def to_formula_file_with_evidence(self: StreamingBayesGraph, evidence: TextIO, ffile: TextIO, wfile: TextIO, encoding: str = "pairwise", deterministic: bool = False):
+    """Write a CNF encoding of the graph to a file in DIMACS format, together with an associated weights file, as in `BayesGraph.to_formula_file_with_evidence`
+
+    The problem lines are written with padded placeholder counts that are
+    overwritten at the end, so `ffile` and `wfile` must be seekable.
+    """
+    max_1_encoding = MAX_1_ENCODINGS[encoding]
+    offsets = indicator_offsets(self.cardinalities)
+    num_indicators = sum(self.cardinalities)
+    num_clauses = 0
+    ffile.write(self._problem_line("p cnf", 0, 0))
+    wfile.write(self._problem_line("p", 0))
+
+    def write_clause(clause: Clause):
+      nonlocal num_clauses
+      ffile.write(clause_to_dimacs(clause))
+      num_clauses += 1
+
+    def write_weight(var: Variable, weight: str):
+      wfile.write("w {} {} 0\nw -{} 1.0 0\n".format(var + 1, weight, var + 1))
+
+    # the indicator variables, which all have multiplicative identity
+    for var in range(num_indicators):
+      write_weight(var, '1.0')
+    # the parameter variables, in the order of the entries of the function tables
+    next_var = num_indicators
+    tokens = read_tokens(self._file_object)
+    for factor in self.factors:
+      first_param = next_var
+      for assignment, probability in read_table(self.cardinalities, factor, tokens):
+        indicators = [ offsets[factor[var]] + assignment[var] for var in range(len(assignment)) ]
+        if deterministic and float(probability) in (0.0, 1.0):
+          # exclude the assignment of a parameter of probability 0
+          if float(probability) == 0.0:
+            write_clause([ (0, indicator) for indicator in indicators ])
+          continue
+        param = next_var
+        next_var += 1
+        write_weight(param, probability)
+        # parameter implies assignment constraints
+        for indicator in indicators:
+          write_clause([(0, param), (1, indicator)])
+        # assignment implies parameter constraints
+        if deterministic:
+          write_clause([ (0, indicator) for indicator in indicators ] + [(1, param)])
+      # parameter at-least-one constraints, which are as long as the table and are written literal by literal
+      if not deterministic:
+        for param in range(first_param, next_var):
+          ffile.write("{} ".format(param + 1))
+        ffile.write("0\n")
+        num_clauses += 1
+    # indicator exclusion constraints, whose auxiliary variables have multiplicative identity
+    for var in range(len(self.cardinalities)):
+      first_aux = next_var
+      var_cnf, next_var = max_1_encoding([ (1, offsets[var] + val) for val in range(self.cardinalities[var]) ], next_var)
+      for clause in var_cnf:
+        write_clause(clause)
+      for aux in range(first_aux, next_var):
+        write_weight(aux, '1.0')
+      # indicator at-least-one constraints
+      if deterministic:
+        write_clause([ (1, offsets[var] + val) for val in range(self.cardinalities[var]) ])
+    for clause in evidence_to_formula(self.cardinalities, evidence):
+      write_clause(clause)
+
+    ffile.seek(0)
+    ffile.write(self._problem_line("p cnf", next_var, num_clauses))
+    wfile.seek(0)
+    wfile.write(self._problem_line("p", next_var))
+    ffile.seek(0, io.SEEK_END)
+    wfile.seek(0, io.SEEK_END)
+
+  def _problem_line(self: StreamingBayesGraph, prefix: str, *counts: int) -> str:
+    return " ".join([prefix] + [ str(count).rjust(StreamingBayesGraph.COUNT_WIDTH) for count in counts ]) + "\n"
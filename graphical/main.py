@@ -1,12 +1,30 @@
+import os
 import sys
 
-from bayes_graph import BayesGraph
+# `bayes_graph` imports the at-most-one encodings from the encoder at the root of the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bayes_graph import BayesGraph, MAX_1_ENCODINGS, StreamingBayesGraph
 
 if __name__ == "__main__":
-  if len(sys.argv) != 5:
-    print("Usage: python main.py path/to/graph_in.uai path/to/evidence_in.uai path/to/formula_out.cnf path/to/weights_out.weights")
+  options = [ arg for arg in sys.argv[1:] if arg.startswith("--") ]
+  args = [ arg for arg in sys.argv[1:] if not arg.startswith("--") ]
+  encoding = "pairwise"
+  deterministic = False
+  stream = False
+  for option in options:
+    if option.startswith("--encoding=") and option[len("--encoding="):] in MAX_1_ENCODINGS:
+      encoding = option[len("--encoding="):]
+    elif option == "--deterministic":
+      deterministic = True
+    elif option == "--stream":
+      stream = True
+    else:
+      args = []
+  if len(args) != 4:
+    print("Usage: python main.py [--encoding={}] [--deterministic] [--stream] path/to/graph_in.uai path/to/evidence_in.uai path/to/formula_out.cnf path/to/weights_out.weights".format("|".join(MAX_1_ENCODINGS)))
     sys.exit(0)
-  _, graph_file, evidence_file, formula_file, weights_file = sys.argv
+  graph_file, evidence_file, formula_file, weights_file = args
   with open(graph_file) as gfile, open(evidence_file) as efile, open(formula_file, 'w') as ffile, open(weights_file, 'w') as wfile:
-    graph = BayesGraph(gfile)
-    graph.to_formula_file_with_evidence(efile, ffile, wfile)
\ No newline at end of file
+    graph = StreamingBayesGraph(gfile) if stream else BayesGraph(gfile)
+    graph.to_formula_file_with_evidence(efile, ffile, wfile, encoding, deterministic)
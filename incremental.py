@@ -0,0 +1,139 @@
+from __future__ import annotations
+from typing import Dict, List, Optional, Set, TYPE_CHECKING
+
+import cdcl
+from propagating_formula import PropagatingFormula
+from vsids_brancher import VSIDSBrancher
+
+if TYPE_CHECKING:
+  from shared_types import Literal, Value, Variable
+  from budget import Budget, SolverStats
+  from propagating_formula import State
+
+  RawClause = List[Literal]
+  Model = Dict[Variable, Value]
+
+UNSATISFIED: State = PropagatingFormula.UNSATISFIED
+SATISFIABLE: State = PropagatingFormula.SATISFIED
+UNKNOWN: State = cdcl.UNKNOWN
+
+class IncrementalSolver:
+  """A CDCL solver that takes clauses and fresh variables between solves, and solves under assumptions
+
+  Every solve is made by `cdcl_budgeted` on the same `PropagatingFormula`
+  and brancher, so the clauses learned by one solve are kept for the
+  next. Clauses are added at decision level 0.
+
+  Assumptions are decided before any other variable, in order. An
+  assumption is therefore only falsified by the assumptions decided
+  before it, and the reasons for its negation lead back to the decisions
+  of some of them; those assumptions, with the falsified one, form the
+  core of the solve, a subset of the assumptions that is unsatisfiable
+  together with the clauses.
+
+  A unit clause of a variable that is fixed true is added first, so that
+  the formula is never empty, which `Formula` does not allow mutating.
+
+  :param formula: the formula of all clauses added
+  :param brancher: the brancher shared by all solves
+  :param num_vars: the largest variable
+  :param core: the core of the last solve, if it was unsatisfiable under its assumptions
+  :param model: the model found by the last solve, if it was satisfiable
+  :param solve_count: the number of solves made
+  :param stats: the work done by the last solve
+  :param chrono_threshold: passed on to `cdcl_budgeted` by every solve
+  :param trail_saving: passed on to `cdcl_budgeted` by every solve
+  """
+
+  def __init__(self: IncrementalSolver, clauses: List[RawClause], num_vars: int = 0, chrono_threshold: Optional[int] = None, trail_saving: bool = False) -> None:
+    clauses = [ clause for clause in clauses if not _tautological(clause) ]
+    variables: Set[Variable] = { abs(l) for clause in clauses for l in clause }
+    self.num_vars = max(max(variables, default=0), num_vars) + 1
+    self.true_variable: Variable = self.num_vars
+    # the negation of the variable that is fixed true is an empty clause
+    clauses = [ clause if clause else [-self.true_variable] for clause in clauses ] + [[self.true_variable]]
+    self.formula = PropagatingFormula.from_clauses(clauses)
+    self.brancher = VSIDSBrancher.create(self.formula)
+    # variables in no clause are only registered so that they can be assumed
+    self._register(set(range(1, self.num_vars + 1)) - variables - {self.true_variable})
+    self.core: Optional[List[Literal]] = None
+    self.model: Optional[Model] = None
+    self.solve_count = 0
+    self.stats: Optional[SolverStats] = None
+    self.chrono_threshold = chrono_threshold
+    self.trail_saving = trail_saving
+
+  def _register(self: IncrementalSolver, variables: Set[Variable]) -> None:
+    self.formula.formula.add_variables(variables)
+    for v in variables:
+      self.brancher.scores.setdefault(v, 0)
+      self.brancher.sign.setdefault(v, 1)
+
+  def new_var(self: IncrementalSolver) -> Variable:
+    self.num_vars += 1
+    self._register({self.num_vars})
+    return self.num_vars
+
+  def add_clause(self: IncrementalSolver, clause: RawClause) -> None:
+    """Adds a clause, whose variables are at most `num_vars`
+    """
+    if _tautological(clause):
+      return
+    clause = list(dict.fromkeys(clause))
+    self.formula.backtrack(0)
+    if not clause:
+      # the negation of the variable that is fixed true is an empty clause
+      clause = [-self.true_variable]
+    self.formula.add_clause(clause)
+
+  def solve(self: IncrementalSolver, assumptions: List[Literal] = [], budget: Optional[Budget] = None) -> State:
+    """Decides the satisfiability of the clauses under `assumptions`, with `cdcl_budgeted`
+
+    Sets `model` if they are satisfiable, and `core` if they are not; the
+    core is empty if the clauses are unsatisfiable by themselves. Neither
+    is set if `budget` runs out first, and `UNKNOWN` is returned.
+    """
+    self.solve_count += 1
+    self.core = None
+    self.model = None
+    formula = self.formula
+    assignment = formula.get_partial_assignment()
+    formula.backtrack(0)
+    state, self.stats = cdcl.cdcl_budgeted(formula, budget, lambda _: self.brancher, chrono_threshold=self.chrono_threshold, trail_saving=self.trail_saving, assumptions=assumptions)
+    if state == SATISFIABLE:
+      self.model = { v: item[2] for v, item in assignment.current.items() }
+    elif state == UNSATISFIED:
+      if formula.get_current_state() == PropagatingFormula.UNSATISFIED:
+        self.core = []
+      else:
+        failed = next(l for l in assumptions if abs(l) in assignment and assignment.get_value(abs(l)) != (1 if l > 0 else 0))
+        self.core = self._core(failed)
+    return state
+
+  def _core(self: IncrementalSolver, failed: Literal) -> List[Literal]:
+    """The assumptions that were decided, and lead to the negation of the assumption `failed`, with `failed`
+    """
+    assignment = self.formula.get_partial_assignment()
+    core: List[Literal] = [failed]
+    seen: Set[Variable] = set()
+    queue: List[Variable] = [abs(failed)]
+    while queue:
+      variable = queue.pop()
+      if variable in seen:
+        continue
+      seen.add(variable)
+      item = assignment.get(variable)
+      if item is None or item[0] == 0:
+        continue
+      antecedent = item[3]
+      if antecedent is None:
+        # the decisions made before `failed` are all assumptions
+        literal = variable if item[2] == 1 else -variable
+        if literal != failed:
+          core.append(literal)
+        continue
+      queue.extend([ v for v in antecedent.get_assigned_vars(assignment) if v != variable ])
+    return core
+
+def _tautological(clause: RawClause) -> bool:
+  return any(-l in clause for l in clause)
@@ -0,0 +1,268 @@
+from __future__ import annotations
+from typing import Callable, Dict, List, Optional, Tuple, TYPE_CHECKING
+import random
+import sys
+
+import cdcl
+from budget import SolverStats
+from propagating_formula import PropagatingFormula
+from random_brancher import RandomBrancher
+
+if TYPE_CHECKING:
+  from shared_types import Literal, Value, Variable
+  from brancher import Brancher
+  from budget import Budget
+  from propagating_formula import State
+
+  ClauseIndex = int
+  Model = Dict[Variable, Value]
+
+WALKSAT = "walksat"
+PROBSAT = "probsat"
+
+class LocalSearch:
+  """A stochastic local search over a complete assignment that flips one variable at a time
+
+  The clauses are stored in a flat arena: the literals of clause c are
+  `literals[starts[c]:starts[c + 1]]`. For each clause, the number of
+  its true literals and the sum of the variables of its true literals
+  are maintained, so that when exactly one literal is true, its variable
+  is known without scanning the clause. The break count of a variable,
+  the number of clauses that flipping it would falsify, is the number of
+  clauses in which it is that single true variable, and is maintained
+  on every flip for every variable. The falsified clauses are kept in a
+  list, with the position of each in the list, so that a clause is added
+  or removed in constant time.
+
+  Each step picks a falsified clause uniformly at random and flips one of
+  its variables:
+
+  - "walksat" (WalkSAT/SKC) flips a variable whose break count is 0 if
+    there is one, otherwise a random variable of the clause with
+    probability `noise`, and otherwise one with the least break count;
+  - "probsat" flips a variable with probability proportional to
+    `(eps + break count) ** -cb`.
+
+  :param num_vars: the largest variable; variables are 1 to `num_vars`
+  :param values: a list whose element at index v is the value of variable v
+  :param true_counts: a list whose element at index c is the number of true literals of clause c
+  :param true_sums: a list whose element at index c is the sum of the variables of the true literals of clause c
+  :param break_counts: a list whose element at index v is the break count of variable v
+  :param unsat: the falsified clauses
+  :param unsat_positions: a list whose element at index c is the index of clause c in `unsat`, if it is falsified
+  :param best_values: the values of the assignment that falsified the fewest clauses so far
+  :param best_unsat_count: the number of clauses falsified by `best_values`
+  :param flips: the number of flips made so far
+  """
+
+  def __init__(self: LocalSearch, clauses: List[List[Literal]], num_vars: int, algorithm: str = PROBSAT, noise: float = 0.567, cb: float = 2.3, eps: float = 1.0, rng: Optional[random.Random] = None) -> None:
+    if algorithm not in (WALKSAT, PROBSAT):
+      raise Exception("unknown local search algorithm {}".format(algorithm))
+    self.algorithm = algorithm
+    self.noise = noise
+    self.cb = cb
+    self.eps = eps
+    self.rng = rng if rng is not None else random.Random()
+    self.num_vars = num_vars
+    self.literals: List[Literal] = []
+    self.starts: List[int] = [0]
+    # clauses containing the literal v are at index 2v and those containing -v at index 2v + 1
+    self.occurrences: List[List[ClauseIndex]] = [ [] for _ in range(2 * num_vars + 2) ]
+    for clause in clauses:
+      for l in clause:
+        self.occurrences[_literal_index(l)].append(len(self.starts) - 1)
+      self.literals.extend(clause)
+      self.starts.append(len(self.literals))
+    self.values: List[Value] = [ 0 for _ in range(num_vars + 1) ]
+    self.true_counts: List[int] = []
+    self.true_sums: List[int] = []
+    self.break_counts: List[int] = []
+    self.unsat: List[ClauseIndex] = []
+    self.unsat_positions: List[int] = []
+    self.best_values: List[Value] = list(self.values)
+    self.best_unsat_count = len(clauses) + 1
+    self.flips = 0
+    # probabilities of flipping a variable by its break count, for "probsat"
+    self._break_weights: List[float] = [ (eps + b) ** -cb for b in range(64) ]
+
+  def num_clauses(self: LocalSearch) -> int:
+    return len(self.starts) - 1
+
+  def reset(self: LocalSearch, values: Optional[Model] = None) -> None:
+    """Starts from the assignment `values`, with the variables missing from it drawn at random
+    """
+    for v in range(1, self.num_vars + 1):
+      value = values.get(v) if values is not None else None
+      self.values[v] = value if value is not None else self.rng.randrange(2)
+    self.true_counts = [ 0 for _ in range(self.num_clauses()) ]
+    self.true_sums = [ 0 for _ in range(self.num_clauses()) ]
+    self.break_counts = [ 0 for _ in range(self.num_vars + 1) ]
+    self.unsat = []
+    self.unsat_positions = [ -1 for _ in range(self.num_clauses()) ]
+    for c in range(self.num_clauses()):
+      for l in self.literals[self.starts[c]:self.starts[c + 1]]:
+        if self.values[abs(l)] == (1 if l > 0 else 0):
+          self.true_counts[c] += 1
+          self.true_sums[c] += abs(l)
+      if self.true_counts[c] == 0:
+        self._add_unsat(c)
+      elif self.true_counts[c] == 1:
+        self.break_counts[self.true_sums[c]] += 1
+    self._record_best()
+
+  def _add_unsat(self: LocalSearch, c: ClauseIndex) -> None:
+    self.unsat_positions[c] = len(self.unsat)
+    self.unsat.append(c)
+
+  def _remove_unsat(self: LocalSearch, c: ClauseIndex) -> None:
+    # move the last falsified clause into the place of `c`
+    position = self.unsat_positions[c]
+    last = self.unsat.pop()
+    if last != c:
+      self.unsat[position] = last
+      self.unsat_positions[last] = position
+    self.unsat_positions[c] = -1
+
+  def _record_best(self: LocalSearch) -> None:
+    if len(self.unsat) < self.best_unsat_count:
+      self.best_unsat_count = len(self.unsat)
+      self.best_values = list(self.values)
+
+  def flip(self: LocalSearch, v: Variable) -> None:
+    falsified = v if self.values[v] == 1 else -v
+    self.values[v] = 1 - self.values[v]
+    self.flips += 1
+    for c in self.occurrences[_literal_index(falsified)]:
+      self.true_counts[c] -= 1
+      self.true_sums[c] -= v
+      if self.true_counts[c] == 0:
+        self.break_counts[v] -= 1
+        self._add_unsat(c)
+      elif self.true_counts[c] == 1:
+        self.break_counts[self.true_sums[c]] += 1
+    for c in self.occurrences[_literal_index(-falsified)]:
+      self.true_counts[c] += 1
+      self.true_sums[c] += v
+      if self.true_counts[c] == 1:
+        self.break_counts[v] += 1
+        self._remove_unsat(c)
+      elif self.true_counts[c] == 2:
+        self.break_counts[self.true_sums[c] - v] -= 1
+
+  def _pick(self: LocalSearch, c: ClauseIndex) -> Variable:
+    variables = [ abs(l) for l in self.literals[self.starts[c]:self.starts[c + 1]] ]
+    if self.algorithm == WALKSAT:
+      breaks = [ self.break_counts[v] for v in variables ]
+      least = min(breaks)
+      if least > 0 and self.rng.random() < self.noise:
+        return self.rng.choice(variables)
+      return self.rng.choice([ v for v, b in zip(variables, breaks) if b == least ])
+    weights = [ self._break_weight(self.break_counts[v]) for v in variables ]
+    threshold = self.rng.random() * sum(weights)
+    for v, weight in zip(variables, weights):
+      threshold -= weight
+      if threshold <= 0:
+        return v
+    return variables[-1]
+
+  def _break_weight(self: LocalSearch, b: int) -> float:
+    if b < len(self._break_weights):
+      return self._break_weights[b]
+    return (self.eps + b) ** -self.cb
+
+  def search(self: LocalSearch, max_flips: int, stop: Optional[Callable[[], bool]] = None) -> bool:
+    """Flips variables from the current assignment until no clause is falsified or `max_flips` flips are made
+
+    :param stop: called before every flip, to end the search early when it returns True
+    :returns: whether a satisfying assignment was found, which is then in `values`
+    """
+    for _ in range(max_flips):
+      if not self.unsat:
+        return True
+      if stop is not None and stop():
+        return False
+      self.flip(self._pick(self.unsat[self.rng.randrange(len(self.unsat))]))
+      self._record_best()
+    return not self.unsat
+
+  def solve(self: LocalSearch, max_flips: int, max_tries: int = 1, values: Optional[Model] = None, stop: Optional[Callable[[], bool]] = None) -> Optional[Model]:
+    """Searches from `max_tries` assignments, the first of which extends `values`
+
+    :param stop: passed on to `search`, and no other try is made once it returns True
+    :returns: a satisfying assignment, if one was found
+    """
+    for i in range(max_tries):
+      self.reset(values if i == 0 else None)
+      if self.search(max_flips, stop):
+        return self.model()
+      if stop is not None and stop():
+        break
+    return None
+
+  def model(self: LocalSearch) -> Model:
+    return { v: self.values[v] for v in range(1, self.num_vars + 1) }
+
+  def best_model(self: LocalSearch) -> Model:
+    """The assignment that falsified the fewest clauses so far
+    """
+    return { v: self.best_values[v] for v in range(1, self.num_vars + 1) }
+
+def _literal_index(l: Literal) -> int:
+  return 2 * l if l > 0 else -2 * l + 1
+
+def from_formula(formula: PropagatingFormula, **kwargs) -> Tuple[LocalSearch, Model]:
+  """Creates a `LocalSearch` over the clauses of `formula`
+
+  :returns: the search, followed by the assignment of `formula`, which
+    a search should start from since it holds at every model
+  """
+  assignment = formula.get_partial_assignment()
+  variables = set(assignment.current) | assignment.get_unassigned()
+  search = LocalSearch([ clause.clause for clause in formula.formula.formula ], max(variables, default=0), **kwargs)
+  return search, { v: item[2] for v, item in assignment.current.items() }
+
+def cdcl_with_local_search(formula: PropagatingFormula, max_flips: int = 100000, max_tries: int = 1, create_brancher: Callable[[PropagatingFormula], Brancher] = RandomBrancher.create, rng: Optional[random.Random] = None, budget: Optional[Budget] = None) -> Tuple[State, SolverStats]:
+  """Decides the satisfiability of `formula` with a local search first, then `cdcl.cdcl_budgeted`
+
+  The brancher's phases are seeded with the assignment that falsified
+  the fewest clauses during the local search. If that assignment is a
+  model, every decision agrees with it and unit propagation only implies
+  its values, so no conflict is reached and the model is left on
+  `formula`.
+
+  The budget is checked before every flip as well as by
+  `cdcl.cdcl_budgeted`, and is counted from the start of the local
+  search; if it runs out during the local search, no CDCL search is made.
+
+  :param budget: the limits of the whole solve, or None for no limits
+  :returns: the state of the formula, or `UNKNOWN`, followed by the work done
+  """
+  stats = SolverStats()
+  if formula.get_current_state() != PropagatingFormula.UNRESOLVED:
+    return cdcl.cdcl_budgeted(formula, budget, create_brancher, stats=stats)
+  search, root = from_formula(formula, rng=rng)
+  stop = None if budget is None else lambda: budget.exhausted(stats) is not None
+  search.solve(max_flips, max_tries, root, stop)
+  stop_reason = budget.exhausted(stats) if budget is not None else None
+  if stop_reason is not None:
+    return cdcl.UNKNOWN, stats.finish(stop_reason)
+  phases = search.best_model()
+
+  def create_seeded_brancher(formula: PropagatingFormula) -> Brancher:
+    brancher = create_brancher(formula)
+    brancher.seed_phases(phases)
+    return brancher
+  return cdcl.cdcl_budgeted(formula, budget, create_seeded_brancher, stats=stats)
+
+if __name__ == "__main__":
+  if len(sys.argv) not in (2, 3):
+    print("Usage: python local_search.py path/to/file.cnf [max_flips]")
+    sys.exit(0)
+  with open(sys.argv[1]) as file:
+    search, root = from_formula(PropagatingFormula(file))
+  model = search.solve(int(sys.argv[2]) if len(sys.argv) == 3 else 100000, 1, root)
+  if model is None:
+    print("UNKNOWN")
+  else:
+    print("SATISFIABLE")
+    print(" ".join([ str(v if value == 1 else -v) for v, value in model.items() ]) + " 0")
@@ -0,0 +1,241 @@
+from __future__ import annotations
+from typing import Any, Callable, Dict, FrozenSet, Hashable, List, Optional, Set, Tuple, TYPE_CHECKING
+
+from brancher import Brancher
+
+if TYPE_CHECKING:
+  from shared_types import Literal, Value, Variable
+  from propagating_formula import PropagatingFormula
+  from assignment import Assignment
+
+  ClauseIndex = int
+  Values = Dict[Variable, Value]
+  # Type of a summary of an assignment under which lookaheads are evaluated
+  Fingerprint = FrozenSet[Tuple[Variable, Value]]
+  # Type of the result of a lookahead on a literal: whether it failed,
+  # the literals it implied, and the number of new binary clauses it created
+  LookaheadResult = Tuple[bool, List[Literal], int]
+
+class LookaheadBrancher(Brancher):
+  """A march-style brancher that decides on the variable whose assignment simplifies the formula the most
+
+  On every decision, candidate variables are preselected by how often
+  they occur in clauses that are not yet satisfied, with occurrences in
+  shorter clauses counting more. Each polarity of each candidate is then
+  looked ahead on: it is assigned on a copy of the assignment and unit
+  propagated over the clauses known to the brancher, and the lookahead is
+  scored by the number of clauses of more than two unassigned literals
+  that it reduces to binary clauses. The variable that maximizes the
+  product of the scores of its polarities is decided, on the polarity
+  with the lower score, which leaves the formula less constrained, or on
+  its saved phase if both polarities score the same.
+
+  A literal whose lookahead leads to a conflict is failed, and its
+  negation, which is implied by the formula, is decided instead.
+
+  The literals whose lookahead implies at least
+  `double_lookahead_trigger` literals are double looked ahead on: each
+  candidate literal is looked ahead on under the first, and if it fails
+  there, the binary clause of their negations is implied by the formula
+  and kept as a local learned clause; if both polarities of a candidate
+  fail, the first literal is failed itself. A double lookahead is performed at
+  most once per literal and assignment, and single lookaheads are cached
+  per assignment and number of clauses, so repeated evaluations under the
+  same assignment are answered from `cache`. Both are kept for the
+  `cache_size` most recent assignments.
+
+  :param clauses: the clauses of the formula, followed by learned clauses
+  :param occurrences: a map from literals to the indices of the clauses that contain them
+  :param min_candidates: the smallest number of candidates preselected
+  :param candidate_fraction: the fraction of the unassigned variables preselected, if there are more than `min_candidates` of them
+  :param double_lookahead_trigger: the number of literals that a lookahead must imply for the literal to be double looked ahead on
+  :param cache_size: the number of assignments that lookahead results are kept for
+  :param cache: a map from fingerprints of the assignment and the number of clauses, then literals, to lookahead results
+  :param double_lookahead_done: a map from fingerprints of the assignment to the literals double looked ahead on under it
+  :param failed_literal_count: the number of failed literals found by lookaheads
+  :param local_clause_count: the number of binary clauses learned by double lookaheads
+  """
+
+  @staticmethod
+  def create(formula: PropagatingFormula) -> Brancher:
+    return LookaheadBrancher(formula)
+
+  def __init__(self: LookaheadBrancher, formula: PropagatingFormula, min_candidates: int = 5, candidate_fraction: float = 0.1, double_lookahead_trigger: int = 8, cache_size: int = 64) -> None:
+    Brancher.__init__(self)
+    self.clauses: List[List[Literal]] = []
+    self.occurrences: Dict[Literal, List[ClauseIndex]] = {}
+    for clause in formula.formula.formula:
+      self._add_clause(clause.clause)
+    self.min_candidates = min_candidates
+    self.candidate_fraction = candidate_fraction
+    self.double_lookahead_trigger = double_lookahead_trigger
+    self.cache_size = cache_size
+    self.cache: Dict[Tuple[Fingerprint, int], Dict[Literal, LookaheadResult]] = {}
+    self.double_lookahead_done: Dict[Fingerprint, Set[Literal]] = {}
+    self.failed_literal_count = 0
+    self.local_clause_count = 0
+
+  def _add_clause(self: LookaheadBrancher, clause: List[Literal]) -> None:
+    index = len(self.clauses)
+    self.clauses.append(list(clause))
+    for l in clause:
+      if l not in self.occurrences:
+        self.occurrences[l] = []
+      self.occurrences[l].append(index)
+
+  def record_resolved_lit(self, lit: Literal):
+    pass
+
+  def record_learned_clause(self, clause: List[Literal]):
+    self._add_clause(clause)
+
+  def _free_count(self: LookaheadBrancher, values: Values, index: ClauseIndex) -> Optional[int]:
+    """The number of unassigned literals of a clause, or None if it is satisfied
+    """
+    count = 0
+    for l in self.clauses[index]:
+      value = values.get(abs(l))
+      if value is None:
+        count += 1
+      elif value == (1 if l > 0 else 0):
+        return None
+    return count
+
+  def _lookahead(self: LookaheadBrancher, values: Values, lit: Literal) -> LookaheadResult:
+    """Assigns `lit` on top of `values` and unit propagates, then undoes the assignments
+
+    :returns: whether a conflict was reached, the literals that were
+      assigned, and the number of clauses that were reduced to binary
+      clauses
+    """
+    trail: List[Literal] = [lit]
+    values[abs(lit)] = 1 if lit > 0 else 0
+    reduced: Set[ClauseIndex] = set()
+    failed = False
+    i = 0
+    while i < len(trail) and not failed:
+      for index in self.occurrences.get(-trail[i], ()):
+        free = self._free_count(values, index)
+        if free is None:
+          continue
+        if free == 0:
+          failed = True
+          break
+        if free == 1:
+          unit = next(l for l in self.clauses[index] if abs(l) not in values)
+          values[abs(unit)] = 1 if unit > 0 else 0
+          trail.append(unit)
+        else:
+          reduced.add(index)
+      i += 1
+
+    new_binaries = 0
+    if not failed:
+      # a reduced clause with two unassigned literals left had more before
+      for index in reduced:
+        if self._free_count(values, index) == 2:
+          new_binaries += 1
+    for l in trail:
+      del values[abs(l)]
+    return failed, trail, new_binaries
+
+  def _preselect(self: LookaheadBrancher, values: Values, unassigned: Set[Variable]) -> List[Variable]:
+    """The unassigned variables that are most often in clauses that are not satisfied, weighing shorter clauses more
+    """
+    weights: Dict[Literal, float] = {}
+    for index in range(len(self.clauses)):
+      free = self._free_count(values, index)
+      if not free:
+        continue
+      for l in self.clauses[index]:
+        if abs(l) not in values:
+          weights[l] = weights.get(l, 0) + 2.0 ** (2 - free)
+    scored = [ v for v in unassigned if v in weights or -v in weights ]
+    scored.sort(key=lambda v: _combine(weights.get(v, 0), weights.get(-v, 0)), reverse=True)
+    count = max(self.min_candidates, int(self.candidate_fraction * len(unassigned)))
+    return scored[:count]
+
+  def _double_lookahead(self: LookaheadBrancher, values: Values, lit: Literal, implied: List[Literal], candidates: List[Variable]) -> bool:
+    """Looks ahead on every candidate literal under `lit`, keeping a binary clause for each that fails
+
+    :returns: whether `lit` is failed, which is the case if both polarities of a candidate fail under it
+    """
+    for l in implied:
+      values[abs(l)] = 1 if l > 0 else 0
+    learned: List[List[Literal]] = []
+    lit_failed = False
+    for v in candidates:
+      if v in values:
+        continue
+      failures = 0
+      for l in (v, -v):
+        failed, _, _ = self._lookahead(values, l)
+        if failed:
+          learned.append([-lit, -l])
+          failures += 1
+      if failures == 2:
+        lit_failed = True
+        break
+    for l in implied:
+      del values[abs(l)]
+    for clause in learned:
+      self._add_clause(clause)
+    self.local_clause_count += len(learned)
+    return lit_failed
+
+  def make_decision(self, assignment: Assignment) -> Tuple[Variable, Value]:
+    self.decision_count += 1
+    values: Values = { v: item[2] for v, item in assignment.current.items() }
+    unassigned = assignment.get_unassigned()
+    fingerprint: Fingerprint = frozenset(values.items())
+    candidates = self._preselect(values, unassigned)
+    if not candidates:
+      # no unassigned variable is in a clause that is not satisfied
+      return (next(iter(unassigned)), 0)
+
+    results = _recent(self.cache, (fingerprint, len(self.clauses)), self.cache_size, dict)
+    for v in candidates:
+      for l in (v, -v):
+        if l not in results:
+          results[l] = self._lookahead(values, l)
+        failed, _, _ = results[l]
+        if failed:
+          self.failed_literal_count += 1
+          return (v, 0 if l > 0 else 1)
+
+    done = _recent(self.double_lookahead_done, fingerprint, self.cache_size, set)
+    for v in candidates:
+      for l in (v, -v):
+        _, implied, _ = results[l]
+        if len(implied) >= self.double_lookahead_trigger and l not in done:
+          done.add(l)
+          if self._double_lookahead(values, l, implied, candidates):
+            self.failed_literal_count += 1
+            return (v, 0 if l > 0 else 1)
+
+    best_var = candidates[0]
+    best_score = -1.0
+    for v in candidates:
+      score = _combine(results[v][2], results[-v][2])
+      if score > best_score:
+        best_var = v
+        best_score = score
+    positive, negative = results[best_var][2], results[-best_var][2]
+    if positive == negative and best_var in self.saved_phases:
+      return (best_var, self.saved_phases[best_var])
+    return (best_var, 1 if positive <= negative else 0)
+
+def _combine(positive: float, negative: float) -> float:
+  """Combines the scores of both polarities of a variable, favoring variables that are balanced
+  """
+  return 1024 * positive * negative + positive + negative
+
+def _recent(cache: Dict, key: Hashable, size: int, empty: Callable[[], Any]) -> Any:
+  """The entry of `key` in `cache`, which is created with `empty` if it is
+  missing, after evicting the oldest entries down to `size`
+  """
+  if key not in cache:
+    while len(cache) >= size:
+      del cache[next(iter(cache))]
+    cache[key] = empty()
+  return cache[key]
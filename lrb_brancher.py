@@ -0,0 +1,124 @@
+from __future__ import annotations
+from typing import Dict, List, Tuple, TYPE_CHECKING
+import heapq
+
+from assignment import AssignmentListener
+from brancher import Brancher
+
+if TYPE_CHECKING:
+  from shared_types import Literal, Value, Variable
+  from propagating_formula import PropagatingFormula
+  from assignment import Assignment, AssignmentItem
+
+  Score = float
+
+# the step size of the moving averages, which decays by `ALPHA_DECAY` at every conflict down to `MIN_ALPHA`
+ALPHA = 0.4
+ALPHA_DECAY = 1e-6
+MIN_ALPHA = 0.06
+
+class LRBBrancher(Brancher, AssignmentListener):
+  """Decides the unassigned variable of highest learning rate, in its saved phase
+
+  The learning rate of a variable is the share of the conflicts that it
+  took part in while it was assigned, where it takes part in a conflict
+  if its literal is resolved in the analysis of the conflict, as
+  reported by `record_resolved_lit`. When a variable is unassigned, its
+  learning rate over the conflicts since it was assigned is folded into
+  its score, an exponential moving average, and it is pushed onto a
+  max-heap of scores; entries of assigned variables, and stale entries,
+  are dropped from the heap when they reach its top.
+
+  The brancher listens to the assignment of the formula, so it sees each
+  assignment as it is made and undone, including those that are made
+  and undone between two of its calls.
+
+  :param assignment: the assignment of the formula being solved
+  :param scores: the score of each variable
+  :param phases: the value that each variable is decided on
+  :param conflict_count: the number of conflicts seen
+  :param alpha: the current step size of the moving averages
+  :param assigned_at: the number of conflicts seen when each assigned variable was assigned
+  :param participated: the number of conflicts that each assigned variable took part in since it was assigned
+  :param heap: the scores of unassigned variables, negated, with the variables; entries may be stale
+  """
+
+  @staticmethod
+  def create(formula: PropagatingFormula) -> Brancher:
+    return LRBBrancher(formula)
+
+  def __init__(self: LRBBrancher, formula: PropagatingFormula) -> None:
+    Brancher.__init__(self)
+    self.assignment = formula.get_partial_assignment()
+    var_counts: Dict[Variable, List[int]] = {}
+    for clause in formula.formula.formula:
+      for literal in clause.clause:
+        counts = var_counts.setdefault(abs(literal), [0, 0])
+        counts[1 if literal > 0 else 0] += 1
+    for v in list(self.assignment.get_unassigned()) + list(self.assignment.current):
+      var_counts.setdefault(v, [0, 0])
+    self.scores: Dict[Variable, Score] = { v: 0.0 for v in var_counts }
+    self.phases: Dict[Variable, Value] = { v: 0 if counts[0] > counts[1] else 1 for v, counts in var_counts.items() }
+    self.conflict_count = 0
+    self.alpha = ALPHA
+    self.assigned_at: Dict[Variable, int] = {}
+    self.participated: Dict[Variable, int] = {}
+    # ties between scores are broken toward the variables that occur most often
+    self.heap: List[Tuple[Score, int, Variable]] = [ (0.0, -sum(counts), v) for v, counts in var_counts.items() ]
+    heapq.heapify(self.heap)
+    self.occurrences = { v: sum(counts) for v, counts in var_counts.items() }
+    self._analyzing = False
+    for item in self.assignment.current.values():
+      self.assigned(item)
+    self.assignment.add_listener(self)
+
+  def assigned(self: LRBBrancher, item: AssignmentItem) -> None:
+    v = item[1]
+    self.assigned_at[v] = self.conflict_count
+    self.participated[v] = 0
+
+  def unassigned(self: LRBBrancher, item: AssignmentItem) -> None:
+    _, v, value, _ = item
+    self.phases[v] = value
+    interval = self.conflict_count - self.assigned_at.pop(v, self.conflict_count)
+    participated = self.participated.pop(v, 0)
+    # variables added to the formula after the brancher was created
+    self.scores.setdefault(v, 0.0)
+    self.occurrences.setdefault(v, 0)
+    if interval > 0:
+      self.scores[v] = (1 - self.alpha) * self.scores[v] + self.alpha * participated / interval
+    heapq.heappush(self.heap, (-self.scores[v], -self.occurrences[v], v))
+
+  def record_resolved_lit(self, lit: Literal):
+    if not self._analyzing:
+      # the first literal resolved in the analysis of a conflict
+      self._analyzing = True
+      self.conflict_count += 1
+      self.alpha = max(MIN_ALPHA, self.alpha - ALPHA_DECAY)
+    v = abs(lit)
+    if v in self.participated:
+      self.participated[v] += 1
+
+  def record_learned_clause(self, clause: List[Literal]):
+    self._analyzing = False
+
+  def seed_phases(self, phases: Dict[Variable, Value]) -> None:
+    Brancher.seed_phases(self, phases)
+    self.phases.update(phases)
+
+  def make_decision(self, assignment: Assignment) -> Tuple[Variable, Value]:
+    self.decision_count += 1
+    self._analyzing = False
+    while self.heap:
+      score, _, v = self.heap[0]
+      if v not in assignment and score == -self.scores[v]:
+        return (v, self.phases[v])
+      heapq.heappop(self.heap)
+    # variables added to the formula after the brancher was created, and never assigned since
+    for v in assignment.get_unassigned():
+      self.scores.setdefault(v, 0.0)
+      self.phases.setdefault(v, 1)
+      self.occurrences.setdefault(v, 0)
+      heapq.heappush(self.heap, (-self.scores[v], -self.occurrences[v], v))
+    v = self.heap[0][2]
+    return (v, self.phases[v])
@@ -1,13 +1,80 @@
 import os
+import signal
 import sys
 
 import cdcl
+from budget import Budget
+from checkpoint import Checkpointer, resume, source_digest
+from propagating_formula import PropagatingFormula
+from xor_propagating_formula import XorPropagatingFormula
+from cardinality_propagating_formula import CardinalityPropagatingFormula
+from lookahead_brancher import LookaheadBrancher
+from local_search import cdcl_with_local_search
+from lrb_brancher import LRBBrancher
+from random_brancher import RandomBrancher
+from vmtf_brancher import VMTFBrancher
+from vsids_brancher import VSIDSBrancher
+
+FLAGS = ("--xor", "--cardinality", "--lookahead", "--vmtf", "--lrb", "--local-search")
+# options of the form `--name=value`, with the type of their value
+OPTIONS = { "--max-conflicts": int, "--max-propagations": int, "--max-seconds": float, "--checkpoint": str, "--checkpoint-conflicts": int }
 
 if __name__ == "__main__":
-  filename = sys.argv[1]
-  with open(filename) as file:
-    cdcl_satisfiable = cdcl.cdcl(file) == cdcl.SATISFIABLE
-    if cdcl_satisfiable:
-      print("SATISFIABLE")
+  xor = "--xor" in sys.argv[1:]
+  cardinality = "--cardinality" in sys.argv[1:]
+  lookahead = "--lookahead" in sys.argv[1:]
+  vmtf = "--vmtf" in sys.argv[1:]
+  lrb = "--lrb" in sys.argv[1:]
+  local_search = "--local-search" in sys.argv[1:]
+  options = { arg.split("=")[0]: OPTIONS[arg.split("=")[0]](arg.split("=")[1]) for arg in sys.argv[1:] if arg.split("=")[0] in OPTIONS }
+  filename = [ arg for arg in sys.argv[1:] if arg not in FLAGS and arg.split("=")[0] not in OPTIONS ][0]
+  checkpoint_path = options.get("--checkpoint")
+  if checkpoint_path is not None and (xor or cardinality or local_search):
+    # checkpoints are only of solves of plain CNF formulas with `cdcl_budgeted`
+    sys.exit("--checkpoint cannot be combined with --xor, --cardinality or --local-search")
+  budget = Budget(options.get("--max-conflicts"), options.get("--max-propagations"), options.get("--max-seconds"))
+  # stop with the statistics so far instead of being killed
+  signal.signal(signal.SIGTERM, lambda signum, frame: budget.interrupt())
+  signal.signal(signal.SIGINT, lambda signum, frame: budget.interrupt())
+  # checkpoints keep the scores of VSIDS, which checkpointed solves branch with unless another brancher is chosen
+  default_brancher = VSIDSBrancher.create if checkpoint_path is not None else RandomBrancher.create
+  create_brancher = LookaheadBrancher.create if lookahead else VMTFBrancher.create if vmtf else LRBBrancher.create if lrb else default_brancher
+  if checkpoint_path is not None:
+    # checkpoints of plain CNF solves are written periodically, and a
+    # solve resumes from the checkpoint if there is one, which must be of
+    # the same input; it is removed once the solve is finished
+    source = source_digest(filename)
+    checkpointer = Checkpointer(checkpoint_path, options.get("--checkpoint-conflicts", 1000), source=source)
+    if os.path.exists(checkpoint_path):
+      try:
+        formula, checkpoint = resume(checkpoint_path, source)
+      except Exception as e:
+        sys.exit(str(e))
+      create_brancher = checkpoint.restoring(create_brancher)
+      checkpointer.previous = checkpoint.stats
+    else:
+      with open(filename) as file:
+        formula = PropagatingFormula(file)
+    state, stats = cdcl.cdcl_budgeted(formula, budget, create_brancher, checkpointer)
+    if state != cdcl.UNKNOWN and os.path.exists(checkpoint_path):
+      os.remove(checkpoint_path)
+  else:
+    with open(filename) as file:
+      if cardinality:
+        formula = CardinalityPropagatingFormula(file)
+      elif xor:
+        formula = XorPropagatingFormula(file)
+      else:
+        formula = PropagatingFormula(file)
+    if local_search:
+      state, stats = cdcl_with_local_search(formula, create_brancher=create_brancher, budget=budget)
     else:
-      print("UNSATISFIABLE")
\ No newline at end of file
+      state, stats = cdcl.cdcl_budgeted(formula, budget, create_brancher)
+  if state == cdcl.SATISFIABLE:
+    print("SATISFIABLE")
+  elif state == cdcl.UNKNOWN:
+    print("UNKNOWN")
+  else:
+    print("UNSATISFIABLE")
+  for key, value in stats.as_dict().items():
+    print("c {} {}".format(key, value))
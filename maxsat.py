@@ -0,0 +1,321 @@
+from __future__ import annotations
+from typing import Dict, List, Optional, TextIO, Tuple, TYPE_CHECKING
+import io
+import math
+import sys
+
+from randcnf import read_clauses
+from incremental import IncrementalSolver, SATISFIABLE
+from wmc import parse_weights
+
+if TYPE_CHECKING:
+  from shared_types import Literal, Value, Variable
+  from wmc import Weight
+
+  RawClause = List[Literal]
+  SoftClause = Tuple[int, RawClause]
+  Model = Dict[Variable, Value]
+
+# the weights of literals in MPE queries are scaled by this before rounding to integer costs
+MPE_PRECISION = 10 ** 6
+# the most times that a core is solved again to shrink it
+TRIM_ROUNDS = 3
+
+def read_wcnf(file_object: TextIO) -> Tuple[int, List[RawClause], List[SoftClause]]:
+  """Parse a weighted CNF file into its hard and soft clauses
+
+  Both formats are accepted. In the old one, a `p wcnf <variables>
+  <clauses> [<top>]` line comes first and every clause is preceded by its
+  weight; clauses of weight at least `top` are hard. In the new one,
+  there is no `p` line, and a clause is preceded by `h` if it is hard and
+  by its weight otherwise.
+
+  :returns: the number of variables, the hard clauses, and the soft clauses with their weights
+  """
+  num_vars = 0
+  top: Optional[int] = None
+  hard: List[RawClause] = []
+  soft: List[SoftClause] = []
+  tokens: List[str] = []
+  for line in file_object:
+    if not line.strip() or line[0] == 'c':
+      continue
+    if line[0] == 'p':
+      header = line.split()
+      num_vars = int(header[2])
+      if len(header) > 4:
+        top = int(header[4])
+      continue
+    tokens.extend(line.split())
+  clause: List[Literal] = []
+  weight: Optional[str] = None
+  for token in tokens:
+    if weight is None:
+      weight = token
+    elif token != '0':
+      clause.append(int(token))
+    else:
+      if weight == 'h' or (top is not None and int(weight) >= top):
+        hard.append(clause)
+      else:
+        soft.append((int(weight), clause))
+      clause = []
+      weight = None
+  variables = [ abs(l) for clause in hard + [ c for _, c in soft ] for l in clause ]
+  return max(variables + [num_vars]), hard, soft
+
+class OLLSolver:
+  """A core-guided MaxSAT solver with the OLL algorithm and stratification, on an `IncrementalSolver`
+
+  Each soft clause is made an assumption: a unit soft clause is its own
+  literal, and any other one is given a fresh variable `b` with the hard
+  clause `-b` or the clause, and `b` is assumed. The assumptions carry
+  the weights of their soft clauses.
+
+  Whenever the assumptions are unsatisfiable, their core costs at least
+  the least weight `w` of its assumptions: that is added to the lower
+  bound and taken off the weight of each of them, and for a core of more
+  than one assumption, a totalizer counts how many of them are violated.
+  Its output `o_j` is implied once at least `j` of them are, and since
+  one of them must be, `-o_2` is assumed with weight `w`. When `-o_j` is
+  itself in a core later, `-o_(j+1)` is assumed in turn, with the weight
+  taken off `-o_j`.
+
+  Assumptions are stratified: only those whose weight is at least a
+  threshold are assumed, starting from the largest weight, and the
+  threshold is lowered to the next weight below it whenever the
+  assumptions are satisfiable. Once they are satisfiable with every
+  assumption of positive weight assumed, the model costs the lower bound,
+  and is optimal.
+
+  :param hard: the hard clauses
+  :param soft: the soft clauses, with their positive integer weights
+  :param solver: the solver of the hard clauses and the clauses of the relaxation
+  :param weights: the remaining weight of each assumption
+  :param outputs: for each assumption `-o_j`, the outputs of its totalizer and `j`
+  :param lower_bound: the cost that every model is known to have at least
+  :param upper_bound: the cost of the best model found, or None
+  :param model: the best model found, or None
+  :param core_count: the number of cores found
+  """
+
+  def __init__(self: OLLSolver, hard: List[RawClause], soft: List[SoftClause], num_vars: int = 0) -> None:
+    self.hard = hard
+    self.soft = soft
+    self.num_vars = max([ abs(l) for clause in hard + [ c for _, c in soft ] for l in clause ] + [num_vars])
+    self.solver = IncrementalSolver(hard, self.num_vars)
+    self.weights: Dict[Literal, int] = {}
+    self.outputs: Dict[Literal, Tuple[List[Literal], int]] = {}
+    self.lower_bound = 0
+    self.upper_bound: Optional[int] = None
+    self.model: Optional[Model] = None
+    self.core_count = 0
+    for weight, clause in soft:
+      clause = list(dict.fromkeys(clause))
+      if weight <= 0 or any(-l in clause for l in clause):
+        continue
+      if not clause:
+        # an empty soft clause is violated by every model
+        self.lower_bound += weight
+        continue
+      if len(clause) == 1:
+        assumption = clause[0]
+      else:
+        assumption = self.solver.new_var()
+        self.solver.add_clause(clause + [-assumption])
+      self.weights[assumption] = self.weights.get(assumption, 0) + weight
+
+  def cost(self: OLLSolver, model: Model) -> int:
+    """The total weight of the soft clauses that `model` violates, with unassigned variables taken as false
+    """
+    return sum(weight for weight, clause in self.soft if not any((l > 0) == (model.get(abs(l), 0) == 1) for l in clause))
+
+  def _assumptions(self: OLLSolver, threshold: int) -> List[Literal]:
+    return [ l for l, weight in self.weights.items() if weight >= threshold and weight > 0 ]
+
+  def _next_threshold(self: OLLSolver, threshold: int) -> Optional[int]:
+    """The largest remaining weight below `threshold`, or None if there is none
+    """
+    return max([ weight for weight in self.weights.values() if 0 < weight < threshold ], default=None)
+
+  def _trim(self: OLLSolver, core: List[Literal]) -> List[Literal]:
+    """Shrink `core` by solving under it alone until it no longer gets smaller
+    """
+    for _ in range(TRIM_ROUNDS):
+      self.solver.solve(core)
+      trimmed = self.solver.core
+      if trimmed is None or len(trimmed) >= len(core):
+        break
+      core = trimmed
+    return core
+
+  def _relax(self: OLLSolver, core: List[Literal]) -> None:
+    self.core_count += 1
+    weight = min(self.weights[l] for l in core)
+    self.lower_bound += weight
+    for l in core:
+      self.weights[l] -= weight
+    if len(core) == 1:
+      # the hard clauses imply the negation of an assumption that is a core by itself
+      self.solver.add_clause([-core[0]])
+    else:
+      outputs = self._totalizer([ -l for l in core ])
+      self._add_weight(-outputs[1], weight)
+      self.outputs[-outputs[1]] = (outputs, 1)
+    for l in core:
+      if l in self.outputs:
+        outputs, j = self.outputs.pop(l)
+        if j + 1 < len(outputs):
+          self._add_weight(-outputs[j + 1], weight)
+          self.outputs[-outputs[j + 1]] = (outputs, j + 1)
+
+  def _add_weight(self: OLLSolver, assumption: Literal, weight: int) -> None:
+    self.weights[assumption] = self.weights.get(assumption, 0) + weight
+
+  def _totalizer(self: OLLSolver, inputs: List[Literal]) -> List[Literal]:
+    """Outputs whose element at index j is implied once at least j + 1 of `inputs` are true
+
+    Only that direction is encoded, since the outputs are only ever assumed false.
+    """
+    if len(inputs) == 1:
+      return inputs
+    middle = len(inputs) // 2
+    left = self._totalizer(inputs[:middle])
+    right = self._totalizer(inputs[middle:])
+    outputs = [ self.solver.new_var() for _ in inputs ]
+    for i in range(len(left) + 1):
+      for j in range(len(right) + 1):
+        if i + j == 0:
+          continue
+        clause = [outputs[i + j - 1]]
+        if i > 0:
+          clause.append(-left[i - 1])
+        if j > 0:
+          clause.append(-right[j - 1])
+        self.solver.add_clause(clause)
+    return outputs
+
+  def solve(self: OLLSolver) -> Optional[Tuple[int, Model]]:
+    """Find a model of the hard clauses that violates soft clauses of the least total weight
+
+    :returns: the least cost and a model over the variables of the
+      clauses that has it, or None if the hard clauses are unsatisfiable
+    """
+    threshold: Optional[int] = max(self.weights.values(), default=0)
+    while True:
+      assert threshold is not None
+      if self.solver.solve(self._assumptions(threshold)) == SATISFIABLE:
+        assert self.solver.model is not None
+        model = { v: self.solver.model.get(v, 0) for v in range(1, self.num_vars + 1) }
+        cost = self.cost(model)
+        if self.upper_bound is None or cost < self.upper_bound:
+          self.upper_bound = cost
+          self.model = model
+        threshold = self._next_threshold(threshold)
+        if threshold is None or self.upper_bound == self.lower_bound:
+          return self.upper_bound, self.model
+        continue
+      core = self.solver.core
+      if not core:
+        return None
+      self._relax(self._trim(core))
+
+def maxsat(hard: List[RawClause], soft: List[SoftClause], num_vars: int = 0) -> Optional[Tuple[int, Model]]:
+  return OLLSolver(hard, soft, num_vars).solve()
+
+def mpe_problem(clauses: List[RawClause], weights: Dict[Literal, Weight], precision: int = MPE_PRECISION) -> Tuple[int, List[RawClause], List[SoftClause]]:
+  """Encode the most probable model of a weighted formula as a MaxSAT problem
+
+  The weight of a model is the product of the weights of the literals it
+  satisfies, as in `WeightedModelCounter`, so it is the most probable
+  explanation of the evidence when the formula and weights encode a Bayes
+  network with evidence. Maximizing the product is minimizing the sum of
+  the negative logarithms of the weights: each variable costs the
+  difference between those of its literals when it takes the more costly
+  one, which is a soft unit clause of its cheaper literal. A literal of
+  weight 0 is falsified by a hard unit clause instead. Costs are scaled by
+  `precision` and rounded to integers.
+
+  :returns: the number of variables, the hard clauses, and the soft clauses with their weights
+  """
+  num_vars = max([ abs(l) for clause in clauses for l in clause ] + [ abs(l) for l in weights ] + [0])
+  hard = list(clauses)
+  soft: List[SoftClause] = []
+  for v in range(1, num_vars + 1):
+    positive, negative = weights.get(v, 1.0), weights.get(-v, 1.0)
+    if positive == 0 or negative == 0:
+      hard.extend([ [-l] for l, weight in ((v, positive), (-v, negative)) if weight == 0 ])
+      continue
+    cost = round((math.log(positive) - math.log(negative)) * precision)
+    if cost > 0:
+      soft.append((cost, [v]))
+    elif cost < 0:
+      soft.append((-cost, [-v]))
+  return num_vars, hard, soft
+
+def most_probable_model(formula_file: TextIO, weights_file: TextIO, precision: int = MPE_PRECISION) -> Optional[Tuple[Weight, Model]]:
+  """Find a model of a formula of the greatest weight under a weights file as written by `BayesGraph.to_formula_file_with_evidence`
+
+  :returns: the weight of the model and the model, or None if the formula has no model of positive weight
+  """
+  clauses = read_clauses(formula_file)
+  weights = parse_weights(weights_file)
+  num_vars, hard, soft = mpe_problem(clauses, weights, precision)
+  result = maxsat(hard, soft, num_vars)
+  if result is None:
+    return None
+  _, model = result
+  weight = 1.0
+  for v, value in model.items():
+    weight *= weights.get(v if value == 1 else -v, 1.0)
+  return weight, model
+
+def most_probable_explanation(graph_file: TextIO, evidence_file: TextIO, encoding: str = "pairwise", deterministic: bool = False) -> Optional[Tuple[Weight, Model]]:
+  """Find the most probable explanation of the evidence on a Bayes network in .uai format
+
+  The encoding written by `BayesGraph.to_formula_file_with_evidence` is
+  kept in memory and solved in this process; `encoding` and
+  `deterministic` are as in `BayesGraph.to_formula`.
+
+  :returns: the joint probability of the explanation and the evidence,
+    and a model of the encoding that gives the explanation, or None if the
+    evidence is impossible
+  """
+  from graphical.bayes_graph import BayesGraph
+  ffile = io.StringIO()
+  wfile = io.StringIO()
+  BayesGraph(graph_file).to_formula_file_with_evidence(evidence_file, ffile, wfile, encoding, deterministic)
+  ffile.seek(0)
+  wfile.seek(0)
+  return most_probable_model(ffile, wfile)
+
+if __name__ == "__main__":
+  if len(sys.argv) not in (2, 3):
+    print("Usage: python maxsat.py path/to/formula.wcnf")
+    print("       python maxsat.py path/to/formula.cnf path/to/formula.weights")
+    print("       python maxsat.py path/to/graph.uai path/to/evidence.uai.evid")
+    sys.exit(0)
+  if len(sys.argv) == 2:
+    with open(sys.argv[1]) as file:
+      num_vars, hard, soft = read_wcnf(file)
+    result = maxsat(hard, soft, num_vars)
+    if result is None:
+      print("s UNSATISFIABLE")
+    else:
+      cost, model = result
+      print("o {}".format(cost))
+      print("s OPTIMUM FOUND")
+      print("v " + " ".join([ str(v if value == 1 else -v) for v, value in sorted(model.items()) ]))
+  else:
+    _, first_file, second_file = sys.argv
+    with open(first_file) as file1, open(second_file) as file2:
+      if first_file.endswith(".uai"):
+        explanation = most_probable_explanation(file1, file2)
+      else:
+        explanation = most_probable_model(file1, file2)
+    if explanation is None:
+      print("s UNSATISFIABLE")
+    else:
+      weight, model = explanation
+      print("c weight {}".format(weight))
+      print("v " + " ".join([ str(v if value == 1 else -v) for v, value in sorted(model.items()) ]))
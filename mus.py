@@ -0,0 +1,104 @@
+from __future__ import annotations
+from typing import List, Optional, Tuple, TYPE_CHECKING
+import sys
+
+from randcnf import read_clauses
+from incremental import IncrementalSolver, SATISFIABLE, UNSATISFIED
+
+if TYPE_CHECKING:
+  from shared_types import Literal, Variable
+  from propagating_formula import State
+
+  RawClause = List[Literal]
+  ClauseIndex = int
+
+class CoreSolver:
+  """Decides the satisfiability of subsets of a list of clauses on a single `IncrementalSolver`
+
+  Clause i is guarded by a selector variable `s_i`: the solver holds the
+  clause together with the literal `-s_i`, so that it is only enforced
+  when `s_i` is true. A subset is solved by assuming `s_i` for each
+  clause in it and `-s_i` for each clause not in it; the selectors
+  assumed true in the core of an unsatisfiable solve are those of an
+  unsat core.
+
+  Clauses learned under any subset only mention selectors negatively,
+  and so are implied by the guarded formula; they are kept across
+  subsets.
+
+  :param clauses: the clauses, indexed by their position
+  :param selectors: a list whose element at index i is the selector variable of clause i
+  :param solver: the solver of the guarded formula
+  :param solve_count: the number of subsets solved
+  """
+
+  def __init__(self: CoreSolver, clauses: List[RawClause]) -> None:
+    self.clauses = clauses
+    first_selector = max({ abs(l) for clause in clauses for l in clause }, default=0) + 1
+    self.selectors: List[Variable] = [ first_selector + i for i in range(len(clauses)) ]
+    guarded = [ clause + [-s] for clause, s in zip(clauses, self.selectors) ]
+    self.solver = IncrementalSolver(guarded, first_selector + len(clauses) - 1)
+    self.solve_count = 0
+
+  def solve(self: CoreSolver, subset: List[ClauseIndex]) -> Tuple[State, Optional[List[ClauseIndex]]]:
+    """Decides the satisfiability of the clauses in `subset`
+
+    :returns: the state of the subset, followed by an unsat core of it,
+      as the sorted indices of its clauses, if it is unsatisfiable
+    """
+    self.solve_count += 1
+    enabled = set(subset)
+    assumptions = [ s if i in enabled else -s for i, s in enumerate(self.selectors) ]
+    if self.solver.solve(assumptions) == SATISFIABLE:
+      return SATISFIABLE, None
+    # the guarded formula is satisfied by disabling every clause, so the core is never empty
+    core = self.solver.core if self.solver.core is not None else []
+    first_selector = self.selectors[0]
+    return UNSATISFIED, sorted([ l - first_selector for l in core if l > 0 ])
+
+def unsat_core(clauses: List[RawClause]) -> Optional[List[ClauseIndex]]:
+  """An unsat core of `clauses`, as the sorted indices of its clauses, or None if they are satisfiable
+  """
+  _, core = CoreSolver(clauses).solve(list(range(len(clauses))))
+  return core
+
+def minimal_unsat_subset(clauses: List[RawClause], solver: Optional[CoreSolver] = None) -> Optional[List[ClauseIndex]]:
+  """A minimal unsatisfiable subset of `clauses`, as the sorted indices of its clauses, or None if they are satisfiable
+
+  Starting from an unsat core, each clause is tested by solving the
+  core without it: if that is still unsatisfiable, the clause is
+  dropped, and the core is refined to the new core found, which drops
+  every other clause outside of it at once; otherwise the clause is in
+  every unsatisfiable subset of the core, and is kept. Every solve is
+  made on the same `CoreSolver`.
+  """
+  solver = solver if solver is not None else CoreSolver(clauses)
+  state, core = solver.solve(list(range(len(clauses))))
+  if state == SATISFIABLE or core is None:
+    return None
+  necessary: List[ClauseIndex] = []
+  candidates = list(core)
+  while candidates:
+    clause = candidates.pop()
+    state, core = solver.solve(necessary + candidates)
+    if state == SATISFIABLE or core is None:
+      necessary.append(clause)
+    else:
+      refined = set(core)
+      # the necessary clauses are in every unsat core of the subsets solved from now on
+      candidates = [ i for i in candidates if i in refined ]
+  return sorted(necessary)
+
+if __name__ == "__main__":
+  if len(sys.argv) != 2:
+    print("Usage: python mus.py path/to/file.cnf")
+    sys.exit(0)
+  with open(sys.argv[1]) as file:
+    clauses = read_clauses(file)
+  mus = minimal_unsat_subset(clauses)
+  if mus is None:
+    print("SATISFIABLE")
+  else:
+    print("c minimal unsatisfiable subset of {} clauses".format(len(mus)))
+    for i in mus:
+      print(" ".join([ str(l) for l in clauses[i] ] + ["0"]))
@@ -1,38 +1,92 @@
 from __future__ import annotations
-from typing import List, Optional, Set, TextIO, Tuple, TYPE_CHECKING
+from typing import Iterable, List, Optional, Set, TextIO, Tuple, TYPE_CHECKING, Union
 
+from clause import Clause
 from formula import Formula
 
 if TYPE_CHECKING:
   from shared_types import DecisionLevel, Literal, Value, Variable
-  from assignment import Assignment
-  from clause import Clause
+  from assignment import Assignment, AssignmentItem
   from formula import State
 
 class PropagatingFormula:
+  """A `Formula` whose unit clauses are propagated after every assignment and added clause
+
+  With `trail_saving`, `backtrack` saves the implications of the decision
+  levels that it undoes, in the order they were made, and `propagate`
+  assigns them again, from the start of the saved trail, for as long as
+  the next one is still implied by its antecedent: every other literal
+  of the antecedent is false. An implication that is not yet implied
+  stops the replay until the next call; an implication of the other
+  value, or an antecedent that is not a `Clause`, ends it.
+
+  :param trail_saving: whether implications undone by `backtrack` are saved to be assigned again
+  :param saved_trail: the implications saved by the last `backtrack`
+  :param saved_position: the index in `saved_trail` of the next implication to assign again
+  """
 
   SATISFIED: State = Formula.SATISFIED
   UNRESOLVED: State = Formula.UNRESOLVED
   UNSATISFIED: State = Formula.UNSATISFIED
 
-  def __init__(self: PropagatingFormula, file_object: TextIO) -> None:
-    self.formula = Formula(file_object)
+  def __init__(self: PropagatingFormula, file_object: Union[TextIO, Formula]) -> None:
+    """
+    :param file_object: the DIMACS input, or a `Formula` that is already constructed, such as by `from_clauses`
+    """
+    self.formula = file_object if isinstance(file_object, Formula) else Formula(file_object)
     self.decision_level: DecisionLevel = 0
+    self.trail_saving = False
+    self.saved_trail: List[AssignmentItem] = []
+    self.saved_position = 0
     self.propagate()
     self.decision_history: List[Optional[Tuple[Variable, Value]]] = [None]
 
+  @classmethod
+  def from_clauses(cls, clauses: Iterable[List[int]], *args, **kwargs) -> PropagatingFormula:
+    """Constructs a formula of clauses that are already in memory, without writing them out in DIMACS format to be read back
+
+    The remaining arguments are passed on to the constructor of `cls`.
+    """
+    return cls(Formula.from_clauses(clauses), *args, **kwargs)
+
   def _sat_variable_value_from_unit_clause(self: PropagatingFormula, clause: Clause) -> Tuple[Variable, Value]:
     head_lit, _ = clause.get_head_tail_lit()
     return abs(head_lit), 0 if head_lit < 0 else 1
 
   def propagate(self: PropagatingFormula) -> None:
+    if self.saved_position < len(self.saved_trail):
+      self._replay_saved_trail()
     while self.formula.get_unit_clauses() and self.formula.UNRESOLVED:
       clause = next(iter(self.formula.get_unit_clauses()))
       variable, value = self._sat_variable_value_from_unit_clause(clause)
       self.formula.assign(self.decision_level, variable, value, clause)
+      if self.saved_position < len(self.saved_trail):
+        self._replay_saved_trail()
+
+  def _replay_saved_trail(self: PropagatingFormula) -> None:
+    assignment = self.formula.get_partial_assignment()
+    while self.saved_position < len(self.saved_trail) and self.formula.get_current_state() != Formula.UNSATISFIED:
+      _, variable, value, antecedent = self.saved_trail[self.saved_position]
+      if variable in assignment:
+        if assignment.get_value(variable) != value:
+          self.saved_trail = []
+          return
+      elif not isinstance(antecedent, Clause):
+        self.saved_trail = []
+        return
+      elif any(assignment.get_value(abs(l)) != (0 if l > 0 else 1) for l in antecedent.clause if abs(l) != variable):
+        return
+      else:
+        self.formula.assign(self.decision_level, variable, value, antecedent)
+      self.saved_position += 1
 
   def add_clause(self: PropagatingFormula, clause: List[int]) -> None:
-    self.formula.add_clause(clause)
+    """Add a clause, and if it is unit, such as a learned asserting clause, assign its remaining literal before propagating
+    """
+    clause_object = self.formula.add_clause(clause)
+    if clause_object in self.formula.get_unit_clauses():
+      variable, value = self._sat_variable_value_from_unit_clause(clause_object)
+      self.formula.assign(self.decision_level, variable, value, clause_object)
     self.propagate()
 
   def assign(self: PropagatingFormula, variable: Variable, value: Value) -> None:
@@ -48,9 +102,13 @@ class PropagatingFormula:
     return self.decision_level
 
   def backtrack(self: PropagatingFormula, d: DecisionLevel) -> None:
+    if self.trail_saving and d < self.decision_level:
+      history = self.formula.get_partial_assignment().history
+      self.saved_trail = [ item for level in history[d + 1:] for item in level.values() if item[3] is not None ]
+      self.saved_position = 0
     self.decision_level = d
     self.formula.backtrack(d)
-    while len(self.decision_history) > d:
+    while len(self.decision_history) > d + 1:
       self.decision_history.pop()
 
   def get_partial_assignment(self: PropagatingFormula) -> Assignment:
@@ -1,17 +1,24 @@
 from __future__ import annotations
-from typing import List, TextIO
+from typing import List, Optional, TextIO
 import math
 import os
 import sys
 import random
 
-def random_formula(num_vars: int, num_clauses: int, lits_per_clause: int) -> List[List[int]]:
-  return [ random_clause(num_vars, lits_per_clause) for _ in range(num_clauses) ]
+def random_formula(num_vars: int, num_clauses: int, lits_per_clause: int, rng: Optional[random.Random] = None) -> List[List[int]]:
+  return [ random_clause(num_vars, lits_per_clause, rng) for _ in range(num_clauses) ]
 
-def random_clause(num_vars: int, num_lits: int) -> List[int]:
-  clause = random.sample(range(1, num_vars + 1), num_lits)
+def random_clause(num_vars: int, num_lits: int, rng: Optional[random.Random] = None) -> List[int]:
+  """Generates a random clause of `num_lits` literals in distinct variables
+
+  :param rng: the source of randomness; the module-level generator of
+    `random` is used if it is not given
+  """
+  # the `random` module exposes the same interface as a `random.Random`
+  source = rng if rng is not None else random
+  clause = source.sample(range(1, num_vars + 1), num_lits)
   for i in range(len(clause)):
-    if random.randrange(2) == 0:
+    if source.randrange(2) == 0:
       clause[i] = -clause[i]
   return clause
 
@@ -21,6 +28,24 @@ def write_formula(file: TextIO, num_vars: int, formula: List[List[int]]) -> None
     lit_str = " ".join([str(l) for l in clause]) + " 0\n"
     file.write(lit_str)
 
+def read_clauses(file_object: TextIO) -> List[List[int]]:
+  """Reads the clauses of a DIMACS file without normalizing them
+  """
+  clauses: List[List[int]] = []
+  current_clause: List[int] = []
+  for line in file_object:
+    if not line.strip() or line[0] in ('c', 'p'):
+      continue
+    for l in (int(token) for token in line.split()):
+      if l == 0:
+        clauses.append(current_clause)
+        current_clause = []
+      else:
+        current_clause.append(l)
+  if current_clause:
+    clauses.append(current_clause)
+  return clauses
+
 def write_random_formula(filename: str, num_vars: int, num_clauses: int, lits_per_clause: int) -> None:
   with open(filename, "w") as file:
     formula = random_formula(num_vars, num_clauses, lits_per_clause)
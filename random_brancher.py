@@ -27,4 +27,6 @@ class RandomBrancher(Brancher):
   def make_decision(self, assignment: Assignment) -> Tuple[Variable, Value]:
     self.decision_count += 1
     unassigned_variables = list(assignment.get_unassigned())
-    return (random.choice(unassigned_variables), random.choice((0, 1)))
+    variable = random.choice(unassigned_variables)
+    value = self.saved_phases.get(variable)
+    return (variable, value if value is not None else random.choice((0, 1)))
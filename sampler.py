@@ -0,0 +1,182 @@
+from __future__ import annotations
+from typing import Dict, Iterator, List, Optional, Set, TYPE_CHECKING
+from concurrent.futures import ProcessPoolExecutor
+import math
+import os
+import random
+import sys
+
+from approxmc import random_xors, xor_clauses
+from randcnf import read_clauses
+from incremental import IncrementalSolver, SATISFIABLE
+
+if TYPE_CHECKING:
+  from shared_types import Literal, Value, Variable
+  from gauss_jordan import Xor
+
+  RawClause = List[Literal]
+  Model = Dict[Variable, Value]
+
+# the number of clauses, beyond those of the formula, that the solver of a `Sampler` is rebuilt at
+REBUILD_CLAUSES = 100
+
+class Sampler:
+  """Draws near-uniform samples of the models of a formula, projected to a support, from one warm `IncrementalSolver`
+
+  As in UniGen, the projected models are split into cells by random XOR
+  constraints over the support, and a sample is drawn uniformly from a
+  cell whose number of models is between `low` and `high`. The number of
+  XOR constraints is kept from one cell to the next, and is raised when a
+  cell has too many models and lowered when it has too few.
+
+  Each cell is made on the same solver, so that clauses learned on the
+  formula are kept across cells: the clauses of its XOR constraints and
+  the clauses that block the models found in it are guarded by a fresh
+  activation variable, which is assumed while the cell is enumerated,
+  and is then fixed false, which satisfies them all for good. Satisfied
+  clauses are never removed from a `Formula`, and still slow down
+  propagation, so once there are `REBUILD_CLAUSES` more clauses than the
+  formula has, the solver is rebuilt with the clauses of the formula and
+  the clauses learned only on its variables, which every later cell
+  uses, and with the VSIDS scores of the old solver.
+
+  If the formula has at most `high` projected models, they are all
+  enumerated once, and samples are drawn uniformly from them.
+
+  :param support: the variables that samples are projected to
+  :param kappa: the tolerance of the cell sizes; samples are closer to uniform for smaller values, and cells are then larger
+  :param low: the fewest models of a cell that samples are drawn from
+  :param high: the most models of a cell that samples are drawn from
+  :param samples_per_cell: the number of distinct samples that are drawn from each cell
+  :param num_xors: the number of XOR constraints of the next cell
+  :param models: every projected model, if there are at most `high` of them
+  :param unsatisfiable: whether the formula has no model
+  :param cell_count: the number of cells enumerated
+  :param rebuild_count: the number of times the solver was rebuilt
+  """
+
+  def __init__(self: Sampler, clauses: List[RawClause], support: Optional[List[Variable]] = None, kappa: float = 0.638, samples_per_cell: int = 1, seed: Optional[int] = None) -> None:
+    variables: Set[Variable] = { abs(l) for clause in clauses for l in clause }
+    self.support: List[Variable] = sorted(support if support is not None else variables)
+    self.clauses = clauses
+    # the clauses learned only on the variables of the formula, by the solvers before the last rebuild
+    self.learned: List[RawClause] = []
+    self.num_vars = max(variables | set(self.support), default=0)
+    self.solver = IncrementalSolver(clauses, self.num_vars)
+    pivot = math.ceil(4.03 * (1 + 1 / kappa) ** 2)
+    self.low = max(1, int(pivot / (1.41 * (1 + kappa))))
+    self.high = int(1 + 1.41 * (1 + kappa) * pivot)
+    self.samples_per_cell = samples_per_cell
+    self.rng = random.Random(seed)
+    self.num_xors = 1
+    self.models: Optional[List[Model]] = None
+    self.cell_count = 0
+    self.rebuild_count = 0
+    self.unsatisfiable = False
+    models = self._enumerate([])
+    if len(models) <= self.high:
+      self.models = models
+      self.unsatisfiable = not models
+
+  def _rebuild(self: Sampler) -> None:
+    old = self.solver
+    raw_formula = old.formula.formula
+    self.learned.extend([ clause.clause for clause in raw_formula.formula[raw_formula.num_base_clauses:] if all(abs(l) <= self.num_vars for l in clause.clause) ])
+    self.solver = IncrementalSolver(self.clauses + self.learned, self.num_vars)
+    for v in range(1, self.num_vars + 1):
+      self.solver.brancher.scores[v] = old.brancher.scores.get(v, 0)
+      self.solver.brancher.sign[v] = old.brancher.sign.get(v, 1)
+    self.solver.brancher.bonus = old.brancher.bonus
+    self.solver.brancher.max_score = max(self.solver.brancher.max_score, old.brancher.max_score)
+    self.rebuild_count += 1
+
+  def _enumerate(self: Sampler, xors: List[Xor]) -> List[Model]:
+    """The projected models of the cell of `xors`, up to `high` + 1 of them
+
+    A projected model leaves unassigned the support variables that no
+    clause depends on under it; it is expanded into the models of every
+    assignment to them, as far as needed.
+    """
+    self.cell_count += 1
+    if len(self.solver.formula.formula.formula) > len(self.clauses) + len(self.learned) + REBUILD_CLAUSES:
+      self._rebuild()
+    solver = self.solver
+    activation = solver.new_var()
+    for variables, parity in xors:
+      first = solver.num_vars + 1
+      clauses, next_var = xor_clauses((variables, parity), first)
+      for _ in range(first, next_var):
+        solver.new_var()
+      for clause in clauses:
+        solver.add_clause(clause + [-activation])
+    models: List[Model] = []
+    while len(models) <= self.high and solver.solve([activation]) == SATISFIABLE:
+      assert solver.model is not None
+      cube = { v: solver.model[v] for v in self.support if v in solver.model }
+      free = [ v for v in self.support if v not in cube ]
+      for bits in range(min(1 << len(free), self.high + 1 - len(models))):
+        model = dict(cube)
+        model.update({ v: (bits >> i) & 1 for i, v in enumerate(free) })
+        models.append(model)
+      solver.add_clause([ -v if value == 1 else v for v, value in cube.items() ] + [-activation])
+    solver.add_clause([-activation])
+    return models
+
+  def sample(self: Sampler) -> List[Model]:
+    """Draws `samples_per_cell` distinct samples from the next cell with the right number of models
+
+    :returns: the samples, which are fewer only if the formula has fewer projected models, and none if it has none
+    """
+    if self.models is not None:
+      return self.rng.sample(self.models, min(self.samples_per_cell, len(self.models)))
+    while True:
+      xors = random_xors(self.support, self.num_xors, self.rng)
+      models = self._enumerate(xors)
+      if len(models) > self.high:
+        self.num_xors += 1
+      elif len(models) < self.low and self.num_xors > 1:
+        self.num_xors -= 1
+      elif models:
+        return self.rng.sample(models, min(self.samples_per_cell, len(models)))
+
+  def samples(self: Sampler, count: int) -> Iterator[Model]:
+    """Yields `count` samples, or none if the formula is unsatisfiable
+    """
+    drawn = 0
+    while drawn < count and not self.unsatisfiable:
+      for model in self.sample()[:count - drawn]:
+        yield model
+        drawn += 1
+
+def _draw(clauses: List[RawClause], support: Optional[List[Variable]], count: int, seed: int, kappa: float, samples_per_cell: int) -> List[Model]:
+  return list(Sampler(clauses, support, kappa, samples_per_cell, seed).samples(count))
+
+def sample_models(clauses: List[RawClause], count: int, support: Optional[List[Variable]] = None, workers: Optional[int] = None, seed: Optional[int] = None, kappa: float = 0.638, samples_per_cell: int = 1) -> List[Model]:
+  """Draws `count` near-uniform samples of the models of `clauses`, projected to `support`, in a process pool
+
+  Each worker process builds one `Sampler` and draws its share of the samples from it.
+
+  :param workers: the number of worker processes; defaults to the number of CPUs, and 1 draws the samples in this process
+  """
+  rng = random.Random(seed)
+  if workers == 1:
+    return _draw(clauses, support, count, rng.randrange(1 << 32), kappa, samples_per_cell)
+  num_workers = workers if workers is not None else (os.cpu_count() or 1)
+  shares = [ count // num_workers + (1 if i < count % num_workers else 0) for i in range(num_workers) ]
+  shares = [ share for share in shares if share > 0 ]
+  seeds = [ rng.randrange(1 << 32) for _ in shares ]
+  with ProcessPoolExecutor(max_workers=num_workers) as executor:
+    results = executor.map(_draw, [clauses] * len(shares), [support] * len(shares), shares, seeds, [kappa] * len(shares), [samples_per_cell] * len(shares))
+    return [ model for models in results for model in models ]
+
+if __name__ == "__main__":
+  if len(sys.argv) not in (3, 4):
+    print("Usage: python sampler.py path/to/file.cnf count [workers]")
+    sys.exit(0)
+  with open(sys.argv[1]) as file:
+    clauses = read_clauses(file)
+  models = sample_models(clauses, int(sys.argv[2]), workers=int(sys.argv[3]) if len(sys.argv) == 4 else None)
+  if not models:
+    print("UNSATISFIABLE")
+  for model in models:
+    print(" ".join([ str(v if value == 1 else -v) for v, value in sorted(model.items()) ]) + " 0")
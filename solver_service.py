@@ -0,0 +1,311 @@
+from __future__ import annotations
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple, TYPE_CHECKING
+from array import array
+import io
+import json
+import multiprocessing
+import os
+import queue
+import signal
+import socket
+import socketserver
+import stat
+import struct
+import sys
+import threading
+
+import cdcl
+from budget import Budget
+from lookahead_brancher import LookaheadBrancher
+from lrb_brancher import LRBBrancher
+from propagating_formula import PropagatingFormula
+from random_brancher import RandomBrancher
+from vmtf_brancher import VMTFBrancher
+from vsids_brancher import VSIDSBrancher
+
+if TYPE_CHECKING:
+  from shared_types import Literal
+
+  Header = Dict[str, Any]
+  Frame = Tuple[Header, bytes]
+
+# formats of the body of a request
+DIMACS = "dimacs"
+ARENA = "arena"
+
+BRANCHERS = { "vsids": VSIDSBrancher.create, "vmtf": VMTFBrancher.create, "lrb": LRBBrancher.create, "random": RandomBrancher.create, "lookahead": LookaheadBrancher.create }
+STATES = { cdcl.SATISFIABLE: "SATISFIABLE", cdcl.UNSATISFIED: "UNSATISFIABLE", cdcl.UNKNOWN: "UNKNOWN" }
+BUDGET_KEYS = ("max_conflicts", "max_propagations", "max_seconds")
+
+# the format of the lengths of the header and body that start every frame
+FRAME_PREFIX = "<II"
+
+def write_frame(file_object: BinaryIO, header: Header, body: bytes = b"") -> None:
+  """Writes a frame: the lengths of its header and body, its header as JSON, and its body
+  """
+  encoded = json.dumps(header).encode("utf-8")
+  file_object.write(struct.pack(FRAME_PREFIX, len(encoded), len(body)) + encoded + body)
+  file_object.flush()
+
+def read_frame(file_object: BinaryIO) -> Optional[Frame]:
+  """Reads a frame written by `write_frame`, or returns None at the end of the stream
+  """
+  prefix = _read_exactly(file_object, struct.calcsize(FRAME_PREFIX))
+  if prefix is None:
+    return None
+  header_length, body_length = struct.unpack(FRAME_PREFIX, prefix)
+  data = _read_exactly(file_object, header_length + body_length)
+  if data is None:
+    raise Exception("frame is truncated")
+  return json.loads(data[:header_length].decode("utf-8")), data[header_length:]
+
+def _read_exactly(file_object: BinaryIO, length: int) -> Optional[bytes]:
+  data = file_object.read(length)
+  if not data and length:
+    return None
+  if len(data) != length:
+    raise Exception("frame is truncated")
+  return data
+
+def encode_arena(clauses: List[List[Literal]]) -> bytes:
+  """Packs clauses into a clause arena: little-endian 32-bit literals, with each clause terminated by 0
+  """
+  arena = array("i")
+  for clause in clauses:
+    arena.extend(clause)
+    arena.append(0)
+  if sys.byteorder != "little":
+    arena.byteswap()
+  return arena.tobytes()
+
+def decode_arena(data: bytes) -> List[List[Literal]]:
+  arena = array("i")
+  arena.frombytes(data)
+  if sys.byteorder != "little":
+    arena.byteswap()
+  clauses: List[List[Literal]] = []
+  clause: List[Literal] = []
+  for l in arena:
+    if l == 0:
+      clauses.append(clause)
+      clause = []
+    else:
+      clause.append(l)
+  return clauses
+
+def _to_formula(header: Header, body: bytes) -> PropagatingFormula:
+  if header.get("format", DIMACS) == DIMACS:
+    return PropagatingFormula(io.StringIO(body.decode("utf-8")))
+  if header["format"] != ARENA:
+    raise Exception("unknown format {}".format(header["format"]))
+  return PropagatingFormula.from_clauses(decode_arena(body))
+
+def solve_request(header: Header, body: bytes, limits: Optional[Header] = None) -> Header:
+  """Solves the formula of a request within its budget, capped by `limits`, and returns the header of its result
+
+  A request may carry an `id`, which is returned with its result, the
+  `format` of its body, the `brancher` to solve with, the limits of its
+  budget, and `model`, to have the model of a satisfiable formula
+  returned as a list of literals. Every error is returned as a result of
+  type `error`.
+  """
+  try:
+    budget = Budget(*[ _cap(header.get(key), (limits or {}).get(key)) for key in BUDGET_KEYS ])
+    create_brancher = BRANCHERS[header.get("brancher", "vsids")]
+    formula = _to_formula(header, body)
+    state, stats = cdcl.cdcl_budgeted(formula, budget, create_brancher)
+    result: Header = { "id": header.get("id"), "type": "result", "state": STATES[state], "stats": stats.as_dict(), "worker": os.getpid() }
+    if state == cdcl.SATISFIABLE and header.get("model"):
+      assignment = formula.get_partial_assignment()
+      result["model"] = sorted([ v if item[2] == 1 else -v for v, item in assignment.current.items() ], key=abs)
+    return result
+  except Exception as e:
+    return { "id": header.get("id"), "type": "error", "message": "{}: {}".format(type(e).__name__, e) }
+
+def _cap(requested: Optional[float], limit: Optional[float]) -> Optional[float]:
+  if requested is None:
+    return limit
+  return requested if limit is None else min(requested, limit)
+
+def _warm_up() -> None:
+  """Runs in each worker as it starts, so that its first request does not pay for first-time costs
+  """
+  # a worker leaves interruption to the service, which terminates it; a
+  # worker that is killed with the process group of the service, while
+  # it waits for a request, would leave the pool unable to terminate
+  signal.signal(signal.SIGINT, signal.SIG_IGN)
+  os.setpgrp()
+  solve_request({ "brancher": "vsids" }, b"p cnf 2 2\n1 2 0\n-1 2 0\n")
+
+class SolverService(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+  """A long-running solver that takes requests over a Unix domain socket and solves them in a pool of warm worker processes
+
+  The pool is forked before the socket is bound, with every module of
+  the solver already imported, and each worker solves a small formula
+  as it starts, so that requests pay neither for interpreter startup nor
+  for imports. Each connection is served by its own thread, which reads
+  request frames and hands them to the pool without waiting for them to
+  be solved; the result of each request is written back as soon as it
+  is done, so results arrive in the order they finish, each with the
+  `id` of its request. A connection that ends its side of the stream
+  has its remaining results written before it is closed.
+
+  :param path: the path of the socket
+  :param workers: the number of worker processes; defaults to the number of CPUs
+  :param limits: caps on the budget of every request, by the keys of `BUDGET_KEYS`
+  :param request_count: the number of requests taken
+  """
+
+  daemon_threads = True
+
+  def __init__(self: SolverService, path: str, workers: Optional[int] = None, limits: Optional[Header] = None) -> None:
+    self.path = path
+    self.limits = limits or {}
+    self.request_count = 0
+    self._count_lock = threading.Lock()
+    # a socket left at the path by an earlier service is replaced, and anything else there is kept
+    if os.path.lexists(path):
+      if not stat.S_ISSOCK(os.lstat(path).st_mode):
+        raise Exception("{} exists and is not a socket".format(path))
+      os.unlink(path)
+    self.pool = multiprocessing.get_context("fork").Pool(workers, initializer=_warm_up)
+    socketserver.UnixStreamServer.__init__(self, path, _ConnectionHandler)
+
+  def server_close(self: SolverService) -> None:
+    socketserver.UnixStreamServer.server_close(self)
+    self.pool.terminate()
+    self.pool.join()
+    if os.path.exists(self.path):
+      os.unlink(self.path)
+
+class _ConnectionHandler(socketserver.StreamRequestHandler):
+  """Reads the requests of a connection and hands them to the pool, while a second thread writes back their results
+
+  The pool delivers results on a single thread for all connections, so
+  they are put in a queue of the connection instead of being written
+  there, and a client that is slow to read only holds up its own results.
+  """
+
+  def handle(self: _ConnectionHandler) -> None:
+    server: SolverService = self.server  # type: ignore
+    results: queue.Queue = queue.Queue()
+    submitted = 0
+    writer = threading.Thread(target=self._write_results, args=(results,))
+    writer.start()
+    while True:
+      try:
+        frame = read_frame(self.rfile)
+      except Exception as e:
+        results.put({ "id": None, "type": "error", "message": str(e) })
+        submitted += 1
+        break
+      if frame is None:
+        break
+      header, body = frame
+      with server._count_lock:
+        server.request_count += 1
+      server.pool.apply_async(solve_request, (header, body, server.limits), callback=results.put, error_callback=lambda e, header=header: results.put({ "id": header.get("id"), "type": "error", "message": str(e) }))
+      submitted += 1
+    # the number of results to write, after which the writer stops
+    results.put(submitted)
+    writer.join()
+
+  def _write_results(self: _ConnectionHandler, results: queue.Queue) -> None:
+    total: Optional[int] = None
+    written = 0
+    while total is None or written < total:
+      result = results.get()
+      if isinstance(result, int):
+        total = result
+        continue
+      written += 1
+      try:
+        write_frame(self.wfile, result)
+      except OSError:
+        # the client went away, and the rest of its results are dropped
+        pass
+
+class SolverClient:
+  """A connection to a `SolverService`
+
+  Requests may be sent any number at a time before their results are
+  read; `results` yields them in the order they are solved.
+  """
+
+  def __init__(self: SolverClient, path: str) -> None:
+    self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    self.socket.connect(path)
+    self.reader = self.socket.makefile("rb")
+    self.writer = self.socket.makefile("wb")
+    self.outstanding = 0
+
+  def send(self: SolverClient, formula: Any, id: Any = None, **options: Any) -> None:
+    """Sends a request for `formula`, given as DIMACS text or as a list of clauses, which are sent as a clause arena
+
+    :param options: `brancher`, `model`, and the limits of the budget, by the keys of `BUDGET_KEYS`
+    """
+    header: Header = dict(options, id=id)
+    if isinstance(formula, str):
+      header["format"] = DIMACS
+      write_frame(self.writer, header, formula.encode("utf-8"))
+    else:
+      header["format"] = ARENA
+      write_frame(self.writer, header, encode_arena(formula))
+    self.outstanding += 1
+
+  def results(self: SolverClient) -> Iterator[Header]:
+    """Yields the results of the requests sent so far, as they arrive
+    """
+    while self.outstanding > 0:
+      frame = read_frame(self.reader)
+      if frame is None:
+        raise Exception("service closed the connection with {} results outstanding".format(self.outstanding))
+      self.outstanding -= 1
+      yield frame[0]
+
+  def solve(self: SolverClient, formula: Any, **options: Any) -> Header:
+    """Sends a single request and waits for its result; no other request may be outstanding
+    """
+    self.send(formula, **options)
+    return next(self.results())
+
+  def close(self: SolverClient) -> None:
+    self.writer.close()
+    self.reader.close()
+    self.socket.close()
+
+  def __enter__(self: SolverClient) -> SolverClient:
+    return self
+
+  def __exit__(self: SolverClient, *args: Any) -> None:
+    self.close()
+
+if __name__ == "__main__":
+  if len(sys.argv) < 3 or sys.argv[1] not in ("serve", "solve"):
+    print("Usage: python solver_service.py serve path/to/socket [workers] [--max-conflicts=N] [--max-propagations=N] [--max-seconds=S]")
+    print("       python solver_service.py solve path/to/socket path/to/file.cnf... [--max-conflicts=N] [--max-propagations=N] [--max-seconds=S]")
+    sys.exit(0)
+  options = { arg[2:].split("=")[0].replace("-", "_"): float(arg.split("=")[1]) for arg in sys.argv[3:] if arg.startswith("--") }
+  options = { key: int(value) if key != "max_seconds" else value for key, value in options.items() if key in BUDGET_KEYS }
+  arguments = [ arg for arg in sys.argv[3:] if not arg.startswith("--") ]
+  if sys.argv[1] == "serve":
+    service = SolverService(sys.argv[2], int(arguments[0]) if arguments else None, options)
+    signal.signal(signal.SIGTERM, lambda signum, frame: threading.Thread(target=service.shutdown).start())
+    try:
+      service.serve_forever()
+    except KeyboardInterrupt:
+      pass
+    finally:
+      service.server_close()
+  else:
+    with SolverClient(sys.argv[2]) as client:
+      for filename in arguments:
+        with open(filename) as file:
+          client.send(file.read(), filename, **options)
+      for result in client.results():
+        if result["type"] == "error":
+          print("c {} error {}".format(result["id"], result["message"]))
+          continue
+        print("c {} {}".format(result["id"], result["state"]))
+        for key, value in result["stats"].items():
+          print("c {} {} {}".format(result["id"], key, value))
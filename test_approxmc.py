@@ -0,0 +1,62 @@
+from __future__ import annotations
+import io
+import random
+import unittest
+
+import approxmc
+import randcnf
+import testutils
+from wmc import probability_of_evidence
+
+def _count(clauses, support) -> int:
+  num_vars = max({ abs(l) for clause in clauses for l in clause } | set(support))
+  return len({ tuple(bits[v - 1] for v in support) for bits in testutils.models(num_vars, clauses) })
+
+class TestApproxMC(unittest.TestCase):
+
+  def test_xor_clauses(self: TestApproxMC):
+    for size in range(1, 8):
+      for parity in (0, 1):
+        variables = list(range(1, size + 1))
+        clauses, next_var = approxmc.xor_clauses((variables, parity), size + 1)
+        self.assertEqual(_count(clauses, variables), 2 ** (size - 1))
+        self.assertEqual(_count(clauses, list(range(1, next_var))), 2 ** (size - 1))
+
+  def test_dyadic_reduction(self: TestApproxMC):
+    clauses, blocks = approxmc.dyadic_reduction([[1, 2]], [[(1, 0.4)], [(2, 0.7), (-2, 0.3)]], 3)
+    self.assertEqual(blocks, [3, 4, 5, 6, 7, 8])
+    # the weights are rounded to 3/8 for 1, and 6/8 and 2/8 for 2 and -2
+    self.assertEqual(_count(clauses, [1, 2] + blocks), 3 * 6 + 3 * 2 + 8 * 6)
+    self.assertEqual(approxmc.bounded_count(clauses, [1, 2] + blocks, [], 1000), 72)
+    self.assertEqual(approxmc.bounded_count(clauses, [1, 2] + blocks, [], 50), 50)
+
+  def test_exact_below_threshold(self: TestApproxMC):
+    clauses = [[1, 2], [-1, 3], [2, -3, 4]]
+    self.assertEqual(approxmc.approximate_count(clauses, workers=1), _count(clauses, [1, 2, 3, 4]))
+    self.assertEqual(approxmc.approximate_count(clauses, [1, 2, 5], workers=1), 2 * _count(clauses, [1, 2]))
+
+  def test_estimate(self: TestApproxMC):
+    rng = random.Random(0)
+    epsilon = 0.8
+    for n in (10, 12):
+      clauses = randcnf.random_formula(n, n, 3, rng)
+      expected = _count(clauses, list(range(1, n + 1)))
+      self.assertGreater(expected, approxmc.threshold(epsilon))
+      estimate = approxmc.approximate_count(clauses, epsilon=epsilon, trials=5, workers=1, seed=n)
+      self.assertLessEqual(expected / (1 + epsilon), estimate)
+      self.assertLessEqual(estimate, expected * (1 + epsilon))
+
+  def test_process_pool(self: TestApproxMC):
+    clauses = randcnf.random_formula(11, 11, 3, random.Random(1))
+    self.assertEqual(approxmc.approximate_count(clauses, trials=3, workers=2, seed=7), approxmc.approximate_count(clauses, trials=3, workers=1, seed=7))
+
+  def test_probability_of_evidence(self: TestApproxMC):
+    with open("graphical/test/toy.uai") as file:
+      graph = file.read()
+    expected = probability_of_evidence(io.StringIO(graph), io.StringIO("1 1 2"))
+    estimate = approxmc.approximate_probability_of_evidence(io.StringIO(graph), io.StringIO("1 1 2"), bits=4, trials=3, workers=1, seed=0)
+    self.assertLessEqual(expected / 1.8, estimate)
+    self.assertLessEqual(estimate, expected * 1.8)
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,30 @@
+from __future__ import annotations
+import unittest
+
+import testutils
+from backbone import backbone
+from random_brancher import RandomBrancher
+
+class TestBackbone(unittest.TestCase):
+
+  def test_backbone(self: TestBackbone):
+    # 1 and -3 are implied only by reasoning by cases on 2
+    formula = testutils.formula([[1, 2], [1, -2], [-3, 2, 4], [-3, -2], [-3, -4], [-1, 2, 4]])
+    self.assertEqual(backbone(formula), {1, -3})
+    self.assertEqual(formula.get_current_decision_level(), 0)
+    self.assertGreater(len(formula.formula.formula), formula.formula.num_base_clauses)
+
+  def test_unsatisfiable(self: TestBackbone):
+    self.assertIsNone(backbone(testutils.formula([[1, 2], [1, -2], [-1, 2], [-1, -2]])))
+
+  def test_agrees_with_brute_force(self: TestBackbone):
+    for i, (n, clauses) in enumerate(testutils.random_formulas(80, 3, 9, 1, 5, (2, 3))):
+      models = list(testutils.models(n, clauses))
+      expected = None
+      if models:
+        expected = { v if models[0][v - 1] else -v for v in range(1, n + 1) if all(bits[v - 1] == models[0][v - 1] for bits in models) }
+      formula = testutils.formula(clauses)
+      self.assertEqual(backbone(formula, RandomBrancher.create) if i % 2 else backbone(formula), expected)
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,74 @@
+from __future__ import annotations
+import io
+import random
+import unittest
+
+import batch
+import cdcl
+import randcnf
+import testutils
+
+class TestBatch(unittest.TestCase):
+
+  def test_split_family(self: TestBatch):
+    formulas = [ [[1, 2], [-1, 3], [2, 1], [4]], [[2, 1], [-1, 3], [-4]], [[3, -1], [1, 2], [1, 2]] ]
+    base, deltas = batch.split_family(formulas)
+    self.assertEqual(base, [[1, 2], [-1, 3]])
+    self.assertEqual(deltas, [ [[2, 1], [4]], [[-4]], [[1, 2]] ])
+
+  def test_agrees_with_brute_force(self: TestBatch):
+    rng = random.Random(0)
+    for n, base in testutils.random_formulas(20, 6, 12, 2, 4, rng=rng):
+      formulas = [ base + [ randcnf.random_clause(n, rng.choice((1, 1, 2, 3)), rng) for _ in range(rng.randint(0, 4)) ] for _ in range(8) ]
+      expected = [ batch.SATISFIABLE if testutils.satisfiable(formula) else batch.UNSATISFIED for formula in formulas ]
+      self.assertEqual(batch.solve_family(formulas), expected)
+
+  def test_einsteins(self: TestBatch):
+    names = ["Brit", "Dane", "German", "Norwegian", "Swede"]
+    formulas = []
+    for name in names:
+      with open("Einsteins/{}.cnf".format(name)) as file:
+        formulas.append(randcnf.read_clauses(file))
+    base, deltas = batch.split_family(formulas)
+    self.assertTrue(all(len(delta) == 1 for delta in deltas))
+    solver = batch.FamilySolver(base, deltas)
+    # queries can be answered in any order, and more than once
+    for query in [4, 0, 1, 2, 3, 4, 2]:
+      with open("Einsteins/{}.cnf".format(names[query])) as file:
+        self.assertEqual(solver.solve(query), cdcl.cdcl(file)[0])
+
+  def test_other_activations_are_assumed_false(self: TestBatch):
+    solver = batch.FamilySolver([[1, 2]], [[[-1, 3], [-2, 3]], [[-3, 1], [-3, 2]]])
+    self.assertEqual(solver.activations, [4, 5])
+    for query, other in [(0, 5), (1, 4)]:
+      self.assertEqual(solver.solve(query), batch.SATISFIABLE)
+      self.assertEqual(solver.formula.get_partial_assignment().get_value(other), 0)
+
+  def test_packed_agrees_with_brute_force(self: TestBatch):
+    rng = random.Random(0)
+    formulas = []
+    for _ in range(300):
+      n = rng.randint(1, 8)
+      # with empty, unit, duplicate and tautological clauses
+      formulas.append([ [ rng.choice((-1, 1)) * rng.randint(1, n) for _ in range(rng.choice((0, 1, 2, 3, 3, 4))) ] for _ in range(rng.randint(0, 5 * n)) ])
+    expected = [ batch.SATISFIABLE if testutils.satisfiable(formula) else batch.UNSATISFIED for formula in formulas ]
+    self.assertEqual(batch.solve_batch(formulas), expected)
+    self.assertEqual(batch.solve_batch(formulas, 2), expected)
+
+  def test_packed_test_suite(self: TestBatch):
+    formulas = []
+    expected = []
+    for name in ["poly-4-032-00", "poly-5-100-03", "poly-6-200-07", "poly-7-256-15"]:
+      with open("test_suite/{}.cnf".format(name)) as file:
+        expected.append(cdcl.cdcl(file)[0])
+      with open("test_suite/{}.cnf".format(name)) as file:
+        formulas.append(randcnf.read_clauses(file))
+    packed = batch.PackedFormulas(formulas)
+    self.assertEqual(batch.solve_packed(packed), expected)
+    # formulas are solved in buffers allocated for the largest one, in any order
+    solver = batch.PackedSolver()
+    self.assertEqual([ solver.solve(packed, index) for index in [3, 0, 2, 1, 3] ], [ expected[index] for index in [3, 0, 2, 1, 3] ])
+    self.assertEqual(batch.solve_packed(packed.slice(1, 3)), expected[1:3])
+
+if __name__ == '__main__':
+  unittest.main()
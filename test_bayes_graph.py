@@ -0,0 +1,76 @@
+from __future__ import annotations
+import collections
+import io
+import itertools
+import unittest
+
+from graphical import bayes_graph
+import testutils
+import wmc
+
+GRAPH = """BAYES
+2
+6 2
+2
+1 0
+2 0 1
+
+6
+0.1 0.2 0.0 0.3 0.4 0.0
+
+12
+1.0 0.0
+0.5 0.5
+0.3 0.7
+0 1
+0.9 0.1
+0.2 0.8
+"""
+
+class TestBayesGraph(unittest.TestCase):
+
+  def test_max_1_encodings(self: TestBayesGraph):
+    for name, encode in bayes_graph.MAX_1_ENCODINGS.items():
+      for k in range(1, 11):
+        cnf, next_var = encode([ (1, var) for var in range(k) ], k)
+        clauses = [ [ var + 1 if sign else -var - 1 for sign, var in clause ] for clause in cnf ]
+        completions = collections.Counter(bits[:k] for bits in testutils.models(next_var, clauses))
+        for lits in itertools.product((0, 1), repeat=k):
+          # the auxiliary variables are determined by the literals
+          self.assertEqual(completions[lits], 1 if sum(lits) <= 1 else 0, (name, k, lits))
+
+  def test_encodings_agree(self: TestBayesGraph):
+    for encoding in bayes_graph.MAX_1_ENCODINGS:
+      for deterministic in (False, True):
+        probability = wmc.probability_of_evidence(io.StringIO(GRAPH), io.StringIO("1 1 1"), encoding, deterministic)
+        self.assertAlmostEqual(probability, 0.2 * 0.5 + 0.3 * 1.0 + 0.4 * 0.1, msg=(encoding, deterministic))
+
+  def test_deterministic_parameters_are_clauses(self: TestBayesGraph):
+    graph = bayes_graph.BayesGraph(io.StringIO(GRAPH))
+    weights, _ = graph.to_formula()
+    compact_weights, _ = graph.to_formula(deterministic=True)
+    self.assertEqual(len(weights) - len(compact_weights), 6)
+
+  def test_streaming_matches_in_memory(self: TestBayesGraph):
+    with open("graphical/test/toy.uai") as graph_file:
+      graphs = [GRAPH, graph_file.read()]
+    for graph in graphs:
+      for encoding in bayes_graph.MAX_1_ENCODINGS:
+        for deterministic in (False, True):
+          outputs = []
+          for cls in (bayes_graph.BayesGraph, bayes_graph.StreamingBayesGraph):
+            ffile = io.StringIO()
+            wfile = io.StringIO()
+            cls(io.StringIO(graph)).to_formula_file_with_evidence(io.StringIO("1 1 1"), ffile, wfile, encoding, deterministic)
+            formula_lines = ffile.getvalue().splitlines()
+            weights_lines = wfile.getvalue().splitlines()
+            outputs.append((formula_lines[0].split(), sorted(formula_lines[1:]), weights_lines[0].split(), weights_lines[1:]))
+          self.assertEqual(outputs[0], outputs[1], (encoding, deterministic))
+
+  def test_read_tokens_across_chunks(self: TestBayesGraph):
+    text = "12 0.25 0.75\n\n3  4.5\t6 "
+    for chunk_size in range(1, 8):
+      self.assertEqual(list(bayes_graph.read_tokens(io.StringIO(text), chunk_size)), text.split())
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,29 @@
+from __future__ import annotations
+import json
+import os
+import tempfile
+import unittest
+
+import benchmark_suite
+
+class TestBenchmarkSuite(unittest.TestCase):
+
+  def test_reproducible(self: TestBenchmarkSuite):
+    specs = benchmark_suite.poly_3cnf_specs(7, min_num_clauses=32, max_num_clauses=40, step=4, instances=2)
+    self.assertEqual(specs, benchmark_suite.poly_3cnf_specs(7, min_num_clauses=32, max_num_clauses=40, step=4, instances=2))
+    self.assertEqual(len(specs), 6)
+    with tempfile.TemporaryDirectory() as first, tempfile.TemporaryDirectory() as second:
+      manifest = benchmark_suite.gen_labelled_suite(first, specs, 2)
+      benchmark_suite.gen_labelled_suite(second, specs, 1)
+      for entry in manifest:
+        with open(os.path.join(first, entry["file"])) as f1, open(os.path.join(second, entry["file"])) as f2:
+          lines = f1.read()
+          self.assertEqual(lines, f2.read())
+          self.assertEqual(lines.splitlines()[1], "c {}".format(entry["expected"]))
+      with open(os.path.join(first, benchmark_suite.MANIFEST_FILENAME)) as file:
+        self.assertEqual([ e["file"] for e in json.load(file) ], [ s[0] for s in specs ])
+
+  def test_generate_instance(self: TestBenchmarkSuite):
+    formula = benchmark_suite.generate_instance(4, 32, 3, 0)
+    self.assertEqual(formula, benchmark_suite.generate_instance(4, 32, 3, 0))
+    self.assertEqual({ abs(l) for clause in formula for l in clause }, { 1, 2, 3, 4 })
@@ -0,0 +1,68 @@
+from __future__ import annotations
+import io
+import threading
+import unittest
+
+import budget
+import cdcl
+import testutils
+from budget import Budget
+from propagating_formula import PropagatingFormula
+from vsids_brancher import VSIDSBrancher
+
+class TestBudget(unittest.TestCase):
+
+  def test_conflict_budget(self: TestBudget):
+    state, stats = cdcl.cdcl_budgeted(testutils.pigeonhole(5), Budget(max_conflicts=10), VSIDSBrancher.create)
+    self.assertEqual(state, cdcl.UNKNOWN)
+    self.assertEqual(stats.stop_reason, budget.CONFLICTS)
+    # a learned clause may lead to another conflict before the next decision
+    self.assertGreaterEqual(stats.conflicts, 10)
+    self.assertEqual(stats.learned_clauses, stats.conflicts)
+    self.assertGreater(stats.decisions, 0)
+    self.assertGreater(stats.propagations, 0)
+
+  def test_propagation_budget(self: TestBudget):
+    state, stats = cdcl.cdcl_budgeted(testutils.pigeonhole(5), Budget(max_propagations=50), VSIDSBrancher.create)
+    self.assertEqual(state, cdcl.UNKNOWN)
+    self.assertEqual(stats.stop_reason, budget.PROPAGATIONS)
+    self.assertGreaterEqual(stats.propagations, 50)
+
+  def test_time_budget(self: TestBudget):
+    state, stats = cdcl.cdcl_budgeted(testutils.pigeonhole(7), Budget(max_seconds=0.2), VSIDSBrancher.create)
+    self.assertEqual(state, cdcl.UNKNOWN)
+    self.assertEqual(stats.stop_reason, budget.TIME)
+    self.assertGreaterEqual(stats.elapsed(), 0.2)
+    self.assertEqual(stats.as_dict()["stop_reason"], budget.TIME)
+
+  def test_interrupt(self: TestBudget):
+    limits = Budget()
+    timer = threading.Timer(0.2, limits.interrupt)
+    timer.start()
+    state, stats = cdcl.cdcl_budgeted(testutils.pigeonhole(7), limits, VSIDSBrancher.create)
+    timer.join()
+    self.assertEqual(state, cdcl.UNKNOWN)
+    self.assertEqual(stats.stop_reason, budget.INTERRUPTED)
+    self.assertTrue(limits.is_interrupted())
+    limits.clear()
+    self.assertIsNone(limits.exhausted(stats))
+
+  def test_resume(self: TestBudget):
+    formula = testutils.pigeonhole(4)
+    conflicts = 0
+    state = cdcl.UNKNOWN
+    while state == cdcl.UNKNOWN:
+      state, stats = cdcl.cdcl_budgeted(formula, Budget(max_conflicts=5), VSIDSBrancher.create)
+      conflicts += stats.conflicts
+    self.assertEqual(state, cdcl.UNSATISFIED)
+    self.assertIsNone(stats.stop_reason)
+    self.assertGreater(conflicts, 5)
+
+  def test_no_budget(self: TestBudget):
+    state, stats = cdcl.cdcl_budgeted(PropagatingFormula(io.StringIO("p cnf 2 2\n1 2 0\n-1 0\n")), None)
+    self.assertEqual(state, cdcl.SATISFIABLE)
+    self.assertEqual(stats.propagations, 0)
+    self.assertIsNotNone(stats.end_time)
+
+if __name__ == '__main__':
+  unittest.main()
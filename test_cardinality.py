@@ -0,0 +1,97 @@
+from __future__ import annotations
+import io
+import random
+import unittest
+
+import cdcl
+import testutils
+from assignment import Assignment
+from cardinality import CardinalityEngine, CardinalityReason, read_cardinality_cnf
+from cardinality_propagating_formula import CardinalityPropagatingFormula
+from vsids_brancher import VSIDSBrancher
+
+def _pigeonhole(holes: int) -> str:
+  """The pigeonhole formula of `testutils.pigeonhole_formula`, with a cardinality constraint for each hole instead of its clauses
+  """
+  lines = testutils.formula_text(testutils.pigeonhole_formula(holes)[:holes + 1]).splitlines(keepends=True)
+  for hole in range(holes):
+    lines.append(" ".join([ str(pigeon * holes + hole + 1) for pigeon in range(holes + 1) ]) + " <= 1\n")
+  return "".join(lines)
+
+class TestCardinality(unittest.TestCase):
+
+  def test_read_cardinality_cnf(self: TestCardinality):
+    lines, constraints = read_cardinality_cnf(io.StringIO("p cnf 4 3\n1 -2 0\n1 2 3 <= 1\n-2 4 = 1\n"))
+    self.assertEqual(lines, ["p cnf 2 1\n", "1 -2 0\n"])
+    self.assertEqual(constraints, [([1, 2, 3], 1), ([-2, 4], 1), ([2, -4], 1)])
+
+  def test_engine(self: TestCardinality):
+    assignment = Assignment({1, 2, 3, 4})
+    engine = CardinalityEngine([([1, 2, 3, -4], 2)], assignment)
+    assignment.add_assignment(1, 1, 1, None)
+    self.assertEqual(engine.propagate(), ([], []))
+    assignment.add_assignment(2, 4, 0, None)
+    self.assertEqual(engine.propagate(), ([(-2, 0), (-3, 0)], []))
+    assignment.add_assignment(2, 2, 1, None)
+    self.assertEqual(engine.propagate(), ([], [-2, 4, -1]))
+    # counts are restored on backtracking
+    assignment.backtrack(1)
+    self.assertEqual(engine.propagate(), ([], []))
+    self.assertEqual(engine.true_counts, [1])
+    assignment.add_assignment(2, 3, 1, None)
+    self.assertEqual(engine.propagate(), ([(-2, 0), (4, 0)], []))
+    self.assertEqual(engine.true_counts, [2])
+    # assignments made and undone between two calls are uncounted as they are undone
+    assignment.add_assignment(3, 2, 1, None)
+    assignment.backtrack(2)
+    self.assertEqual(engine.true_counts, [2])
+    assignment.add_assignment(2, 2, 0, CardinalityReason(engine, 0, -2))
+    self.assertEqual(assignment.get_antecedent(2).get_assigned_vars(assignment), [2, 1, 3])
+
+  def test_explanations_precede_implications(self: TestCardinality):
+    assignment = Assignment({1, 2, 3})
+    engine = CardinalityEngine([([1, 2, 3], 1)], assignment)
+    assignment.add_assignment(1, 1, 1, None)
+    self.assertEqual(engine.propagate(), ([(-2, 0), (-3, 0)], []))
+    assignment.add_assignment(1, 2, 0, CardinalityReason(engine, 0, -2))
+    # a literal that is made true after the implication does not explain it
+    assignment.add_assignment(1, 3, 1, None)
+    self.assertEqual(engine.explain(0, -2), [-2, -1])
+
+  def test_agrees_with_brute_force(self: TestCardinality):
+    rng = random.Random(0)
+    for _ in range(150):
+      n = rng.randint(4, 9)
+      clauses = [ [ v * rng.choice((1, -1)) for v in rng.sample(range(1, n + 1), rng.randint(1, 3)) ] for _ in range(rng.randint(0, 10)) ]
+      constraints = []
+      for _ in range(rng.randint(1, 4)):
+        lits = [ v * rng.choice((1, -1)) for v in rng.sample(range(1, n + 1), rng.randint(1, min(n, 6))) ]
+        constraints.append((lits, rng.choice(("<=", ">=", "=")), rng.randint(0, len(lits))))
+      def meets_constraints(bits) -> bool:
+        for lits, op, k in constraints:
+          count = sum(1 for l in lits if (l > 0) == (bits[abs(l) - 1] == 1))
+          if (op == "<=" and count > k) or (op == ">=" and count < k) or (op == "=" and count != k):
+            return False
+        return True
+      body = "p cnf {} {}\n".format(n, len(clauses) + len(constraints))
+      body += "".join([ " ".join(map(str, clause)) + " 0\n" for clause in clauses ])
+      body += "".join([ " ".join(map(str, lits)) + " {} {}\n".format(op, k) for lits, op, k in constraints ])
+      expected = any(meets_constraints(bits) for bits in testutils.models(n, clauses))
+      formula = CardinalityPropagatingFormula(io.StringIO(body))
+      state, _ = cdcl.cdcl_formula(formula)
+      self.assertEqual(state == cdcl.SATISFIABLE, expected)
+      if expected:
+        assignment = formula.get_partial_assignment()
+        bits = [ assignment.get_value(v) for v in range(1, n + 1) ]
+        self.assertTrue(testutils.satisfies(bits, clauses) and meets_constraints(bits))
+
+  def test_variable_implied_before_the_brancher_is_created(self: TestCardinality):
+    # 1 only appears in constraints, and is implied as the formula is constructed
+    formula = CardinalityPropagatingFormula(io.StringIO("p cnf 5 5\n-2 3 0\n2 4 0\n2 5 0\n-1 <= 0\n1 2 3 <= 2\n"))
+    self.assertEqual(cdcl.cdcl_budgeted(formula, None, VSIDSBrancher.create)[0], cdcl.SATISFIABLE)
+
+  def test_pigeonhole(self: TestCardinality):
+    self.assertEqual(cdcl.cdcl_formula(CardinalityPropagatingFormula(io.StringIO(_pigeonhole(4))))[0], cdcl.UNSATISFIED)
+
+if __name__ == '__main__':
+  unittest.main()
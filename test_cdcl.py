@@ -0,0 +1,33 @@
+from __future__ import annotations
+import random
+import unittest
+
+import cdcl
+import testutils
+from random_brancher import RandomBrancher
+from vsids_brancher import VSIDSBrancher
+
+class TestCDCL(unittest.TestCase):
+
+  def test_chronological_backtracking(self: TestCDCL):
+    for n, clauses in testutils.random_formulas(60, 6, 12, 2, 6):
+      expected = cdcl.SATISFIABLE if testutils.satisfiable(clauses) else cdcl.UNSATISFIED
+      for threshold, trail_saving in [(None, False), (0, False), (1, False), (None, True), (1, True)]:
+        formula = testutils.formula(clauses)
+        state, _ = cdcl.cdcl_budgeted(formula, None, VSIDSBrancher.create, chrono_threshold=threshold, trail_saving=trail_saving)
+        self.assertEqual(state, expected)
+        if state == cdcl.SATISFIABLE:
+          assignment = formula.get_partial_assignment()
+          self.assertTrue(testutils.satisfies([ assignment.get_value(v) for v in range(1, n + 1) ], clauses))
+
+  def test_conflict_of_unit_clause_above_level_0(self: TestCDCL):
+    # random decisions lead to conflicts that follow only from learned unit clauses implied above decision level 0
+    clauses = [[-1, 2, -4], [-4, -5, -3], [-3, 6, -1], [1, 5, -4], [-4, 5, -6], [3, 5, -4], [4, 2], [-3, -5, 2], [6, -1, -5], [-3, -5, 1], [-3, -4], [3, -4, -6], [5, -6], [3, 6], [6, -1, 2], [5, -3], [-5, -4, 2], [4, -6], [4, 6, -1], [1, 5, -6], [-1, 3, -4], [1, 6, 3], [2, -6], [3, -1], [1, -6], [-4, -1, 3], [-3, 2, -5], [6, 4, -5]]
+    for threshold in [0, 1]:
+      for seed in range(100):
+        random.seed(seed)
+        state, _ = cdcl.cdcl_budgeted(testutils.formula(clauses), None, RandomBrancher.create, chrono_threshold=threshold)
+        self.assertEqual(state, cdcl.UNSATISFIED)
+
+if __name__ == '__main__':
+  unittest.main()
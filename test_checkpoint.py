@@ -0,0 +1,86 @@
+from __future__ import annotations
+import io
+import os
+import tempfile
+import unittest
+
+import cdcl
+import testutils
+from budget import Budget, SolverStats
+from checkpoint import Checkpoint, Checkpointer, resume, source_digest
+from vsids_brancher import VSIDSBrancher
+
+class TestCheckpoint(unittest.TestCase):
+
+  def setUp(self: TestCheckpoint):
+    self.directory = tempfile.TemporaryDirectory()
+    self.path = os.path.join(self.directory.name, "solve.ckpt")
+
+  def tearDown(self: TestCheckpoint):
+    self.directory.cleanup()
+
+  def test_round_trip(self: TestCheckpoint):
+    stats = SolverStats()
+    stats.decisions, stats.conflicts, stats.propagations, stats.learned_clauses = 7, 3, 40, 3
+    checkpoint = Checkpoint([[1, -2, 3], [-1], [2, -3]], 2, stats.finish(), bytes(range(32)))
+    checkpoint.scores = { 1: 5, 2: 2 ** 40, 3: 0 }
+    checkpoint.signs = { 1: 1, 2: 0, 3: 1 }
+    checkpoint.bonus = 9
+    checkpoint.max_score = 2 ** 40
+    checkpoint.saved_phases = { 3: 0 }
+    file = io.BytesIO()
+    checkpoint.write(file)
+    file.seek(0)
+    loaded = Checkpoint.read(file)
+    self.assertEqual(file.read(), b"")
+    self.assertEqual(loaded.clauses, checkpoint.clauses)
+    self.assertEqual(loaded.num_base_clauses, 2)
+    self.assertEqual(loaded.source, bytes(range(32)))
+    self.assertEqual(loaded.scores, checkpoint.scores)
+    self.assertEqual(loaded.signs, checkpoint.signs)
+    self.assertEqual((loaded.bonus, loaded.max_score), (9, 2 ** 40))
+    self.assertEqual(loaded.saved_phases, { 3: 0 })
+    self.assertEqual((loaded.stats.decisions, loaded.stats.conflicts, loaded.stats.propagations, loaded.stats.learned_clauses), (7, 3, 40, 3))
+    self.assertAlmostEqual(loaded.stats.elapsed(), stats.elapsed(), places=6)
+
+    with self.assertRaises(Exception):
+      Checkpoint.read(io.BytesIO(file.getvalue()[:-3]))
+    with self.assertRaises(Exception):
+      Checkpoint.read(io.BytesIO(b"notackpt" + file.getvalue()[8:]))
+
+  def test_resume(self: TestCheckpoint):
+    formula = testutils.pigeonhole(5)
+    num_base_clauses = len(formula.formula.formula)
+    input_path = os.path.join(self.directory.name, "input.cnf")
+    with open(input_path, "w") as file:
+      file.write("p cnf 1 1\n1 0\n")
+    source = source_digest(input_path)
+    checkpointer = Checkpointer(self.path, interval_conflicts=10, source=source)
+    state, stats = cdcl.cdcl_budgeted(formula, Budget(max_conflicts=40), VSIDSBrancher.create, checkpointer)
+    self.assertEqual(state, cdcl.UNKNOWN)
+    self.assertTrue(os.path.exists(self.path))
+    self.assertFalse(os.path.exists(self.path + ".partial"))
+
+    with open(input_path, "a") as file:
+      file.write("-1 0\n")
+    with self.assertRaises(Exception):
+      resume(self.path, source_digest(input_path))
+    resumed, checkpoint = resume(self.path, source)
+    self.assertEqual(resumed.get_current_decision_level(), 0)
+    self.assertEqual(resumed.formula.num_base_clauses, num_base_clauses)
+    self.assertEqual(len(resumed.formula.formula), num_base_clauses + stats.learned_clauses)
+    self.assertEqual(checkpoint.stats.conflicts, stats.conflicts)
+    self.assertIsNotNone(checkpoint.scores)
+
+    brancher = checkpoint.restoring(VSIDSBrancher.create)(resumed)
+    self.assertEqual(brancher.scores, checkpoint.scores)
+    self.assertEqual(brancher.bonus, checkpoint.bonus)
+
+    state, more_stats = cdcl.cdcl_budgeted(resumed, None, checkpoint.restoring(VSIDSBrancher.create), Checkpointer(self.path, interval_conflicts=10, previous=checkpoint.stats))
+    self.assertEqual(state, cdcl.UNSATISFIED)
+    total = Checkpoint.load(self.path).stats
+    self.assertGreaterEqual(total.conflicts, stats.conflicts)
+    self.assertLessEqual(total.conflicts, stats.conflicts + more_stats.conflicts)
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,32 @@
+from __future__ import annotations
+import io
+import unittest
+
+import dpll
+import testutils
+
+def _parse(formula_str: str) -> dpll.IndexedFormula:
+  return dpll.parse_cnf(io.StringIO(formula_str))[0]
+
+class TestDPLL(unittest.TestCase):
+
+  def test_iterative_agrees_with_recursive(self: TestDPLL):
+    for _, formula in testutils.random_formulas(100, 5, 20, 2, 4.5):
+      text = testutils.formula_text(formula)
+      ind_formula = _parse(text)
+      before = sorted(sorted(clause) for clause in ind_formula[0].values())
+      result = dpll.dpll_iterative(ind_formula)
+      # the undo log restores the formula it was given
+      self.assertEqual(sorted(sorted(clause) for clause in ind_formula[0].values()), before)
+      self.assertEqual(result, dpll.dpll(_parse(text), 0))
+
+  def test_undo_restores_indexes(self: TestDPLL):
+    ind_formula = _parse("p cnf 3 4\n1 2 0\n-1 3 0\n-1 2 0\n-2 -3 0\n")
+    formula, vars_ind, size_ind = ind_formula
+    before = ({ k: set(v) for k, v in formula.items() }, { k: (set(v[0]), set(v[1])) for k, v in vars_ind.items() }, { k: set(v) for k, v in size_ind.items() })
+    undo: list = []
+    self.assertTrue(dpll.assign_logged(ind_formula, 1, dpll.TRUE, undo, set()))
+    self.assertEqual(len(size_ind[1]), 2)
+    self.assertFalse(dpll.propagate_logged(ind_formula, undo, set()))
+    dpll.undo_to(ind_formula, undo, 0)
+    self.assertEqual((formula, vars_ind, size_ind), before)
@@ -0,0 +1,68 @@
+from __future__ import annotations
+import io
+import itertools
+import unittest
+
+import cdcl
+import encoder
+
+class TestEncoder(unittest.TestCase):
+
+  def test_variable_pool(self: TestEncoder):
+    pool = encoder.VariablePool()
+    self.assertEqual(pool.var(("Owns", "Brit", 1)), 1)
+    self.assertEqual(pool.var("x"), 2)
+    self.assertEqual(pool.var(("Owns", "Brit", 1)), 1)
+    self.assertEqual(pool.fresh(), 3)
+    names = io.StringIO()
+    pool.write_name_map(names)
+    self.assertEqual(names.getvalue(), "1 Owns.Brit.1\n2 x\n3 aux.3\n")
+    self.assertEqual(pool.decode({ 1: 1, 2: 0 }), { ("Owns", "Brit", 1): True, "x": False })
+
+  def test_dimacs_sink(self: TestEncoder):
+    files = [ io.StringIO(), io.StringIO() ]
+    sinks = [ encoder.DimacsSink(file) for file in files ]
+    enc = encoder.Encoder(encoder.TeeSink(sinks))
+    enc.exactly_one([ enc.var(i) for i in range(3) ])
+    sinks[1].add_clause([-enc.var(0)])
+    enc.close()
+    self.assertEqual(files[0].getvalue().split("\n", 1)[1], "1 2 3 0\n-1 -2 0\n-1 -3 0\n-2 -3 0\n")
+    self.assertEqual(files[1].getvalue().split("\n", 1)[1], "1 2 3 0\n-1 -2 0\n-1 -3 0\n-2 -3 0\n-1 0\n")
+    for file, num_clauses in zip(files, (4, 5)):
+      self.assertEqual(file.getvalue().split("\n", 1)[0].split(), ["p", "cnf", "3", str(num_clauses)])
+      file.seek(0)
+      self.assertEqual(cdcl.cdcl(file)[0], cdcl.SATISFIABLE)
+
+  def test_dimacs_sink_writes_largest_variable(self: TestEncoder):
+    file = io.StringIO()
+    sink = encoder.DimacsSink(file)
+    sink.add_clause([1, -5])
+    sink.add_clause([-1])
+    sink.close()
+    self.assertEqual(file.getvalue().split("\n", 1)[0].split(), ["p", "cnf", "5", "2"])
+    file.seek(0)
+    self.assertEqual(cdcl.cdcl(file)[0], cdcl.SATISFIABLE)
+
+  def test_exactly_one_encodings(self: TestEncoder):
+    for encoding in ("pairwise", "sequential", "commander"):
+      for k in range(1, 9):
+        for forced in itertools.combinations(range(k), 2):
+          sink = encoder.SolverSink()
+          enc = encoder.Encoder(sink)
+          lits = [ enc.var(("x", i)) for i in range(k) ]
+          enc.exactly_one(lits, encoding)
+          for i in forced:
+            enc.add([lits[i]])
+          self.assertEqual(sink.solve(), (cdcl.UNSATISFIED, None))
+        sink = encoder.SolverSink()
+        enc = encoder.Encoder(sink)
+        lits = [ enc.var(("x", i)) for i in range(k) ]
+        enc.exactly_one(lits, encoding)
+        enc.add([lits[-1]])
+        state, model = sink.solve()
+        self.assertEqual(state, cdcl.SATISFIABLE)
+        decoded = enc.pool.decode(model)
+        self.assertEqual([ decoded[("x", i)] for i in range(k) ], [False] * (k - 1) + [True])
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,42 @@
+from __future__ import annotations
+import random
+import unittest
+
+import testutils
+from enumeration import enumerate_models
+from random_brancher import RandomBrancher
+
+class TestEnumeration(unittest.TestCase):
+
+  def test_all_models(self: TestEnumeration):
+    models = list(enumerate_models(testutils.formula([[1, 2], [-1, 3]])))
+    self.assertEqual(sorted(tuple(sorted(model.items())) for model in models), [
+      ((1, 0), (2, 1), (3, 0)),
+      ((1, 0), (2, 1), (3, 1)),
+      ((1, 1), (2, 0), (3, 1)),
+      ((1, 1), (2, 1), (3, 1)),
+    ])
+
+  def test_unsatisfiable(self: TestEnumeration):
+    self.assertEqual(list(enumerate_models(testutils.formula([[1], [-1]]))), [])
+
+  def test_single_implied_model(self: TestEnumeration):
+    self.assertEqual(list(enumerate_models(testutils.formula([[1], [-1, -2]]))), [{ 1: 1, 2: 0 }])
+
+  def test_agrees_with_brute_force(self: TestEnumeration):
+    rng = random.Random(0)
+    for i, (n, clauses) in enumerate(testutils.random_formulas(60, 3, 9, 1, 4, rng=rng)):
+      projection = set(rng.sample(range(1, n + 1), rng.randint(1, n))) if i % 2 else None
+      create_brancher = RandomBrancher.create if i % 3 else None
+      formula = testutils.formula(clauses)
+      if create_brancher is None:
+        found = list(enumerate_models(formula, projection))
+      else:
+        found = list(enumerate_models(formula, projection, create_brancher))
+      found_keys = [ tuple(sorted(model.items())) for model in found ]
+      self.assertEqual(len(found_keys), len(set(found_keys)))
+      projected = projection if projection is not None else range(1, n + 1)
+      self.assertEqual(set(found_keys), { tuple(sorted((v, bits[v - 1]) for v in projected)) for bits in testutils.models(n, clauses) })
+
+if __name__ == '__main__':
+  unittest.main()
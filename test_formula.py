@@ -34,6 +34,13 @@ class TestFormula(unittest.TestCase):
     formula = Formula(PHIU)
     self.assertEqual(formula.unit_clauses, set([formula.formula[1], formula.formula[2]]))
 
+  def test_variable_count(self: TestFormula):
+    # the count may be the number of distinct variables or the largest variable
+    Formula(io.StringIO("p cnf 2 2\n1 -5 0\n-1 0\n"))
+    Formula(io.StringIO("p cnf 5 2\n1 -5 0\n-1 0\n"))
+    with self.assertRaises(Exception):
+      Formula(io.StringIO("p cnf 4 2\n1 -5 0\n-1 0\n"))
+
   def test_formula(self: TestFormula):
     """
     10 = 0 @ 0
@@ -1008,4 +1015,42 @@ class TestFormula(unittest.TestCase):
     self.assertEqual(len(formula.assignment), 12)
     self.assertEqual(formula.unit_clauses, set())
     self.assertEqual(formula.unsat_clauses, set())
-    self.assertEqual(formula.decision_level, 7)
\ No newline at end of file
+    self.assertEqual(formula.decision_level, 7)
+
+  def test_add_falsified_clause(self: TestFormula):
+    formula = Formula(io.StringIO("p cnf 4 2\n1 2 3 4 0\n-1 -2 -3 -4 0\n"))
+    formula.assign(1, 2, 1, None)
+    formula.assign(2, 3, 1, None)
+    formula.assign(3, 1, 1, None)
+    # falsified at decision level 3, though its last literal is assigned at decision level 1
+    formula.add_clause([-3, -1, -2])
+    self.assertEqual(formula.state_history, [
+      Formula.UNRESOLVED,
+      Formula.UNRESOLVED,
+      Formula.UNRESOLVED,
+      Formula.UNSATISFIED
+    ])
+    self.assertEqual([ clause.clause for clause in formula.unsat_clauses ], [[-3, -1, -2]])
+    formula.backtrack(2)
+    self.assertEqual(formula.get_current_state(), Formula.UNRESOLVED)
+    self.assertEqual(formula.unsat_clauses, set())
+    self.assertEqual([ clause.clause for clause in formula.unit_clauses ], [[-3, -1, -2]])
+
+  def test_add_clause_satisfied_below_current_level(self: TestFormula):
+    formula = Formula(io.StringIO("p cnf 4 2\n1 2 3 4 0\n-1 -2 -3 -4 0\n"))
+    formula.assign(1, 1, 1, None)
+    formula.assign(2, 2, 1, None)
+    formula.assign(3, 3, 1, None)
+    clause = formula.add_clause([-4, 1])
+    self.assertEqual(formula.state_history, [
+      Formula.UNRESOLVED,
+      Formula.UNRESOLVED,
+      Formula.UNRESOLVED,
+      Formula.UNRESOLVED
+    ])
+    formula.backtrack(2)
+    self.assertNotIn(clause, formula.unit_clauses)
+    # the clause is watched again once its satisfied literal is unassigned
+    formula.backtrack(0)
+    formula.assign(1, 1, 0, None)
+    self.assertIn(clause, formula.unit_clauses)
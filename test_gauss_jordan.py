@@ -0,0 +1,72 @@
+from __future__ import annotations
+import io
+import unittest
+
+import cdcl
+from assignment import Assignment
+from gauss_jordan import GaussJordan, detect_xors
+from xor_propagating_formula import XorPropagatingFormula
+
+class TestGaussJordan(unittest.TestCase):
+
+  def test_detect_xors(self: TestGaussJordan):
+    # x1 + x2 + x3 = 1, and an incomplete group for x2 + x4
+    clauses = [[1, 2, 3], [1, -2, -3], [-1, 2, -3], [-1, -2, 3], [2, 4]]
+    self.assertEqual(detect_xors(clauses), [([1, 2, 3], 1)])
+    # x1 + x2 = 0
+    self.assertEqual(detect_xors([[1, -2], [-1, 2]]), [([1, 2], 0)])
+
+  def test_implication_across_rows(self: TestGaussJordan):
+    # x1 + x2 + x3 = 1 and x2 + x3 + x4 = 0 imply x1 + x4 = 1
+    engine = GaussJordan([([1, 2, 3], 1), ([2, 3, 4], 0)])
+    assignment = Assignment({1, 2, 3, 4})
+    assignment.add_assignment(1, 1, 0, None)
+    self.assertEqual(engine.propagate(assignment), [[1, 4]])
+    assignment.add_assignment(1, 4, 0, None)
+    self.assertEqual(engine.propagate(assignment), [[1, 4]])
+
+  def test_matrix_kept_between_calls(self: TestGaussJordan):
+    engine = GaussJordan([([1, 2, 3], 1), ([3, 4, 5], 0)])
+    assignment = Assignment({1, 2, 3, 4, 5})
+    assignment.add_assignment(1, 2, 0, None)
+    self.assertEqual(engine.propagate(assignment), [])
+    pivots = list(engine.pivots)
+    # no pivot column is assigned, so no row is given a new pivot
+    assignment.add_assignment(2, 5, 1, None)
+    self.assertEqual(engine.propagate(assignment), [])
+    self.assertEqual(engine.pivots, pivots)
+    # the pivot column 1 is assigned, so its row is given a new pivot, and both rows become unit
+    assignment.add_assignment(3, 1, 1, None)
+    self.assertEqual(engine.propagate(assignment), [[-1, 2, 4, -5], [-1, 2, -3]])
+    assignment.backtrack(1)
+    self.assertEqual(engine.propagate(assignment), [])
+    assignment.add_assignment(2, 1, 0, None)
+    self.assertEqual(engine.propagate(assignment), [[1, 2, 3]])
+
+  def test_explanations_are_not_added(self: TestGaussJordan):
+    # x1 + x2 + x3 = 1 and x2 + x3 + x4 = 0, which imply x1 + x4 = 1
+    clauses = [[1, 2, 3], [1, -2, -3], [-1, 2, -3], [-1, -2, 3], [-2, -3, -4], [-2, 3, 4], [2, -3, 4], [2, 3, -4]]
+    body = "p cnf 4 8\n" + "".join([ " ".join(map(str, clause)) + " 0\n" for clause in clauses ])
+    formula = XorPropagatingFormula(io.StringIO(body))
+    for _ in range(2):
+      formula.assign(1, 0)
+      antecedent = formula.get_partial_assignment().get_antecedent(4)
+      self.assertIsNotNone(antecedent)
+      self.assertEqual(sorted(antecedent.clause), [1, 4])
+      self.assertEqual(formula.get_partial_assignment().get_value(4), 1)
+      formula.backtrack(0)
+    self.assertEqual(len(formula.formula.formula), len(clauses))
+
+  def test_parity_instances(self: TestGaussJordan):
+    for filename in ["dubois20.cnf", "dubois21.cnf", "dubois22.cnf"]:
+      with open("test/" + filename) as file:
+        self.assertEqual(cdcl.cdcl_formula(XorPropagatingFormula(file))[0], cdcl.UNSATISFIED)
+    with open("test/par8-1-c.cnf") as file:
+      formula = XorPropagatingFormula(file)
+    self.assertEqual(cdcl.cdcl_formula(formula)[0], cdcl.SATISFIABLE)
+    assignment = formula.get_partial_assignment()
+    for clause in formula.formula.formula:
+      self.assertTrue(any((l > 0) == (assignment.get_value(abs(l)) == 1) for l in clause.clause))
+
+if __name__ == '__main__':
+  unittest.main()
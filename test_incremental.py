@@ -0,0 +1,49 @@
+from __future__ import annotations
+import unittest
+
+import testutils
+from budget import Budget
+from incremental import IncrementalSolver, SATISFIABLE, UNKNOWN, UNSATISFIED
+
+class TestIncremental(unittest.TestCase):
+
+  def test_assumptions(self: TestIncremental):
+    solver = IncrementalSolver([[-1, 2], [-2, 3], [-4, -3]], num_vars=5)
+    self.assertEqual(solver.solve([1]), SATISFIABLE)
+    self.assertEqual(solver.model[3], 1)
+    self.assertEqual(solver.solve([5, 1, 4]), UNSATISFIED)
+    self.assertEqual(sorted(solver.core), [1, 4])
+    self.assertEqual(solver.solve([4]), SATISFIABLE)
+    self.assertEqual(solver.model[1], 0)
+
+  def test_new_variables_and_clauses(self: TestIncremental):
+    solver = IncrementalSolver([[1, 2]], num_vars=3)
+    self.assertEqual(solver.solve([-1, -3]), SATISFIABLE)
+    v = solver.new_var()
+    solver.add_clause([-2, v])
+    solver.add_clause([-v, 3])
+    self.assertEqual(solver.solve([-1, -3]), UNSATISFIED)
+    self.assertEqual(sorted(solver.core), [-3, -1])
+    solver.add_clause([1, 1])
+    self.assertEqual(solver.solve([-3]), SATISFIABLE)
+    self.assertEqual(solver.solve([-1]), UNSATISFIED)
+    self.assertEqual(solver.core, [-1])
+    solver.add_clause([])
+    self.assertEqual(solver.solve(), UNSATISFIED)
+    self.assertEqual(solver.core, [])
+
+  def test_empty_initial_clause(self: TestIncremental):
+    solver = IncrementalSolver([[1], []])
+    self.assertEqual(solver.solve(), UNSATISFIED)
+    self.assertEqual(solver.core, [])
+
+  def test_budget(self: TestIncremental):
+    solver = IncrementalSolver(testutils.pigeonhole_formula(5), chrono_threshold=0, trail_saving=True)
+    self.assertEqual(solver.solve([], Budget(max_conflicts=5)), UNKNOWN)
+    self.assertIsNone(solver.core)
+    self.assertGreaterEqual(solver.stats.conflicts, 5)
+    self.assertEqual(solver.solve(), UNSATISFIED)
+    self.assertEqual(solver.core, [])
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,76 @@
+from __future__ import annotations
+import random
+import unittest
+
+import cdcl
+import randcnf
+import testutils
+from budget import Budget, CONFLICTS, INTERRUPTED
+from local_search import LocalSearch, PROBSAT, WALKSAT, cdcl_with_local_search
+from propagating_formula import PropagatingFormula
+from vsids_brancher import VSIDSBrancher
+
+class TestLocalSearch(unittest.TestCase):
+
+  def test_incremental_counts(self: TestLocalSearch):
+    rng = random.Random(0)
+    clauses = randcnf.random_formula(12, 50, 3, rng)
+    search = LocalSearch(clauses, 12, rng=rng)
+    search.reset()
+    for _ in range(200):
+      search.flip(rng.randint(1, 12))
+      true_lits = [ [ l for l in clause if (l > 0) == (search.values[abs(l)] == 1) ] for clause in clauses ]
+      self.assertEqual(search.true_counts, [ len(lits) for lits in true_lits ])
+      self.assertEqual(sorted(search.unsat), [ c for c, lits in enumerate(true_lits) if not lits ])
+      for c in search.unsat:
+        self.assertEqual(search.unsat[search.unsat_positions[c]], c)
+      self.assertEqual(search.break_counts[1:], [ sum(1 for lits in true_lits if lits and { abs(l) for l in lits } == {v}) for v in range(1, 13) ])
+
+  def test_solve(self: TestLocalSearch):
+    rng = random.Random(1)
+    for algorithm in (PROBSAT, WALKSAT):
+      clauses = randcnf.random_formula(100, 380, 3, rng)
+      search = LocalSearch(clauses, 100, algorithm, rng=rng)
+      model = search.solve(100000, 5)
+      self.assertIsNotNone(model)
+      self.assertTrue(testutils.satisfies([ model[v] for v in range(1, 101) ], clauses))
+      self.assertEqual(search.best_unsat_count, 0)
+
+  def test_unsatisfiable(self: TestLocalSearch):
+    search = LocalSearch([[1, 2], [-1, 2], [1, -2], [-1, -2]], 2, rng=random.Random(0))
+    self.assertIsNone(search.solve(100, 2))
+    self.assertEqual(search.best_unsat_count, 1)
+    self.assertEqual(search.flips, 200)
+
+  def test_cdcl_with_local_search(self: TestLocalSearch):
+    rng = random.Random(2)
+    clauses = randcnf.random_formula(60, 230, 3, rng)
+    formula = testutils.formula(clauses)
+    brancher = None
+    def create_brancher(formula: PropagatingFormula) -> VSIDSBrancher:
+      nonlocal brancher
+      brancher = VSIDSBrancher(formula)
+      return brancher
+    state, _ = cdcl_with_local_search(formula, create_brancher=create_brancher, rng=rng)
+    self.assertEqual(state, cdcl.SATISFIABLE)
+    assignment = formula.get_partial_assignment()
+    self.assertTrue(testutils.satisfies([ assignment.get_value(v) for v in range(1, 61) ], clauses))
+    # the model found by the local search is followed without conflicts
+    self.assertEqual({ v: assignment.get_value(v) for v in brancher.saved_phases }, brancher.saved_phases)
+
+  def test_budget(self: TestLocalSearch):
+    clauses = testutils.pigeonhole_formula(6)
+    budget = Budget(max_conflicts=10)
+    budget.interrupt()
+    state, stats = cdcl_with_local_search(PropagatingFormula.from_clauses(clauses), budget=budget)
+    self.assertEqual(state, cdcl.UNKNOWN)
+    self.assertEqual(stats.stop_reason, INTERRUPTED)
+    self.assertEqual(stats.conflicts, 0)
+    budget.clear()
+    # the local search cannot satisfy the formula, and the CDCL search runs out of conflicts
+    state, stats = cdcl_with_local_search(PropagatingFormula.from_clauses(clauses), max_flips=1000, budget=budget)
+    self.assertEqual(state, cdcl.UNKNOWN)
+    self.assertEqual(stats.stop_reason, CONFLICTS)
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,45 @@
+from __future__ import annotations
+import io
+import unittest
+
+import cdcl
+import testutils
+from lookahead_brancher import LookaheadBrancher
+from propagating_formula import PropagatingFormula
+
+class TestLookaheadBrancher(unittest.TestCase):
+
+  def test_failed_literal(self: TestLookaheadBrancher):
+    # assigning 1 true implies 2 and 3, which conflict
+    formula = PropagatingFormula(io.StringIO("p cnf 5 5\n-1 2 0\n-1 3 0\n-2 -3 4 5 0\n-2 -3 -4 0\n-2 -3 4 -5 0\n"))
+    brancher = LookaheadBrancher.create(formula)
+    self.assertEqual(brancher.make_decision(formula.get_partial_assignment()), (1, 0))
+    self.assertEqual(brancher.failed_literal_count, 1)
+
+  def test_new_binaries(self: TestLookaheadBrancher):
+    formula = PropagatingFormula(io.StringIO("p cnf 6 4\n1 2 3 0\n1 4 5 0\n-1 2 6 0\n-2 -4 5 6 0\n"))
+    brancher = LookaheadBrancher(formula)
+    values = {}
+    self.assertEqual(brancher._lookahead(values, -1), (False, [-1], 2))
+    self.assertEqual(brancher._lookahead(values, 1), (False, [1], 1))
+    self.assertEqual(values, {})
+    # 1 reduces clauses on both polarities
+    self.assertEqual(brancher.make_decision(formula.get_partial_assignment()), (1, 1))
+
+  def test_cache(self: TestLookaheadBrancher):
+    formula = PropagatingFormula(io.StringIO("p cnf 4 3\n1 2 3 0\n-1 2 4 0\n-2 -3 -4 0\n"))
+    brancher = LookaheadBrancher(formula)
+    decision = brancher.make_decision(formula.get_partial_assignment())
+    results = dict(next(iter(brancher.cache.values())))
+    brancher._lookahead = None
+    self.assertEqual(brancher.make_decision(formula.get_partial_assignment()), decision)
+    self.assertEqual(len(brancher.cache), 1)
+    self.assertEqual(next(iter(brancher.cache.values())), results)
+
+  def test_agrees_with_brute_force(self: TestLookaheadBrancher):
+    for _, formula in testutils.random_formulas(100, 3, 8, 1, 6):
+      state, _ = cdcl.cdcl_formula(testutils.formula(formula), LookaheadBrancher.create)
+      self.assertEqual(state == cdcl.SATISFIABLE, testutils.satisfiable(formula))
+
+if __name__ == '__main__':
+  unittest.main()
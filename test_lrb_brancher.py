@@ -0,0 +1,59 @@
+from __future__ import annotations
+import io
+import unittest
+
+import cdcl
+import lrb_brancher
+import testutils
+from lrb_brancher import LRBBrancher
+from propagating_formula import PropagatingFormula
+
+class TestLRBBrancher(unittest.TestCase):
+
+  def test_learning_rate(self: TestLRBBrancher):
+    formula = PropagatingFormula(io.StringIO("p cnf 3 3\n1 2 3 0\n-1 -2 -3 0\n-1 2 3 0\n"))
+    brancher = LRBBrancher.create(formula)
+    assignment = formula.get_partial_assignment()
+    # 1 occurs most often negated, and is decided false until it is assigned
+    self.assertEqual(brancher.make_decision(assignment), (1, 0))
+    formula.assign(1, 1)
+    formula.assign(2, 0)
+    # two conflicts, of which 1 takes part in both and 2 in one
+    brancher.record_resolved_lit(1)
+    brancher.record_resolved_lit(2)
+    brancher.record_learned_clause([-1, 2])
+    brancher.record_resolved_lit(1)
+    brancher.record_learned_clause([-1])
+    formula.backtrack(0)
+    alpha = lrb_brancher.ALPHA - 2 * lrb_brancher.ALPHA_DECAY
+    self.assertEqual(brancher.make_decision(assignment), (1, 1))
+    self.assertAlmostEqual(brancher.scores[1], alpha * 2 / 2)
+    self.assertAlmostEqual(brancher.scores[2], alpha * 1 / 2)
+    self.assertEqual(brancher.scores[3], 0)
+    # unassigned variables are decided in the phase they were last assigned
+    formula.assign(1, 1)
+    self.assertEqual(brancher.make_decision(assignment), (2, 0))
+
+  def test_assignments_between_calls(self: TestLRBBrancher):
+    formula = PropagatingFormula(io.StringIO("p cnf 3 3\n1 2 3 0\n-1 -2 -3 0\n-1 2 3 0\n"))
+    brancher = LRBBrancher.create(formula)
+    # an assignment that is made and undone without a call in between
+    formula.assign(2, 0)
+    formula.backtrack(0)
+    self.assertEqual(brancher.phases[2], 0)
+
+  def test_agrees_with_brute_force(self: TestLRBBrancher):
+    for _, clauses in testutils.random_formulas(40, 6, 12, 2, 6):
+      expected = testutils.satisfiable(clauses)
+      for chrono_threshold in [None, 0]:
+        state, _ = cdcl.cdcl_budgeted(testutils.formula(clauses), None, LRBBrancher.create, chrono_threshold=chrono_threshold)
+        self.assertEqual(state == cdcl.SATISFIABLE, expected)
+
+  def test_added_variables(self: TestLRBBrancher):
+    formula = PropagatingFormula(io.StringIO("p cnf 1 1\n1 0\n"))
+    brancher = LRBBrancher.create(formula)
+    formula.formula.add_variables({2})
+    self.assertEqual(brancher.make_decision(formula.get_partial_assignment()), (2, 1))
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,60 @@
+from __future__ import annotations
+import io
+import random
+import unittest
+
+import randcnf
+import testutils
+from maxsat import OLLSolver, maxsat, most_probable_explanation, mpe_problem, read_wcnf
+from wmc import probability_of_evidence
+
+class TestMaxSAT(unittest.TestCase):
+
+  def test_read_wcnf(self: TestMaxSAT):
+    old = io.StringIO("c old format\np wcnf 3 4 10\n10 1 2 0\n3 -1 0\n10 -2 3 0\n2 -3\n0\n")
+    self.assertEqual(read_wcnf(old), (3, [[1, 2], [-2, 3]], [(3, [-1]), (2, [-3])]))
+    new = io.StringIO("c new format\nh 1 2 0\n3 -1 0\nh -2 3 0\n2 -3 0\n")
+    self.assertEqual(read_wcnf(new), (3, [[1, 2], [-2, 3]], [(3, [-1]), (2, [-3])]))
+
+  def test_optimum(self: TestMaxSAT):
+    rng = random.Random(0)
+    for _ in range(80):
+      n = rng.randint(3, 7)
+      hard = randcnf.random_formula(n, rng.randint(0, 3 * n), rng.choice((2, 3)), rng)
+      soft = [ (rng.choice((1, 1, 2, 3, 5, 10)), clause) for clause in randcnf.random_formula(n, rng.randint(1, 3 * n), rng.choice((1, 2, 3)), rng) ]
+      expected = min([ sum(weight for weight, clause in soft if not testutils.satisfies(bits, [clause])) for bits in testutils.models(n, hard) ], default=None)
+      solver = OLLSolver(hard, soft, n)
+      result = solver.solve()
+      if expected is None:
+        self.assertIsNone(result)
+        continue
+      cost, model = result
+      self.assertEqual(cost, expected)
+      self.assertEqual(solver.cost(model), cost)
+      self.assertEqual(solver.lower_bound, cost)
+      for clause in hard:
+        self.assertTrue(any((l > 0) == (model[abs(l)] == 1) for l in clause))
+
+  def test_special_soft_clauses(self: TestMaxSAT):
+    # opposite unit soft clauses, an empty one, and a tautological one
+    soft = [(2, [1]), (3, [-1]), (4, []), (5, [2, -2]), (1, [2, 2])]
+    cost, model = maxsat([[-2]], soft, 2)
+    self.assertEqual(cost, 7)
+    self.assertEqual(model, {1: 0, 2: 0})
+    # an empty hard clause leaves no model
+    self.assertIsNone(maxsat([[]], [(1, [1])]))
+
+  def test_mpe_problem(self: TestMaxSAT):
+    weights = { 1: 0.25, -1: 0.75, 2: 0.0, 3: 0.5, -3: 0.5 }
+    self.assertEqual(mpe_problem([[1, 2, 3]], weights, 100), (3, [[1, 2, 3], [-2]], [(110, [-1])]))
+
+  def test_most_probable_explanation(self: TestMaxSAT):
+    with open("graphical/test/toy.uai") as file:
+      graph = file.read()
+    weight, _ = most_probable_explanation(io.StringIO(graph), io.StringIO("1 1 2"))
+    # the most probable explanation is the most probable full evidence that agrees with the evidence
+    expected = max(probability_of_evidence(io.StringIO(graph), io.StringIO("3 0 {} 1 2 2 {}".format(a, c))) for a in (0, 1) for c in (0, 1))
+    self.assertAlmostEqual(weight, expected)
+
+if __name__ == '__main__':
+  unittest.main()
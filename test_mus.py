@@ -0,0 +1,41 @@
+from __future__ import annotations
+import unittest
+
+import testutils
+from mus import CoreSolver, SATISFIABLE, UNSATISFIED, minimal_unsat_subset, unsat_core
+
+class TestMus(unittest.TestCase):
+
+  def test_core(self: TestMus):
+    clauses = [[1, 2], [3, 4], [-1], [-2], [-3, 5], [1, -2, 3]]
+    self.assertEqual(unsat_core(clauses), [0, 2, 3])
+    self.assertIsNone(unsat_core([[1, 2], [-1]]))
+
+  def test_empty_and_tautological_clauses(self: TestMus):
+    self.assertEqual(minimal_unsat_subset([[1, -1], [2], [], [-2]]), [2])
+    self.assertEqual(minimal_unsat_subset([[1, -1], [2], [-2, 3], [-3]]), [1, 2, 3])
+
+  def test_solver_is_reused(self: TestMus):
+    clauses = [[1, 2], [-1, 2], [1, -2], [-1, -2], [3], [-3, 1]]
+    solver = CoreSolver(clauses)
+    mus = minimal_unsat_subset(clauses, solver)
+    self.assertFalse(testutils.satisfiable([ clauses[i] for i in mus ]))
+    self.assertGreater(solver.solve_count, 1)
+    self.assertEqual(solver.solve([0, 1, 2])[0], SATISFIABLE)
+    self.assertEqual(solver.solve([0, 1, 2, 3]), (UNSATISFIED, [0, 1, 2, 3]))
+
+  def test_minimal(self: TestMus):
+    for _, clauses in testutils.random_formulas(60, 3, 7, 3, 8, (2, 3)):
+      core = unsat_core(clauses)
+      mus = minimal_unsat_subset(clauses)
+      if testutils.satisfiable(clauses):
+        self.assertIsNone(core)
+        self.assertIsNone(mus)
+        continue
+      self.assertFalse(testutils.satisfiable([ clauses[i] for i in core ]))
+      self.assertFalse(testutils.satisfiable([ clauses[i] for i in mus ]))
+      for i in mus:
+        self.assertTrue(testutils.satisfiable([ clauses[j] for j in mus if j != i ]))
+
+if __name__ == '__main__':
+  unittest.main()
@@ -2,6 +2,7 @@ from __future__ import annotations
 import io
 import unittest
 
+from arbitrary_brancher import ArbitraryBrancher
 from fuip_analyzer import fuip_analyzer
 from propagating_formula import PropagatingFormula
 
@@ -63,7 +64,7 @@ class TestPropagatingFormula(unittest.TestCase):
     self.assertEqual(formula.get_current_state(), formula.UNSATISFIED)
     self.assertEqual(len(formula.formula.assignment), 12)
 
-    print(fuip_analyzer(formula))
+    print(fuip_analyzer(formula, ArbitraryBrancher.create(formula)))
 
     formula.backtrack(4)
     self.assertEqual(formula.get_current_decision_level(), 4)
@@ -73,6 +74,7 @@ class TestPropagatingFormula(unittest.TestCase):
     self.assertEqual(formula.get_current_decision_level(), 2)
     self.assertEqual(formula.get_current_state(), formula.UNRESOLVED)
     self.assertEqual(len(formula.formula.assignment), 3)
+    self.assertEqual(formula.decision_history, [None, (8, 0), (21, 0)])
     formula.assign(31, 0)
     self.assertEqual(formula.get_current_decision_level(), 3)
     self.assertEqual(formula.get_current_state(), formula.UNRESOLVED)
@@ -92,4 +94,37 @@ class TestPropagatingFormula(unittest.TestCase):
     formula.assign(2, 0)
     self.assertEqual(formula.get_current_decision_level(), 7)
     self.assertEqual(formula.get_current_state(), formula.SATISFIED)
-    self.assertEqual(len(formula.formula.assignment), 12)
\ No newline at end of file
+    self.assertEqual(len(formula.formula.assignment), 12)
+
+  def test_conflict_below_current_level(self: TestPropagatingFormula):
+    formula = PropagatingFormula(io.StringIO("p cnf 5 3\n-5 3 0\n-5 -3 0\n1 4 2 0\n"))
+    formula.assign(1, 1)
+    formula.assign(4, 1)
+    # implied at decision level 2, though it only depends on decision level 1
+    formula.add_clause([-1, 5])
+    self.assertEqual(formula.get_current_state(), formula.UNSATISFIED)
+    self.assertEqual(fuip_analyzer(formula, ArbitraryBrancher.create(formula)), (0, [[-1]]))
+
+  def test_trail_saving(self: TestPropagatingFormula):
+    formula = PropagatingFormula(io.StringIO("p cnf 5 3\n-1 2 0\n-2 3 0\n-4 5 0\n"))
+    formula.trail_saving = True
+    formula.assign(1, 1)
+    formula.assign(4, 1)
+    formula.backtrack(0)
+    self.assertEqual([ item[1] for item in formula.saved_trail ], [2, 3, 5])
+    formula.assign(1, 1)
+    # the implications of 1 are assigned again, but not that of 4
+    self.assertEqual(formula.saved_position, 2)
+    self.assertEqual({ v: item[2] for v, item in formula.get_partial_assignment().current.items() }, { 1: 1, 2: 1, 3: 1 })
+    formula.assign(4, 1)
+    self.assertEqual(formula.saved_position, 3)
+    self.assertEqual(formula.get_partial_assignment().get_value(5), 1)
+
+  def test_from_clauses(self: TestPropagatingFormula):
+    clauses = [[1, 2, 1], [-1], [3, -3], [2, -4]]
+    text = "p cnf 4 4\n1 2 1 0\n-1 0\n3 -3 0\n2 -4 0\n"
+    formulas = [PropagatingFormula(io.StringIO(text)), PropagatingFormula.from_clauses(clauses)]
+    for formula in formulas:
+      self.assertEqual([ clause.clause for clause in formula.formula.formula ], [[1, 2], [-1], [-4, 2]])
+      self.assertEqual(formula.formula.num_base_clauses, 3)
+      self.assertEqual({ v: item[2] for v, item in formula.get_partial_assignment().current.items() }, { 1: 0, 2: 1 })
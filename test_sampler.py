@@ -0,0 +1,54 @@
+from __future__ import annotations
+import collections
+import random
+import unittest
+
+import randcnf
+import sampler
+import testutils
+
+class TestSampler(unittest.TestCase):
+
+  def test_few_models(self: TestSampler):
+    clauses = [[1, 2], [-1, -2], [3, -1]]
+    s = sampler.Sampler(clauses, seed=0)
+    self.assertEqual(len(s.models), 3)
+    self.assertEqual(s.cell_count, 1)
+    samples = list(s.samples(300))
+    counts = collections.Counter(tuple(sorted(model.items())) for model in samples)
+    self.assertEqual({ tuple(model[v] for v in (1, 2, 3)) for model in samples }, set(testutils.models(3, clauses)))
+    self.assertGreater(min(counts.values()), 60)
+    self.assertEqual(s.cell_count, 1)
+
+  def test_unsatisfiable(self: TestSampler):
+    s = sampler.Sampler([[1], [-1, 2], [-2]])
+    self.assertTrue(s.unsatisfiable)
+    self.assertEqual(list(s.samples(5)), [])
+
+  def test_projection_and_free_variables(self: TestSampler):
+    # 4 does not appear in any clause, so it is free in every model
+    samples = list(sampler.Sampler([[1, 2], [-2, 3]], [2, 4], seed=0).samples(100))
+    self.assertEqual({ tuple(sorted(model.items())) for model in samples }, { ((2, a), (4, b)) for a in (0, 1) for b in (0, 1) })
+
+  def test_cells(self: TestSampler):
+    rng = random.Random(2)
+    clauses = randcnf.random_formula(10, 20, 3, rng)
+    models = set(testutils.models(10, clauses))
+    s = sampler.Sampler(clauses, seed=1, samples_per_cell=4)
+    self.assertGreater(len(models), s.high)
+    samples = list(s.samples(100))
+    self.assertEqual(len(samples), 100)
+    self.assertGreater(s.cell_count, 1)
+    drawn = { tuple(model[v] for v in range(1, 11)) for model in samples }
+    self.assertTrue(drawn <= models)
+    self.assertGreater(len(drawn), len(models) // 3)
+
+  def test_process_pool(self: TestSampler):
+    clauses = [[1, 2, 3], [-1, -2]]
+    models = set(testutils.models(3, clauses))
+    samples = sampler.sample_models(clauses, 40, workers=2, seed=0)
+    self.assertEqual(len(samples), 40)
+    self.assertEqual({ tuple(model[v] for v in (1, 2, 3)) for model in samples }, models)
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,74 @@
+from __future__ import annotations
+import os
+import random
+import tempfile
+import threading
+import unittest
+
+import randcnf
+import solver_service
+import testutils
+
+class TestSolverService(unittest.TestCase):
+
+  def setUp(self: TestSolverService):
+    self.directory = tempfile.TemporaryDirectory()
+    self.path = os.path.join(self.directory.name, "solver.sock")
+    self.service = solver_service.SolverService(self.path, 2, { "max_conflicts": 500 })
+    self.thread = threading.Thread(target=self.service.serve_forever)
+    self.thread.start()
+
+  def tearDown(self: TestSolverService):
+    self.service.shutdown()
+    self.service.server_close()
+    self.thread.join()
+    self.directory.cleanup()
+
+  def test_frames_and_arena(self: TestSolverService):
+    clauses = [[1, -2], [], [3, 2, -1]]
+    self.assertEqual(solver_service.decode_arena(solver_service.encode_arena(clauses)), clauses)
+
+  def test_streamed_results(self: TestSolverService):
+    rng = random.Random(0)
+    formulas = [ randcnf.random_formula(12, 55, 3, rng) for _ in range(40) ]
+    with solver_service.SolverClient(self.path) as client:
+      for i, formula in enumerate(formulas):
+        client.send(formula, i, model=True)
+      results = list(client.results())
+    self.assertEqual(sorted(result["id"] for result in results), list(range(40)))
+    self.assertEqual(self.service.request_count, 40)
+    for result in results:
+      self.assertEqual(result["type"], "result")
+      self.assertIn("conflicts", result["stats"])
+      if result["state"] == "SATISFIABLE":
+        model = set(result["model"])
+        self.assertTrue(all(any(l in model for l in clause) for clause in formulas[result["id"]]))
+      else:
+        self.assertEqual(result["state"], "UNSATISFIABLE")
+
+  def test_path_that_is_not_a_socket(self: TestSolverService):
+    path = os.path.join(self.directory.name, "file")
+    with open(path, "w") as file:
+      file.write("kept")
+    with self.assertRaises(Exception):
+      solver_service.SolverService(path, 1)
+    with open(path) as file:
+      self.assertEqual(file.read(), "kept")
+
+  def test_budget_and_errors(self: TestSolverService):
+    with solver_service.SolverClient(self.path) as client:
+      result = client.solve("c comment\np cnf 2 4\n1 2 0\n-1 2 0\n1 -2 0\n-1 -2 0\n", id="dimacs", brancher="random")
+      self.assertEqual(result["state"], "UNSATISFIABLE")
+      # the limits of the service cap those of the request
+      hard = testutils.pigeonhole_formula(8)
+      result = client.solve(hard, id="hard", max_conflicts=10 ** 6, max_seconds=30)
+      self.assertEqual(result["state"], "UNKNOWN")
+      self.assertEqual(result["stats"]["stop_reason"], "conflicts")
+      self.assertGreaterEqual(result["stats"]["conflicts"], 500)
+      result = client.solve("p cnf 1 1\nx 0\n", id="bad")
+      self.assertEqual((result["id"], result["type"]), ("bad", "error"))
+      result = client.solve([[1]], id="brancher", brancher="unknown")
+      self.assertEqual(result["type"], "error")
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,60 @@
+from __future__ import annotations
+import io
+import unittest
+
+import cdcl
+import testutils
+from propagating_formula import PropagatingFormula
+from vmtf_brancher import VMTFBrancher
+
+class TestVMTFBrancher(unittest.TestCase):
+
+  def test_queue_order(self: TestVMTFBrancher):
+    formula = PropagatingFormula(io.StringIO("p cnf 4 3\n1 2 3 0\n1 -2 4 0\n1 -3 -4 0\n"))
+    brancher = VMTFBrancher.create(formula)
+    assignment = formula.get_partial_assignment()
+    # the variables that occur most often are at the front, in their most frequent phase
+    self.assertEqual(brancher.make_decision(assignment), (1, 1))
+    # bumped variables keep their relative order at the front
+    brancher.record_learned_clause([-4, 3])
+    self.assertEqual(brancher.make_decision(assignment), (3, 1))
+    formula.assign(3, 1)
+    self.assertEqual(brancher.make_decision(assignment), (4, 1))
+    formula.assign(4, 0)
+    self.assertEqual(brancher.make_decision(assignment), (1, 1))
+    # unassigned variables are decided in the phase they were last assigned
+    formula.backtrack(0)
+    self.assertEqual(brancher.make_decision(assignment), (3, 1))
+    self.assertEqual(brancher.search, 3)
+    formula.assign(3, 1)
+    self.assertEqual(brancher.make_decision(assignment), (4, 0))
+
+  def test_phases_saved_between_decisions(self: TestVMTFBrancher):
+    formula = PropagatingFormula(io.StringIO("p cnf 4 3\n1 2 3 0\n1 -2 4 0\n1 -3 -4 0\n"))
+    brancher = VMTFBrancher.create(formula)
+    # an assignment that is made and undone without a decision in between
+    formula.assign(2, 0)
+    formula.backtrack(0)
+    self.assertEqual(brancher.phases[2], 0)
+
+  def test_agrees_with_brute_force(self: TestVMTFBrancher):
+    for _, clauses in testutils.random_formulas(40, 6, 12, 2, 6):
+      state, _ = cdcl.cdcl_budgeted(testutils.formula(clauses), None, VMTFBrancher.create)
+      self.assertEqual(state == cdcl.SATISFIABLE, testutils.satisfiable(clauses))
+
+  def test_decisions_walk_the_queue(self: TestVMTFBrancher):
+    n = 2000
+    text = "p cnf {} {}\n".format(n, n // 2) + "".join([ "{} {} 0\n".format(2 * i - 1, 2 * i) for i in range(1, n // 2 + 1) ])
+    formula = PropagatingFormula(io.StringIO(text))
+    brancher = VMTFBrancher.create(formula)
+    assignment = formula.get_partial_assignment()
+    decided = []
+    while assignment.get_unassigned():
+      variable, _ = brancher.make_decision(assignment)
+      decided.append(variable)
+      formula.assign(variable, 1)
+    # the queue is walked once from front to back
+    self.assertEqual(decided, list(range(1, n + 1)))
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,29 @@
+from __future__ import annotations
+import io
+import math
+import random
+import unittest
+
+import testutils
+import wmc
+
+class TestWeightedModelCounter(unittest.TestCase):
+
+  def test_agrees_with_brute_force(self: TestWeightedModelCounter):
+    rng = random.Random(0)
+    for n, formula in testutils.random_formulas(150, 6, 12, 2, 4, (2, 3, 3), rng):
+      weights = {}
+      for v in range(1, n + 1):
+        weights[v] = rng.random()
+        weights[-v] = rng.random()
+      expected = sum(math.prod(weights[v if bits[v - 1] else -v] for v in range(1, n + 1)) for bits in testutils.models(n, formula))
+      self.assertAlmostEqual(wmc.WeightedModelCounter(io.StringIO(testutils.formula_text(formula)), weights).count(), expected)
+
+  def test_probability_of_evidence(self: TestWeightedModelCounter):
+    with open("graphical/test/toy.uai") as graph_file, open("graphical/test/toy.uai.evid") as evidence_file:
+      self.assertAlmostEqual(wmc.probability_of_evidence(graph_file, evidence_file), 0.4 * 0.7 * 0.7)
+    with open("graphical/test/toy.cnf") as formula_file, open("graphical/test/toy.weights") as weights_file:
+      self.assertAlmostEqual(wmc.weighted_model_count(formula_file, weights_file), 0.4 * 0.7 * 0.7)
+
+if __name__ == '__main__':
+  unittest.main()
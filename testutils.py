@@ -0,0 +1,71 @@
+from __future__ import annotations
+from typing import Iterator, List, Optional, Sequence, Tuple
+import io
+import itertools
+import random
+
+import randcnf
+from propagating_formula import PropagatingFormula
+
+def formula_text(formula: List[List[int]]) -> str:
+  """The DIMACS text of `formula`, whose problem line counts its distinct variables, as `Formula` requires
+  """
+  file = io.StringIO()
+  randcnf.write_formula(file, len({ abs(l) for clause in formula for l in clause }), formula)
+  return file.getvalue()
+
+def formula(clauses: List[List[int]]) -> PropagatingFormula:
+  return PropagatingFormula.from_clauses(clauses)
+
+def pigeonhole_formula(holes: int) -> List[List[int]]:
+  """Generates the unsatisfiable formula that places `holes` + 1 pigeons in `holes` holes, at most one to a hole
+
+  The variable `pigeon * holes + hole + 1` places the pigeon in the hole,
+  and the first `holes` + 1 clauses place each pigeon in some hole.
+  """
+  var = lambda pigeon, hole: pigeon * holes + hole + 1
+  formula = [ [ var(pigeon, hole) for hole in range(holes) ] for pigeon in range(holes + 1) ]
+  for hole in range(holes):
+    for p in range(holes + 1):
+      for q in range(p + 1, holes + 1):
+        formula.append([-var(p, hole), -var(q, hole)])
+  return formula
+
+def pigeonhole(holes: int) -> PropagatingFormula:
+  return formula(pigeonhole_formula(holes))
+
+def random_formulas(count: int, min_vars: int, max_vars: int, min_ratio: float, max_ratio: float, widths: Sequence[int] = (3,), rng: Optional[random.Random] = None) -> Iterator[Tuple[int, List[List[int]]]]:
+  """Generates `count` random formulas that are small enough to check solvers against brute force on
+
+  Each formula is drawn over n variables, with n from `min_vars` to
+  `max_vars`, with between `min_ratio` * n and `max_ratio` * n clauses
+  of a width from `widths`. Its variables are then renumbered, so that
+  none is left out of the formula.
+
+  :param rng: the source of randomness, by default seeded with 0
+  :returns: the number of variables of each formula, followed by its clauses
+  """
+  rng = rng if rng is not None else random.Random(0)
+  for _ in range(count):
+    n = rng.randint(min_vars, max_vars)
+    clauses = randcnf.random_formula(n, rng.randint(int(min_ratio * n), int(max_ratio * n)), rng.choice(widths), rng)
+    variables = sorted({ abs(l) for clause in clauses for l in clause })
+    numbers = { v: i + 1 for i, v in enumerate(variables) }
+    yield len(variables), [ [ numbers[abs(l)] * (1 if l > 0 else -1) for l in clause ] for clause in clauses ]
+
+def satisfies(bits: Sequence[int], formula: List[List[int]]) -> bool:
+  """Whether every clause of `formula` is satisfied when each variable v has the value `bits[v - 1]`
+  """
+  return all(any((l > 0) == (bits[abs(l) - 1] == 1) for l in clause) for clause in formula)
+
+def models(num_vars: int, formula: List[List[int]]) -> Iterator[Tuple[int, ...]]:
+  """Generates every model of `formula` over the variables from 1 to `num_vars`, by trying every assignment to them
+  """
+  for bits in itertools.product((0, 1), repeat=num_vars):
+    if satisfies(bits, formula):
+      yield bits
+
+def satisfiable(formula: List[List[int]]) -> bool:
+  """Decides the satisfiability of `formula` by trying every assignment to its variables, to check solvers against on small formulas
+  """
+  return any(True for _ in models(max({ abs(l) for clause in formula for l in clause }, default=0), formula))
@@ -46,4 +46,6 @@ class TwoChoiceBrancher(Brancher):
         max_count = self.scores[var]
       elif self.scores[var] == max_count:
         max_vars.append(var)
-    return (random.choice(max_vars), random.choice((0, 1)))
+    variable = random.choice(max_vars)
+    value = self.saved_phases.get(variable)
+    return (variable, value if value is not None else random.choice((0, 1)))
@@ -0,0 +1,127 @@
+from __future__ import annotations
+from typing import Dict, List, Tuple, TYPE_CHECKING
+
+from assignment import AssignmentListener
+from brancher import Brancher
+
+if TYPE_CHECKING:
+  from shared_types import Literal, Value, Variable
+  from propagating_formula import PropagatingFormula
+  from assignment import Assignment, AssignmentItem
+
+  Stamp = int
+
+# the end of the queue, which no variable is
+NIL: Variable = 0
+
+class VMTFBrancher(Brancher, AssignmentListener):
+  """Decides the unassigned variable that was bumped most recently, in its saved phase
+
+  The variables are kept in a doubly linked queue, in the order of the
+  stamps of their last bumps, and a bumped variable is moved to the
+  front of the queue with a new stamp. Every variable in front of the
+  search pointer is assigned, so a decision walks from the search
+  pointer toward the back of the queue, past the variables that were
+  assigned since, and leaves the pointer on the variable it decides;
+  when a variable in front of the pointer is unassigned or bumped while
+  unassigned, the pointer is moved to it. The walks between two
+  backtracks cover each variable at most once, so decisions take
+  amortized constant time, whatever the number of variables.
+
+  The brancher listens to the assignment of the formula: as a variable
+  is unassigned, its value is saved as its phase, and the search pointer
+  is moved to it if it was bumped after the variable at the pointer.
+
+  :param assignment: the assignment of the formula being solved
+  :param stamps: the stamp of the last bump of each variable
+  :param prev: the next variable toward the back of the queue, of each variable
+  :param next: the next variable toward the front of the queue, of each variable
+  :param front: the most recently bumped variable
+  :param search: the search pointer
+  :param phases: the value that each variable is decided on
+  """
+
+  @staticmethod
+  def create(formula: PropagatingFormula) -> Brancher:
+    return VMTFBrancher(formula)
+
+  def __init__(self: VMTFBrancher, formula: PropagatingFormula) -> None:
+    Brancher.__init__(self)
+    self.assignment = formula.get_partial_assignment()
+    var_counts: Dict[Variable, List[int]] = {}
+    for clause in formula.formula.formula:
+      for literal in clause.clause:
+        counts = var_counts.setdefault(abs(literal), [0, 0])
+        counts[1 if literal > 0 else 0] += 1
+    for v in self.assignment.get_unassigned():
+      var_counts.setdefault(v, [0, 0])
+    self.stamps: Dict[Variable, Stamp] = {}
+    self.prev: Dict[Variable, Variable] = {}
+    self.next: Dict[Variable, Variable] = { NIL: NIL }
+    self.front: Variable = NIL
+    self.stamp: Stamp = 0
+    self.phases: Dict[Variable, Value] = {}
+    # the variables that occur most often are decided first
+    for v in sorted(var_counts, key=lambda v: (sum(var_counts[v]), -v)):
+      self._enqueue(v)
+      self.phases[v] = 0 if var_counts[v][0] > var_counts[v][1] else 1
+    self.search: Variable = self.front
+    self.assignment.add_listener(self)
+
+  def _enqueue(self: VMTFBrancher, v: Variable) -> None:
+    self.stamp += 1
+    self.stamps[v] = self.stamp
+    self.prev[v] = self.front
+    self.next[v] = NIL
+    self.next[self.front] = v
+    self.front = v
+
+  def _bump(self: VMTFBrancher, v: Variable) -> None:
+    if v == self.front or v not in self.stamps:
+      return
+    if v == self.search:
+      # the variable that the search pointer falls back to is the next one toward the back
+      self.search = self.prev[v] if v in self.assignment else v
+    before, after = self.prev[v], self.next[v]
+    self.next[before] = after
+    self.prev[after] = before
+    self._enqueue(v)
+    if v not in self.assignment:
+      self.search = v
+
+  def record_resolved_lit(self, lit: Literal):
+    self._bump(abs(lit))
+
+  def record_learned_clause(self, clause: List[Literal]):
+    # the variables keep their relative order as they are moved to the front
+    for v in sorted({ abs(lit) for lit in clause }, key=lambda v: self.stamps.get(v, 0)):
+      self._bump(v)
+
+  def seed_phases(self, phases: Dict[Variable, Value]) -> None:
+    Brancher.seed_phases(self, phases)
+    self.phases.update(phases)
+
+  def assigned(self: VMTFBrancher, item: AssignmentItem) -> None:
+    pass
+
+  def unassigned(self: VMTFBrancher, item: AssignmentItem) -> None:
+    _, v, value, _ = item
+    self.phases[v] = value
+    if self.stamps.get(v, 0) > self.stamps.get(self.search, 0):
+      self.search = v
+
+  def make_decision(self, assignment: Assignment) -> Tuple[Variable, Value]:
+    self.decision_count += 1
+    v = self.search
+    while v != NIL and v in assignment:
+      v = self.prev[v]
+    if v == NIL:
+      # variables added to the formula after the brancher was created are queued at the front
+      for new_var in sorted(assignment.get_unassigned() - self.stamps.keys()):
+        self._enqueue(new_var)
+        self.phases.setdefault(new_var, 1)
+      v = self.front
+      while v != NIL and v in assignment:
+        v = self.prev[v]
+    self.search = v
+    return (v, self.phases[v])
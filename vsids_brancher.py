@@ -43,6 +43,13 @@ class VSIDSBrancher(Brancher):
       self.sign[v] = sign
       if total_counts > self.max_score:
         self.max_score = total_counts
+    # variables that appear in no clause are never bumped by occurrences,
+    # and may already be assigned, such as those implied by a constraint
+    assignment = formula.get_partial_assignment()
+    for v in list(assignment.get_unassigned()) + list(assignment.current):
+      if v not in self.scores:
+        self.scores[v] = 0
+        self.sign[v] = 1
     self.bonus = self.max_score // 3 + 1
 
   def record_resolved_lit(self, lit: Literal):
@@ -60,6 +67,12 @@ class VSIDSBrancher(Brancher):
     self._grow_bonus()
     self._maintenance()
 
+  def seed_phases(self, phases: Dict[Variable, Value]) -> None:
+    Brancher.seed_phases(self, phases)
+    for v, value in phases.items():
+      if v in self.sign:
+        self.sign[v] = value
+
   def _maintenance(self):
     if self.max_score > 2**24 or self.bonus > 2**24:
       self.bonus //= 2**16
@@ -78,5 +91,5 @@ class VSIDSBrancher(Brancher):
       if self.scores[var] >= max_score:
         max_var = var
         max_score = self.scores[var]
-    return (max_var, self.sign[var])
+    return (max_var, self.sign[max_var])
 
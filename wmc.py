@@ -0,0 +1,250 @@
+from __future__ import annotations
+from typing import Dict, List, Optional, Set, TextIO, Tuple, TYPE_CHECKING
+import io
+import sys
+
+from propagating_formula import PropagatingFormula
+from vsids_brancher import VSIDSBrancher
+from fuip_analyzer import fuip_analyzer
+
+if TYPE_CHECKING:
+  from shared_types import DecisionLevel, Literal, Value, Variable
+
+  Weight = float
+  ClauseIndex = int
+  # canonical representation of a component: its unassigned variables and
+  # the indices of the original clauses that are not yet satisfied, both sorted
+  ComponentKey = Tuple[Tuple[Variable, ...], Tuple[ClauseIndex, ...]]
+
+def parse_weights(file_object: TextIO) -> Dict[Literal, Weight]:
+  """Parse a weights file as written by `BayesGraph.to_formula_file_with_evidence`
+
+  Each line of the form `w <literal> <weight> 0` gives the weight of a
+  literal; literals whose weights are not given have weight 1.0.
+  """
+  weights: Dict[Literal, Weight] = {}
+  for line in file_object:
+    tokens = line.split()
+    if not tokens or tokens[0] != 'w':
+      continue
+    weights[int(tokens[1])] = float(tokens[2])
+  return weights
+
+class WeightedModelCounter:
+  """An exact weighted model counter on top of the CDCL components
+
+  The weight of a model is the product of the weights of the literals it
+  satisfies, and the counter computes the sum of the weights of all
+  models. The search branches on variables ranked by a `VSIDSBrancher`,
+  splits the unassigned part of the formula into variable-disjoint
+  components that are counted independently, caches the count of every
+  component under its canonical representation, and learns a clause from
+  every conflict with `fuip_analyzer`.
+
+  Learned clauses are implied by the formula, so they are not part of the
+  canonical representation of a component. The search backtracks
+  chronologically, so a learned clause is held back until the search
+  returns to the decision level at which it is asserting; whatever it
+  implies there is implied in every model of the component being
+  counted, and is accounted for by the branches that are counted after it.
+
+  That argument fails when the assignment that the components are counted
+  under has no models at all, since everything is then vacuously implied.
+  This is the case exactly when one of the components has no models, and
+  then the cached counts of the components counted under that assignment
+  are discarded.
+
+  Variables that appear only in tautological clauses are not represented
+  in `Formula`, and their weights do not contribute to the count.
+  """
+
+  def __init__(self: WeightedModelCounter, formula_file: TextIO, weights: Dict[Literal, Weight]) -> None:
+    self.formula = PropagatingFormula(formula_file)
+    self.brancher = VSIDSBrancher.create(self.formula)
+    self.weights = weights
+    # the original clauses; learned clauses are appended after these in `Formula`
+    self.clauses: List[List[Literal]] = [ clause.clause for clause in self.formula.formula.formula ]
+    self.occurrences: Dict[Variable, List[ClauseIndex]] = {}
+    for i, clause in enumerate(self.clauses):
+      for l in clause:
+        if abs(l) not in self.occurrences:
+          self.occurrences[abs(l)] = []
+        self.occurrences[abs(l)].append(i)
+    self.cache: Dict[ComponentKey, Weight] = {}
+    # the keys of `cache` in order of insertion
+    self.cache_keys: List[ComponentKey] = []
+    # learned clauses that are yet to be added, with the decision levels at which they are asserting
+    self.pending_clauses: List[Tuple[DecisionLevel, List[Literal]]] = []
+    self.cache_hits = 0
+    self.conflict_count = 0
+
+  def _literal_weight(self: WeightedModelCounter, variable: Variable, value: Value) -> Weight:
+    return self.weights.get(variable if value == 1 else -variable, 1.0)
+
+  def _residual_clause(self: WeightedModelCounter, i: ClauseIndex) -> Optional[List[Literal]]:
+    """The unassigned literals of an original clause, or None if it is satisfied
+    """
+    assignment = self.formula.get_partial_assignment()
+    residual = []
+    for l in self.clauses[i]:
+      value = assignment.get_value(abs(l))
+      if value == 0.5:
+        residual.append(l)
+      elif (value == 1) == (l > 0):
+        return None
+    return residual
+
+  def _components(self: WeightedModelCounter, variables: Set[Variable]) -> List[Tuple[Set[Variable], List[ClauseIndex]]]:
+    """Partition unassigned variables into components connected by unsatisfied clauses
+    """
+    unseen = set(variables)
+    seen_clauses: Set[ClauseIndex] = set()
+    components = []
+    while unseen:
+      root = unseen.pop()
+      component_vars = { root }
+      component_clauses: List[ClauseIndex] = []
+      stack = [root]
+      while stack:
+        v = stack.pop()
+        for i in self.occurrences.get(v, []):
+          if i in seen_clauses:
+            continue
+          seen_clauses.add(i)
+          residual = self._residual_clause(i)
+          if residual is None:
+            continue
+          component_clauses.append(i)
+          for l in residual:
+            if abs(l) in unseen:
+              unseen.remove(abs(l))
+              component_vars.add(abs(l))
+              stack.append(abs(l))
+      components.append((component_vars, component_clauses))
+    return components
+
+  def _count_assigned(self: WeightedModelCounter, variables: Set[Variable]) -> Weight:
+    """Count the models of `variables` under the current assignment
+
+    The assigned variables among `variables` contribute the weights of
+    their literals, and the unassigned ones are counted by component.
+    """
+    assignment = self.formula.get_partial_assignment()
+    weight = 1.0
+    unassigned: Set[Variable] = set()
+    for v in variables:
+      if v in assignment:
+        weight *= self._literal_weight(v, assignment.get_value(v))
+      else:
+        unassigned.add(v)
+    mark = len(self.cache_keys)
+    for component_vars, component_clauses in self._components(unassigned):
+      # a clause learned in one component may propagate into another one
+      # at the same decision level, and thereby reveal that it has no models
+      if weight == 0 or self.formula.get_current_state() == PropagatingFormula.UNSATISFIED:
+        break
+      weight *= self._count_component(component_vars, component_clauses)
+    if weight == 0 or self.formula.get_current_state() == PropagatingFormula.UNSATISFIED:
+      self._discard_cache_entries(mark)
+      return 0.0
+    return weight
+
+  def _discard_cache_entries(self: WeightedModelCounter, mark: int) -> None:
+    while len(self.cache_keys) > mark:
+      del self.cache[self.cache_keys.pop()]
+
+  def _backtrack(self: WeightedModelCounter, d: DecisionLevel) -> None:
+    """Backtrack to `d`, then add the pending learned clauses that are not asserting below it
+    """
+    self.formula.backtrack(d)
+    still_pending = []
+    for level, clause in self.pending_clauses:
+      if level < d:
+        still_pending.append((level, clause))
+      elif self.formula.get_current_state() != PropagatingFormula.UNSATISFIED:
+        self.formula.add_clause(clause)
+    self.pending_clauses = still_pending
+
+  def _count_component(self: WeightedModelCounter, variables: Set[Variable], clauses: List[ClauseIndex]) -> Weight:
+    if not clauses:
+      return self._count_free(variables)
+    key: ComponentKey = (tuple(sorted(variables)), tuple(sorted(clauses)))
+    cached = self.cache.get(key)
+    if cached is not None:
+      self.cache_hits += 1
+      return cached
+
+    assignment = self.formula.get_partial_assignment()
+    scores = self.brancher.scores
+    variable = max(variables, key=lambda v: scores[v])
+    first_value = self.brancher.sign[variable]
+    d = self.formula.get_decision_level()
+    total = 0.0
+    for value in (first_value, 1 - first_value):
+      if self.formula.get_current_state() == PropagatingFormula.UNSATISFIED:
+        # a learned clause revealed that the assignment at level `d` has no models
+        break
+      if variable in assignment:
+        # implied at decision level `d` by a clause learned from the other branch
+        if assignment.get_value(variable) == value:
+          total += self._count_assigned(variables)
+        continue
+      self.formula.assign(variable, value)
+      if self.formula.get_current_state() == PropagatingFormula.UNSATISFIED:
+        self.conflict_count += 1
+        level, new_clauses = fuip_analyzer(self.formula, self.brancher)
+        for clause in new_clauses:
+          self.brancher.record_learned_clause(clause)
+          self.pending_clauses.append((level, clause))
+      else:
+        total += self._count_assigned(variables)
+      self._backtrack(d)
+    self.cache[key] = total
+    self.cache_keys.append(key)
+    return total
+
+  def _count_free(self: WeightedModelCounter, variables: Set[Variable]) -> Weight:
+    weight = 1.0
+    for v in variables:
+      weight *= self._literal_weight(v, 1) + self._literal_weight(v, 0)
+    return weight
+
+  def count(self: WeightedModelCounter) -> Weight:
+    """Compute the weighted model count of the formula
+    """
+    if self.formula.get_current_state() == PropagatingFormula.UNSATISFIED:
+      return 0.0
+    # each decision and each level of component nesting is a stack frame
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 4 * len(self.occurrences) + 1000))
+    variables = set(self.occurrences)
+    return self._count_assigned(variables)
+
+def weighted_model_count(formula_file: TextIO, weights_file: TextIO) -> Weight:
+  return WeightedModelCounter(formula_file, parse_weights(weights_file)).count()
+
+def probability_of_evidence(graph_file: TextIO, evidence_file: TextIO, encoding: str = "pairwise", deterministic: bool = False) -> Weight:
+  """Compute the probability of the evidence on a Bayes network in .uai format
+
+  The encoding written by `BayesGraph.to_formula_file_with_evidence` is
+  kept in memory and counted in this process; `encoding` and
+  `deterministic` are as in `BayesGraph.to_formula`.
+  """
+  from graphical.bayes_graph import BayesGraph
+  ffile = io.StringIO()
+  wfile = io.StringIO()
+  BayesGraph(graph_file).to_formula_file_with_evidence(evidence_file, ffile, wfile, encoding, deterministic)
+  ffile.seek(0)
+  wfile.seek(0)
+  return weighted_model_count(ffile, wfile)
+
+if __name__ == "__main__":
+  if len(sys.argv) != 3:
+    print("Usage: python wmc.py path/to/formula.cnf path/to/formula.weights")
+    print("       python wmc.py path/to/graph.uai path/to/evidence.uai.evid")
+    sys.exit(0)
+  _, first_file, second_file = sys.argv
+  with open(first_file) as file1, open(second_file) as file2:
+    if first_file.endswith(".uai"):
+      print(probability_of_evidence(file1, file2))
+    else:
+      print(weighted_model_count(file1, file2))
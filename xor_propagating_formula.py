@@ -0,0 +1,65 @@
+from __future__ import annotations
+from typing import List, Optional, TextIO, TYPE_CHECKING, Union
+
+from clause import Clause
+from formula import Formula
+from propagating_formula import PropagatingFormula
+from gauss_jordan import GaussJordan, detect_xors
+
+if TYPE_CHECKING:
+  from gauss_jordan import Xor
+
+class XorPropagatingFormula(PropagatingFormula):
+  """A `PropagatingFormula` that also propagates the XOR constraints encoded in its clauses
+
+  The XOR constraints are recovered from the clauses of the formula and
+  handed to a `GaussJordan` engine. Whenever unit propagation reaches a
+  fixpoint, the engine derives what the XOR constraints imply under the
+  current assignment; each implication or conflict comes with a clause
+  that explains it. An implied literal is assigned with the clause that
+  explains it as its antecedent, without adding that clause to the
+  formula, so that `fuip_analyzer` can analyze conflicts that involve it
+  like any other, while the same explanations derived again after every
+  backtrack do not pile up in the formula. A conflict is reported by
+  adding the clause that explains it; unit propagation then finds that
+  conflict before the engine is called again, so it is never added twice.
+
+  Every implication is found at the decision level at which it arises,
+  so an explaining clause always contains a literal that is assigned at
+  the current decision level.
+
+  :param gauss_jordan: the engine, or None if no XOR constraint was found
+  :param xor_clause_count: the number of explaining clauses used
+  """
+
+  def __init__(self: XorPropagatingFormula, file_object: Union[TextIO, Formula], max_xor_size: int = 6) -> None:
+    # the formula propagates as it is constructed, before the XOR constraints are detected
+    self.gauss_jordan: Optional[GaussJordan] = None
+    self.xor_clause_count = 0
+    PropagatingFormula.__init__(self, file_object)
+    xors: List[Xor] = detect_xors([ clause.clause for clause in self.formula.formula ], max_xor_size)
+    if xors:
+      self.gauss_jordan = GaussJordan(xors)
+      self.propagate()
+
+  def propagate(self: XorPropagatingFormula) -> None:
+    while True:
+      PropagatingFormula.propagate(self)
+      if self.gauss_jordan is None or self.formula.get_current_state() != PropagatingFormula.UNRESOLVED:
+        return
+      clauses = self.gauss_jordan.propagate(self.formula.get_partial_assignment())
+      if not clauses:
+        return
+      self.xor_clause_count += len(clauses)
+      assignment = self.formula.get_partial_assignment()
+      for clause in clauses:
+        if not clause:
+          # the XOR constraints are inconsistent by themselves
+          self.formula.base_state = Formula.UNSATISFIED
+          return
+        unassigned = [ l for l in clause if abs(l) not in assignment ]
+        if not unassigned:
+          self.formula.add_clause(clause)
+          return
+        # each implied variable is the pivot of a different row, so none is implied twice
+        self.formula.assign(self.decision_level, abs(unassigned[0]), 1 if unassigned[0] > 0 else 0, Clause(clause))